@@ -0,0 +1,133 @@
+"""
+Micro-benchmark: emotion tag extraction and removal in Live2dModel.
+
+Compares the compiled matcher with the previous per-key scanning
+implementation (kept below as reference) on emotion maps of different sizes,
+and checks that both give the same results.
+
+Run from the repository root:
+    python benchmarks/bench_emotion_tags.py [--sizes 7 50 300] [--repeats 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loguru import logger  # noqa: E402
+
+from src.solvia_for_chat.live2d_model import Live2dModel  # noqa: E402
+
+BASE_EMOTIONS = ["neutral", "anger", "disgust", "fear", "joy", "smirk", "sadness", "surprise"]
+
+
+def legacy_extract_emotion(emo_map: dict, str_to_check: str) -> list:
+    expression_list = []
+    str_to_check = str_to_check.lower()
+    i = 0
+    while i < len(str_to_check):
+        if str_to_check[i] != "[":
+            i += 1
+            continue
+        for key in emo_map.keys():
+            emo_tag = f"[{key}]"
+            if str_to_check[i : i + len(emo_tag)] == emo_tag:
+                expression_list.append(emo_map[key])
+                i += len(emo_tag) - 1
+                break
+        i += 1
+    return expression_list
+
+
+def legacy_remove_emotion_keywords(emo_map: dict, target_str: str) -> str:
+    lower_str = target_str.lower()
+    for key in emo_map.keys():
+        lower_key = f"[{key}]".lower()
+        while lower_key in lower_str:
+            start_index = lower_str.find(lower_key)
+            end_index = start_index + len(lower_key)
+            target_str = target_str[:start_index] + target_str[end_index:]
+            lower_str = lower_str[:start_index] + lower_str[end_index:]
+    return target_str
+
+
+def build_model(size: int, tmp_dir: str) -> Live2dModel:
+    emotions = BASE_EMOTIONS + [f"Expr_{i:03d}" for i in range(max(0, size - len(BASE_EMOTIONS)))]
+    emotion_map = {name: i for i, name in enumerate(emotions[:size])}
+    path = os.path.join(tmp_dir, f"model_dict_{size}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"name": "bench", "emotionMap": emotion_map}], f)
+    return Live2dModel("bench", model_dict_path=path)
+
+
+def build_sentences(model: Live2dModel, count: int) -> list:
+    rng = random.Random(0)
+    keys = list(model.emo_map.keys())
+    words = "the washing machine on the left is free right now [note] and".split()
+    sentences = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(8, 30)):
+            roll = rng.random()
+            if roll < 0.1:
+                key = rng.choice(keys)
+                parts.append(f"[{key.upper() if rng.random() < 0.3 else key}]")
+            elif roll < 0.12:
+                parts.append("[unknown]")
+            else:
+                parts.append(rng.choice(words))
+        sentences.append(" ".join(parts))
+    return sentences
+
+
+def timed(fn, sentences, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sentence in sentences:
+            fn(sentence)
+    return (time.perf_counter() - start) / (repeats * len(sentences)) * 1e6
+
+
+def main(sizes, repeats: int) -> None:
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            model = build_model(size, tmp_dir)
+            sentences = build_sentences(model, 50)
+            for sentence in sentences:
+                assert model.extract_emotion(sentence) == legacy_extract_emotion(
+                    model.emo_map, sentence
+                ), sentence
+                assert model.remove_emotion_keywords(
+                    sentence
+                ) == legacy_remove_emotion_keywords(model.emo_map, sentence), sentence
+
+            results = {
+                "extract legacy": timed(
+                    lambda s: legacy_extract_emotion(model.emo_map, s), sentences, repeats
+                ),
+                "extract compiled": timed(model.extract_emotion, sentences, repeats),
+                "remove legacy": timed(
+                    lambda s: legacy_remove_emotion_keywords(model.emo_map, s),
+                    sentences,
+                    repeats,
+                ),
+                "remove compiled": timed(model.remove_emotion_keywords, sentences, repeats),
+            }
+            print(
+                f"emotions={size:4d}: "
+                + ", ".join(f"{name} {us:7.2f} us" for name, us in results.items())
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[7, 50, 300])
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    main(args.sizes, args.repeats)
@@ -0,0 +1,124 @@
+"""
+Micro-benchmark: per-token overhead of the agent output pipeline.
+
+Compares the legacy stack of decorator generators (sentence_divider ->
+actions_extractor -> display_processor -> tts_filter, rebuilt per turn) with
+the fused ``OutputPipeline`` built once per agent.
+
+Run from the repository root:
+    python benchmarks/bench_output_pipeline.py [--turns 200] [--segment-method regex]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loguru import logger  # noqa: E402
+
+from src.solvia_for_chat.config_manager import TTSPreprocessorConfig  # noqa: E402
+from src.solvia_for_chat.agent.transformers import (  # noqa: E402
+    OutputPipeline,
+    actions_extractor,
+    display_processor,
+    sentence_divider,
+    tts_filter,
+)
+
+REPLY = (
+    "<think>The user greets me, answer briefly.</think>"
+    "[joy] Hello there, it is nice to see you again! "
+    "The washing machine on the left is free right now. "
+    "洗濯機は左側が空いています。[neutral] 需要我为您播放教程视频吗？"
+) * 3
+
+
+class _StubLive2d:
+    """Stand-in for Live2dModel so the benchmark does not need model files"""
+
+    emo_map = {"joy": 3, "neutral": 0}
+
+    def extract_emotion(self, text: str):
+        lowered = text.lower()
+        return [v for k, v in self.emo_map.items() if f"[{k}]" in lowered]
+
+
+async def _tokens():
+    # Roughly token-sized chunks
+    for i in range(0, len(REPLY), 3):
+        yield REPLY[i : i + 3]
+
+
+def _token_count() -> int:
+    return len(range(0, len(REPLY), 3))
+
+
+TTS_CONFIG = TTSPreprocessorConfig(remove_special_char=True)
+
+
+async def run_legacy(turns: int, segment_method: str) -> float:
+    live2d = _StubLive2d()
+    start = time.perf_counter()
+    for _ in range(turns):
+        # The agent rebuilt this decorator stack for every turn
+        @tts_filter(TTS_CONFIG)
+        @display_processor()
+        @actions_extractor(live2d)
+        @sentence_divider(
+            faster_first_response=True,
+            segment_method=segment_method,
+            valid_tags=["think"],
+        )
+        async def chat():
+            async for token in _tokens():
+                yield token
+
+        async for _ in chat():
+            pass
+    return time.perf_counter() - start
+
+
+async def run_fused(turns: int, segment_method: str) -> float:
+    pipeline = OutputPipeline(
+        live2d_model=_StubLive2d(),
+        tts_preprocessor_config=TTS_CONFIG,
+        faster_first_response=True,
+        segment_method=segment_method,
+        valid_tags=["think"],
+    )
+    start = time.perf_counter()
+    for _ in range(turns):
+        async for _ in pipeline.process(_tokens()):
+            pass
+    return time.perf_counter() - start
+
+
+async def run_baseline(turns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(turns):
+        async for _ in _tokens():
+            pass
+    return time.perf_counter() - start
+
+
+async def main(turns: int, segment_method: str) -> None:
+    logger.remove()
+    tokens = _token_count() * turns
+    baseline = await run_baseline(turns)
+    legacy = await run_legacy(turns, segment_method)
+    fused = await run_fused(turns, segment_method)
+    print(f"segment_method={segment_method} turns={turns} tokens={tokens}")
+    for name, elapsed in (("legacy", legacy), ("fused", fused)):
+        overhead_us = (elapsed - baseline) / tokens * 1e6
+        print(f"{name:>7}: {elapsed * 1000:8.1f} ms total, {overhead_us:6.2f} us/token overhead")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--segment-method", default="regex", choices=["regex", "pysbd"])
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.segment_method))
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark: per-token cost of SentenceDivider as the reply grows.
+
+Streams replies of increasing length in token-sized chunks and reports the
+time spent per token. With incremental scanning the cost should stay roughly
+flat; a full re-scan (and re-segmentation) per token grows with the length of
+the unsegmented buffer. Also times language detection for the segmenter.
+
+Before timing, checks that every reply comes out with no text lost, whatever
+the chunk size: the sentences yielded, joined, hold the same non-space
+characters as the reply.
+
+Run from the repository root:
+    python benchmarks/bench_sentence_divider.py [--segment-method pysbd]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langdetect import detect  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from src.solvia_for_chat.utils.sentence_divider import (  # noqa: E402
+    SentenceDivider,
+    detect_language,
+)
+
+SAMPLES = {
+    # Long clauses without end punctuation keep the buffer growing
+    "en": "the machine on the left is free and the one next to it will be done soon ",
+    "abbrev": "Dr. Smith said the dryer on the left is ready for you and your friend ",
+    "zh": "左边的洗衣机现在是空的旁边那台马上就好了",
+    "ja": "左側の洗濯機は空いていますが隣の洗濯機はもうすぐ終わります",
+}
+
+# Replies the segmenters used to drop text from (trailing punctuation that
+# pysbd leaves out, abbreviations skipped by the regex method)
+EQUIVALENCE_INPUTS = [
+    "Hi. Ok.!!",
+    "g.!!",
+    "?。 Dr.abc，nk> ",
+    "Mr. Smith went to Washington. He met Dr. Jones at 5 p.m. Then they left... Really?",
+    "<think>Greet briefly.</think> Hello there, nice to see you! 洗濯機は左側が空いています。",
+]
+
+
+async def _stream(text: str, chunk: int = 3):
+    for i in range(0, len(text), chunk):
+        yield text[i : i + chunk]
+
+
+async def time_reply(text: str, segment_method: str) -> float:
+    divider = SentenceDivider(
+        faster_first_response=False,
+        segment_method=segment_method,
+        valid_tags=["think"],
+    )
+    start = time.perf_counter()
+    async for _ in divider.process_stream(_stream(text)):
+        pass
+    return time.perf_counter() - start
+
+
+async def split_reply(text: str, segment_method: str, chunk: int) -> list:
+    divider = SentenceDivider(
+        faster_first_response=True,
+        segment_method=segment_method,
+        valid_tags=["think"],
+    )
+    return [s.text async for s in divider.process_stream(_stream(text, chunk))]
+
+
+async def check_equivalence(segment_method: str) -> bool:
+    """Report the replies whose sentences do not add up to the reply"""
+    ok = True
+    for text in EQUIVALENCE_INPUTS:
+        expected = "".join(text.split())
+        for chunk in (1, 2, 3, 5, 7, len(text)):
+            sentences = await split_reply(text, segment_method, chunk)
+            if "".join("".join(sentences).split()) != expected:
+                ok = False
+                print(f"text lost: {text!r} chunk={chunk} -> {sentences}")
+    print(f"equivalence: {'ok' if ok else 'FAILED'} ({len(EQUIVALENCE_INPUTS)} replies)")
+    return ok
+
+
+async def main(segment_method: str, repeats: int) -> None:
+    logger.remove()
+    print(f"segment_method={segment_method}")
+    await check_equivalence(segment_method)
+    for name, clause in SAMPLES.items():
+        row = []
+        for n in (1, 4, 16):
+            text = clause * n + "."
+            tokens = len(range(0, len(text), 3))
+            elapsed = min([await time_reply(text, segment_method) for _ in range(repeats)])
+            row.append(f"{len(text):5d} chars {elapsed / tokens * 1e6:7.1f} us/token")
+        print(f"{name:>7}: " + " | ".join(row))
+
+    for name, clause in SAMPLES.items():
+        n = 200
+        start = time.perf_counter()
+        for _ in range(n):
+            detect_language(clause)
+        script = (time.perf_counter() - start) / n * 1e6
+        start = time.perf_counter()
+        for _ in range(n):
+            try:
+                detect(clause)
+            except Exception:
+                pass
+        full = (time.perf_counter() - start) / n * 1e6
+        print(
+            f"detect {name:>7}: detect_language {script:8.1f} us, langdetect {full:8.1f} us"
+            f" -> {detect_language(clause)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segment-method", default="pysbd", choices=["regex", "pysbd"])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.segment_method, args.repeats))
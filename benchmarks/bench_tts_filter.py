@@ -0,0 +1,116 @@
+"""
+Golden-corpus check and micro-benchmark for the TTS text filter.
+
+Runs a corpus of Chinese, Japanese and English replies (plus randomly
+generated strings full of brackets and asterisks) through the fused
+``TTSTextFilter`` and through the individual filters applied one after the
+other, for every combination of ``TTSPreprocessorConfig`` flags, and fails on
+the first difference. Then times both on the corpus with the default flags.
+
+Run from the repository root:
+    python benchmarks/bench_tts_filter.py [--fuzz 20000] [--repeats 200]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from loguru import logger  # noqa: E402
+
+from src.solvia_for_chat.utils.tts_preprocessor import (  # noqa: E402
+    TTSTextFilter,
+    _tts_filter_by_stage,
+)
+
+GOLDEN_CORPUS = [
+    # English
+    "Hello there! *waves happily* It's nice to see you again.",
+    "The washing machine on the left is free [joy] right now.",
+    "Sure (I think so), the dryer <b>number 3</b> will be done in **5 minutes**.",
+    "Here are the steps:\n1. Open the lid\n2. Add detergent *gently*\n3. Press start",
+    "***Important*** — don't overload the drum!!! 😊",
+    "Nested [brackets [inside] brackets] and (parens (inside) parens) work.",
+    "Unbalanced ] closing and [ opening brackets, (also) ) these.",
+    "Math: 2 * 3 = 6, and 4*5 = 20. A lone * asterisk.",
+    "Tabs\tand   multiple    spaces\n\n and newlines.",
+    "<think>internal</think> Visible text with <tag attr='x'>markup</tag>.",
+    "Price: $3.50 — 50% off! #deal @store ~approx~ ^caret^ | pipe",
+    "Emoji at the end 🎉🎉",
+    "",
+    "   ",
+    "*",
+    "**",
+    "***",
+    "*unclosed emphasis\n*on the next line*",
+    # Chinese
+    "你好！我是洗衣助手。（微笑）请问有什么可以帮您？",
+    "左边的洗衣机现在是空的【提示】，右边的还需要*大约*十分钟。",
+    "需要我为您播放教程视频吗？[neutral] 好的，马上为您播放！",
+    "温度设置：４０℃，转速：１２００ｒｐｍ。",
+    "《使用说明》第三章：如何清洁滤网～",
+    "（括号（嵌套）括号）外面的文字。",
+    # Japanese
+    "こんにちは！洗濯機は左側が空いています。[joy]",
+    "乾燥機は（あと５分で）終わります。*にっこり*",
+    "ｶﾀｶﾅの半角文字も正規化されます。「かぎかっこ」も。",
+    "①②③の番号付きリスト、㈱や㎏などの互換文字。",
+    "<b>太字</b>と**強調**と[メモ]を含む文章です。",
+]
+
+SPECIAL_POOL = "[]()<>**\n \t　abcXYZ中文かな。！？,.😊①＊（）"
+
+
+def fuzz_corpus(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        length = rng.randint(0, 40)
+        yield "".join(rng.choice(SPECIAL_POOL) for _ in range(length))
+
+
+def check(fuzz: int) -> int:
+    corpus = GOLDEN_CORPUS + list(fuzz_corpus(fuzz))
+    checked = 0
+    for flags in itertools.product((False, True), repeat=5):
+        special, brackets, parentheses, asterisks, angle = flags
+        fused = TTSTextFilter(special, brackets, parentheses, asterisks, angle)
+        for text in corpus:
+            expected = _tts_filter_by_stage(text, *flags)
+            actual = fused(text)
+            if actual != expected:
+                raise AssertionError(
+                    f"Mismatch for flags={flags} text={text!r}: "
+                    f"expected {expected!r}, got {actual!r}"
+                )
+            checked += 1
+    return checked
+
+
+def bench(repeats: int) -> None:
+    flags = (True, True, True, True, True)
+    fused = TTSTextFilter(*flags)
+    corpus = [text for text in GOLDEN_CORPUS if text.strip()]
+    for name, fn in (
+        ("by stage", lambda text: _tts_filter_by_stage(text, *flags)),
+        ("fused", fused),
+    ):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for text in corpus:
+                fn(text)
+        per_call = (time.perf_counter() - start) / (repeats * len(corpus)) * 1e6
+        print(f"{name:>9}: {per_call:6.2f} us per sentence")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    logger.remove()
+    print(f"golden check: {check(args.fuzz)} (flags, text) pairs identical")
+    bench(args.repeats)
@@ -13,6 +13,7 @@ from pathlib import Path
 # 添加项目相关的导入
 from src.solvia_for_chat.server import WebSocketServer
 from src.solvia_for_chat.config_manager import Config, validate_config, read_yaml
+from src.solvia_for_chat.utils.startup_profile import startup_profile
 
 os.environ['HF_HOME'] = str(Path(__file__).parent / 'models') # 设置模型缓存路径
 os.environ['MODELSCOPE_CACHE'] = str(Path(__file__).parent / 'models') # 设置模型缓存路径
@@ -79,8 +80,41 @@ def parse_args():
     return parser.parse_args()
 
 
+async def serve(server: WebSocketServer, server_config, console_log_level: str) -> bool:
+    """
+    Serve HTTP right away and load the server context in the same event loop.
+    Websocket sessions wait for the context. Returns False if loading failed.
+    """
+    uvicorn_server = uvicorn.Server(
+        uvicorn.Config(
+            app=server.app,
+            host=server_config.host,
+            port=server_config.port,
+            log_level=console_log_level.lower(),
+        )
+    )
+    logger.info(f"Starting server on {server_config.host}:{server_config.port}")
+    serving = asyncio.create_task(uvicorn_server.serve())
+
+    # Perform asynchronous initialization (loading context, etc.)
+    logger.info("Initializing server context...")
+    try:
+        await server.initialize()
+        logger.info("Server context initialized successfully.")
+    except Exception as e:
+        logger.error(f"Failed to initialize server context: {e}")
+        logger.info(startup_profile.waterfall())
+        uvicorn_server.should_exit = True
+        await serving
+        return False
+
+    await serving
+    return True
+
+
 @logger.catch
 def run(console_log_level: str):
+    startup_profile.begin()
     init_logger(console_log_level)
     logger.info(f"Open-LLM-VTuber, version v{get_version()}")
 
@@ -90,7 +124,8 @@ def run(console_log_level: str):
     atexit.register(WebSocketServer.clean_cache)
 
     # Load configurations from yaml file
-    config: Config = validate_config(read_yaml("conf.yaml"))
+    with startup_profile.track("config"):
+        config: Config = validate_config(read_yaml("conf.yaml"))
     server_config = config.system_config
 
     if server_config.enable_proxy:
@@ -99,24 +134,11 @@ def run(console_log_level: str):
     # Initialize the WebSocket server (synchronous part)
     server = WebSocketServer(config=config)
 
-    # Perform asynchronous initialization (loading context, etc.)
-    logger.info("Initializing server context...")
-    try:
-        asyncio.run(server.initialize())
-        logger.info("Server context initialized successfully.")
-    except Exception as e:
-        logger.error(f"Failed to initialize server context: {e}")
+    # Run the Uvicorn server in the loop the context is loaded in, so the
+    # context's MCP sessions and tasks live in the loop that serves clients
+    if not asyncio.run(serve(server, server_config, console_log_level)):
         sys.exit(1)  # Exit if initialization fails
 
-    # Run the Uvicorn server
-    logger.info(f"Starting server on {server_config.host}:{server_config.port}")
-    uvicorn.run(
-        app=server.app,
-        host=server_config.host,
-        port=server_config.port,
-        log_level=console_log_level.lower(),
-    )
-
 
 if __name__ == "__main__":
     args = parse_args()
@@ -3,24 +3,21 @@ from typing import (
     List,
     Dict,
     Any,
-    Callable,
     Literal,
     Union,
     Optional,
+    Tuple,
 )
+import asyncio
 import json
+from contextlib import aclosing
 from loguru import logger
 from .agent_interface import AgentInterface
 from ..output_types import SentenceOutput, DisplayText
 from ..stateless_llm.stateless_llm_interface import StatelessLLMInterface
 from ..stateless_llm.openai_compatible_llm import AsyncLLM as OpenAICompatibleAsyncLLM
-from ...chat_history_manager import get_history
-from ..transformers import (
-    sentence_divider,
-    actions_extractor,
-    tts_filter,
-    display_processor,
-)
+from ...chat_history_manager import get_history_tail
+from ..transformers import OutputPipeline
 from ...config_manager import TTSPreprocessorConfig
 from ..input_types import BatchInput, TextSource
 from prompts import prompt_loader
@@ -90,6 +87,14 @@ class BasicMemoryAgent(AgentInterface):
                 "ToolManager not provided, agent will not have pre-formatted tools."
             )
 
+        # Built once per agent; each turn only gets a fresh per-run divider state
+        self._output_pipeline = OutputPipeline(
+            live2d_model=self._live2d_model,
+            tts_preprocessor_config=self._tts_preprocessor_config,
+            faster_first_response=self._faster_first_response,
+            segment_method=self._segment_method,
+            valid_tags=["think"],
+        )
         self._set_llm(llm)
         self.set_system(system if system else self._system)
 
@@ -123,7 +128,6 @@ class BasicMemoryAgent(AgentInterface):
     def _set_llm(self, llm: StatelessLLMInterface):
         """Set the LLM for chat completion."""
         self._llm = llm
-        self.chat = self._chat_function_factory()
 
     def set_system(self, system: str):
         """Set the system prompt."""
@@ -187,14 +191,16 @@ class BasicMemoryAgent(AgentInterface):
 
     def set_memory_from_history(self, conf_uid: str, history_uid: str) -> None:
         """Load memory from chat history."""
-        messages = get_history(conf_uid, history_uid)
+        # Only the messages that fit the memory window are read
+        messages = get_history_tail(conf_uid, history_uid, self.MAX_MEMORY_MESSAGES)
 
-        self._memory = []
+        # Built aside and swapped in, as this may run in a worker thread
+        memory = []
         for msg in messages:
             role = "user" if msg["role"] == "human" else "assistant"
             content = msg["content"]
             if isinstance(content, str) and content:
-                self._memory.append(
+                memory.append(
                     {
                         "role": role,
                         "content": content,
@@ -202,8 +208,33 @@ class BasicMemoryAgent(AgentInterface):
                 )
             else:
                 logger.warning(f"Skipping invalid message from history: {msg}")
+        self._memory = memory
         logger.info(f"Loaded {len(self._memory)} messages from history.")
 
+    def snapshot_memory(self) -> List[Dict[str, Any]]:
+        """Return a copy of the memory that can later be passed to restore_memory."""
+        return [dict(message) for message in self._memory]
+
+    def restore_memory(self, snapshot: List[Dict[str, Any]]) -> None:
+        """Restore memory from a snapshot, e.g. after a discarded speculative turn."""
+        self._memory = [dict(message) for message in snapshot]
+
+    def rewrite_user_input(self, old_text: str, new_text: str) -> None:
+        """Replace the latest user message old_text in memory, e.g. a partial transcript by the final one."""
+        for message in reversed(self._memory):
+            if message["role"] == "user" and message["content"] == old_text:
+                message["content"] = new_text
+                return
+
+    def can_speculate(self, text: str) -> bool:
+        """
+        Whether a reply to this input may be generated speculatively.
+
+        Laundry queries are excluded because their shortcut path runs tools and
+        notifies the frontend directly, which cannot be taken back.
+        """
+        return not self._laundry_handler.is_laundry_related_query(text)
+
     def handle_interrupt(self, heard_response: str) -> None:
         """Handle user interruption."""
         if self._interrupt_handled:
@@ -311,47 +342,50 @@ class BasicMemoryAgent(AgentInterface):
         current_assistant_message_content = []
 
         while True:
-            stream = self._llm.chat_completion(messages, self._system, tools=tools)
             pending_tool_calls.clear()
             current_assistant_message_content.clear()
 
-            async for event in stream:
-                if event["type"] == "text_delta":
-                    text = event["text"]
-                    current_turn_text += text
-                    yield text
-                    if (
-                        not current_assistant_message_content
-                        or current_assistant_message_content[-1]["type"] != "text"
-                    ):
+            # Leaving this block (break, error or cancellation) closes the HTTP stream
+            async with aclosing(
+                self._llm.chat_completion(messages, self._system, tools=tools)
+            ) as stream:
+                async for event in stream:
+                    if event["type"] == "text_delta":
+                        text = event["text"]
+                        current_turn_text += text
+                        yield text
+                        if (
+                            not current_assistant_message_content
+                            or current_assistant_message_content[-1]["type"] != "text"
+                        ):
+                            current_assistant_message_content.append(
+                                {"type": "text", "text": text}
+                            )
+                        else:
+                            current_assistant_message_content[-1]["text"] += text
+                    elif event["type"] == "tool_use_complete":
+                        tool_call_data = event["data"]
+                        logger.info(
+                            f"Tool request: {tool_call_data['name']} (ID: {tool_call_data['id']})"
+                        )
+                        pending_tool_calls.append(tool_call_data)
                         current_assistant_message_content.append(
-                            {"type": "text", "text": text}
+                            {
+                                "type": "tool_use",
+                                "id": tool_call_data["id"],
+                                "name": tool_call_data["name"],
+                                "input": tool_call_data["input"],
+                            }
                         )
-                    else:
-                        current_assistant_message_content[-1]["text"] += text
-                elif event["type"] == "tool_use_complete":
-                    tool_call_data = event["data"]
-                    logger.info(
-                        f"Tool request: {tool_call_data['name']} (ID: {tool_call_data['id']})"
-                    )
-                    pending_tool_calls.append(tool_call_data)
-                    current_assistant_message_content.append(
-                        {
-                            "type": "tool_use",
-                            "id": tool_call_data["id"],
-                            "name": tool_call_data["name"],
-                            "input": tool_call_data["input"],
-                        }
-                    )
-                elif event["type"] == "message_delta":
-                    if event["data"]["delta"].get("stop_reason"):
-                        stop_reason = event["data"]["delta"].get("stop_reason")
-                elif event["type"] == "message_stop":
-                    break
-                elif event["type"] == "error":
-                    logger.error(f"LLM API Error: {event['message']}")
-                    yield f"[Error from LLM: {event['message']}]"
-                    return
+                    elif event["type"] == "message_delta":
+                        if event["data"]["delta"].get("stop_reason"):
+                            stop_reason = event["data"]["delta"].get("stop_reason")
+                    elif event["type"] == "message_stop":
+                        break
+                    elif event["type"] == "error":
+                        logger.error(f"LLM API Error: {event['message']}")
+                        yield f"[Error from LLM: {event['message']}]"
+                        return
 
             if pending_tool_calls:
                 filtered_assistant_content = [
@@ -401,6 +435,9 @@ class BasicMemoryAgent(AgentInterface):
                     logger.warning(
                         "Tool executor finished without final results marker."
                     )
+                finally:
+                    # Stops tool work left running when the turn is interrupted
+                    await tool_executor_iterator.aclose()
 
                 if tool_results_for_llm:
                     messages.append({"role": "user", "content": tool_results_for_llm})
@@ -416,350 +453,394 @@ class BasicMemoryAgent(AgentInterface):
         self,
         initial_messages: List[Dict[str, Any]],
         tools: List[Dict[str, Any]],
+        early_tool_dispatch: bool = True,
     ) -> AsyncIterator[Union[str, Dict[str, Any]]]:
-        """Handle OpenAI interaction with tool support."""
+        """Handle OpenAI interaction with tool support.
+
+        With early_tool_dispatch, each tool call starts as soon as its
+        arguments are complete, while the LLM is still streaming; all results
+        are awaited before the follow-up request.
+        """
         messages = initial_messages.copy()
         current_turn_text = ""
         pending_tool_calls: Union[List[ToolCallObject], List[Dict[str, Any]]] = []
         current_system_prompt = self._system
+        # Tool id -> (task, arguments) for calls started during the stream
+        started_tool_calls: Dict[str, Tuple[asyncio.Task, str]] = {}
 
-        while True:
-            if self.prompt_mode_flag:
-                if self._mcp_prompt_string:
-                    current_system_prompt = (
-                        f"{self._system}\n\n{self._mcp_prompt_string}"
-                    )
+        try:
+            while True:
+                if self.prompt_mode_flag:
+                    if self._mcp_prompt_string:
+                        current_system_prompt = (
+                            f"{self._system}\n\n{self._mcp_prompt_string}"
+                        )
+                    else:
+                        logger.warning("Prompt mode active but mcp_prompt_string is empty!")
+                        current_system_prompt = self._system
+                    tools_for_api = None
                 else:
-                    logger.warning("Prompt mode active but mcp_prompt_string is empty!")
                     current_system_prompt = self._system
-                tools_for_api = None
-            else:
-                current_system_prompt = self._system
-                tools_for_api = tools
+                    tools_for_api = tools
+
+                pending_tool_calls.clear()
+                current_turn_text = ""
+                assistant_message_for_api = None
+                detected_prompt_json = None
+                goto_next_while_iteration = False
+                # Tokenizer state belongs to one LLM stream; the agent may be
+                # shared by several sessions, so never reuse it across streams
+                json_detector = StreamJSONDetector() if self._json_detector else None
+                # Per stream as well: the LLM instance is shared by sessions too
+                stream_state = {"complete": False}
+                # max_parallel_tools limit of this response, made on its first early call
+                tool_limit = None
+
+                # Leaving this block (break, error or cancellation) closes the HTTP stream
+                async with aclosing(
+                    self._llm.chat_completion(
+                        messages,
+                        current_system_prompt,
+                        tools=tools_for_api,
+                        early_tool_calls=early_tool_dispatch
+                        and tools_for_api is not None
+                        and self._tool_executor is not None,
+                        stream_state=stream_state,
+                    )
+                ) as stream:
+                    async for event in stream:
+                        if self.prompt_mode_flag:
+                            if isinstance(event, str):
+                                current_turn_text += event
+                                if json_detector:
+                                    potential_json = json_detector.process_chunk(event)
+                                    if potential_json:
+                                        try:
+                                            if isinstance(potential_json, list):
+                                                detected_prompt_json = potential_json
+                                            elif isinstance(potential_json, dict):
+                                                detected_prompt_json = [potential_json]
+
+                                            if detected_prompt_json:
+                                                # Stopping at the tool call is not an abort
+                                                stream_state["complete"] = True
+                                                break
+                                        except Exception as e:
+                                            logger.error(f"Error parsing detected JSON: {e}")
+                                            yield f"[Error parsing tool JSON: {e}]"
+                                            goto_next_while_iteration = True
+                                            break
+                                yield event
+                        else:
+                            if isinstance(event, str):
+                                current_turn_text += event
+                                yield event
+                            elif isinstance(event, ToolCallObject):
+                                # Arguments complete while the stream goes on
+                                if tool_limit is None:
+                                    tool_limit = self._tool_executor.response_limit()
+                                early_start = self._tool_executor.start_tool_call(
+                                    event, tool_limit
+                                )
+                                if early_start:
+                                    task, running_status = early_start
+                                    started_tool_calls[event.id] = (
+                                        task,
+                                        event.function.arguments,
+                                    )
+                                    yield running_status
+                            elif isinstance(event, list) and all(
+                                isinstance(tc, ToolCallObject) for tc in event
+                            ):
+                                pending_tool_calls = event
+                                assistant_message_for_api = {
+                                    "role": "assistant",
+                                    "content": current_turn_text if current_turn_text else None,
+                                    "tool_calls": [
+                                        {
+                                            "id": tc.id,
+                                            "type": tc.type,
+                                            "function": {
+                                                "name": tc.function.name,
+                                                "arguments": tc.function.arguments,
+                                            },
+                                        }
+                                        for tc in pending_tool_calls
+                                    ],
+                                }
+                                break
+                            elif event == "__API_NOT_SUPPORT_TOOLS__":
+                                logger.warning(
+                                    f"LLM {getattr(self._llm, 'model', '')} has no native tool support. Switching to prompt mode."
+                                )
+                                self.prompt_mode_flag = True
+                                if self._tool_manager:
+                                    self._tool_manager.disable()
+                                if self._json_detector:
+                                    self._json_detector.reset()
+                                goto_next_while_iteration = True
+                                break
+                if goto_next_while_iteration:
+                    continue
 
-            stream = self._llm.chat_completion(
-                messages, current_system_prompt, tools=tools_for_api
-            )
-            pending_tool_calls.clear()
-            current_turn_text = ""
-            assistant_message_for_api = None
-            detected_prompt_json = None
-            goto_next_while_iteration = False
+                if detected_prompt_json:
+                    logger.info("Processing tools detected via prompt mode JSON.")
+                    self._add_message(current_turn_text, "assistant")
 
-            async for event in stream:
-                if self.prompt_mode_flag:
-                    if isinstance(event, str):
-                        current_turn_text += event
-                        if self._json_detector:
-                            potential_json = self._json_detector.process_chunk(event)
-                            if potential_json:
-                                try:
-                                    if isinstance(potential_json, list):
-                                        detected_prompt_json = potential_json
-                                    elif isinstance(potential_json, dict):
-                                        detected_prompt_json = [potential_json]
-
-                                    if detected_prompt_json:
-                                        break
-                                except Exception as e:
-                                    logger.error(f"Error parsing detected JSON: {e}")
-                                    if self._json_detector:
-                                        self._json_detector.reset()
-                                    yield f"[Error parsing tool JSON: {e}]"
-                                    goto_next_while_iteration = True
-                                    break
-                        yield event
-                else:
-                    if isinstance(event, str):
-                        current_turn_text += event
-                        yield event
-                    elif isinstance(event, list) and all(
-                        isinstance(tc, ToolCallObject) for tc in event
-                    ):
-                        pending_tool_calls = event
-                        assistant_message_for_api = {
-                            "role": "assistant",
-                            "content": current_turn_text if current_turn_text else None,
-                            "tool_calls": [
-                                {
-                                    "id": tc.id,
-                                    "type": tc.type,
-                                    "function": {
-                                        "name": tc.function.name,
-                                        "arguments": tc.function.arguments,
-                                    },
-                                }
-                                for tc in pending_tool_calls
-                            ],
-                        }
-                        break
-                    elif event == "__API_NOT_SUPPORT_TOOLS__":
-                        logger.warning(
-                            f"LLM {getattr(self._llm, 'model', '')} has no native tool support. Switching to prompt mode."
+                    parsed_tools = self._tool_executor.process_tool_from_prompt_json(
+                        detected_prompt_json
+                    )
+                    if parsed_tools:
+                        tool_results_for_llm = []
+                        if not self._tool_executor:
+                            logger.error(
+                                "Prompt Tool interaction requested but ToolExecutor/MCPClient is not available."
+                            )
+                            yield "[Error: ToolExecutor/MCPClient not configured for prompt mode]"
+                            continue
+
+                        tool_executor_iterator = self._tool_executor.execute_tools(
+                            tool_calls=parsed_tools,
+                            caller_mode="Prompt",
                         )
-                        self.prompt_mode_flag = True
-                        if self._tool_manager:
-                            self._tool_manager.disable()
-                        if self._json_detector:
-                            self._json_detector.reset()
-                        goto_next_while_iteration = True
-                        break
-            if goto_next_while_iteration:
-                continue
+                        try:
+                            while True:
+                                update = await anext(tool_executor_iterator)
+                                if update.get("type") == "final_tool_results":
+                                    tool_results_for_llm = update.get("results", [])
+                                    break
+                                else:
+                                    yield update
+                        except StopAsyncIteration:
+                            logger.warning(
+                                "Prompt mode tool executor finished without final results marker."
+                            )
+                        finally:
+                            await tool_executor_iterator.aclose()
+
+                        if tool_results_for_llm:
+                            result_strings = [
+                                res.get("content", "Error: Malformed result")
+                                for res in tool_results_for_llm
+                            ]
+                            combined_results_str = "\n".join(result_strings)
+                            messages.append(
+                                {"role": "user", "content": combined_results_str}
+                            )
+                    continue
 
-            if detected_prompt_json:
-                logger.info("Processing tools detected via prompt mode JSON.")
-                self._add_message(current_turn_text, "assistant")
+                elif pending_tool_calls and assistant_message_for_api:
+                    messages.append(assistant_message_for_api)
+                    if current_turn_text:
+                        self._add_message(current_turn_text, "assistant")
 
-                parsed_tools = self._tool_executor.process_tool_from_prompt_json(
-                    detected_prompt_json
-                )
-                if parsed_tools:
                     tool_results_for_llm = []
                     if not self._tool_executor:
                         logger.error(
-                            "Prompt Tool interaction requested but ToolExecutor/MCPClient is not available."
+                            "OpenAI Tool interaction requested but ToolExecutor/MCPClient is not available."
                         )
-                        yield "[Error: ToolExecutor/MCPClient not configured for prompt mode]"
+                        yield "[Error: ToolExecutor/MCPClient not configured for OpenAI mode]"
                         continue
 
                     tool_executor_iterator = self._tool_executor.execute_tools(
-                        tool_calls=parsed_tools,
-                        caller_mode="Prompt",
+                        tool_calls=pending_tool_calls,
+                        caller_mode="OpenAI",
+                        started=started_tool_calls,
+                        turn_limit=tool_limit,
                     )
                     try:
                         while True:
                             update = await anext(tool_executor_iterator)
                             if update.get("type") == "final_tool_results":
                                 tool_results_for_llm = update.get("results", [])
+                                # 检查工具结果中是否有洗衣店视频响应
+                                await self._process_laundry_tool_results(tool_results_for_llm)
                                 break
                             else:
                                 yield update
                     except StopAsyncIteration:
                         logger.warning(
-                            "Prompt mode tool executor finished without final results marker."
+                            "OpenAI tool executor finished without final results marker."
                         )
+                    finally:
+                        await tool_executor_iterator.aclose()
 
                     if tool_results_for_llm:
-                        result_strings = [
-                            res.get("content", "Error: Malformed result")
-                            for res in tool_results_for_llm
-                        ]
-                        combined_results_str = "\n".join(result_strings)
-                        messages.append(
-                            {"role": "user", "content": combined_results_str}
-                        )
-                continue
-
-            elif pending_tool_calls and assistant_message_for_api:
-                messages.append(assistant_message_for_api)
-                if current_turn_text:
-                    self._add_message(current_turn_text, "assistant")
-
-                tool_results_for_llm = []
-                if not self._tool_executor:
-                    logger.error(
-                        "OpenAI Tool interaction requested but ToolExecutor/MCPClient is not available."
-                    )
-                    yield "[Error: ToolExecutor/MCPClient not configured for OpenAI mode]"
+                        messages.extend(tool_results_for_llm)
                     continue
 
-                tool_executor_iterator = self._tool_executor.execute_tools(
-                    tool_calls=pending_tool_calls,
-                    caller_mode="OpenAI",
-                )
-                try:
-                    while True:
-                        update = await anext(tool_executor_iterator)
-                        if update.get("type") == "final_tool_results":
-                            tool_results_for_llm = update.get("results", [])
-                            # 检查工具结果中是否有洗衣店视频响应
-                            await self._process_laundry_tool_results(tool_results_for_llm)
-                            break
-                        else:
-                            yield update
-                except StopAsyncIteration:
-                    logger.warning(
-                        "OpenAI tool executor finished without final results marker."
-                    )
-
-                if tool_results_for_llm:
-                    messages.extend(tool_results_for_llm)
-                continue
-
-            else:
-                if current_turn_text:
-                    self._add_message(current_turn_text, "assistant")
-                return
+                else:
+                    if current_turn_text:
+                        self._add_message(current_turn_text, "assistant")
+                    return
+        finally:
+            # Interrupted or failed before the results were collected
+            for task, _ in started_tool_calls.values():
+                task.cancel()
+            started_tool_calls.clear()
 
-    def _chat_function_factory(
+    async def _chat_with_memory(
         self,
-    ) -> Callable[[BatchInput], AsyncIterator[Union[SentenceOutput, Dict[str, Any]]]]:
-        """Create the chat pipeline function."""
+        input_data: BatchInput,
+    ) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """Process chat with memory and tools, yielding raw tokens and tool events."""
+        self.reset_interrupt()
+        self.prompt_mode_flag = False
 
-        @tts_filter(self._tts_preprocessor_config)
-        @display_processor()
-        @actions_extractor(self._live2d_model)
-        @sentence_divider(
-            faster_first_response=self._faster_first_response,
-            segment_method=self._segment_method,
-            valid_tags=["think"],
-        )
-        async def chat_with_memory(
-            input_data: BatchInput,
-        ) -> AsyncIterator[Union[str, Dict[str, Any]]]:
-            """Process chat with memory and tools."""
-            self.reset_interrupt()
-            self.prompt_mode_flag = False
-
-            # 检查是否为洗衣机相关查询
-            user_text = ""
-            if input_data.texts:
-                for text_data in input_data.texts:
-                    if text_data.source == TextSource.INPUT:
-                        user_text += text_data.content
+        # 检查是否为洗衣机相关查询
+        user_text = ""
+        if input_data.texts:
+            for text_data in input_data.texts:
+                if text_data.source == TextSource.INPUT:
+                    user_text += text_data.content
+        
+        # 如果是洗衣机相关查询，直接调用洗衣机工具
+        if user_text and self._laundry_handler.is_laundry_related_query(user_text):
+            logger.info(f"🧺 检测到洗衣机相关查询: {user_text}")
+            machine_id = self._laundry_handler.extract_machine_number(user_text)
+            language_mode = self._laundry_handler.detect_language_mode(user_text)
+            # 即刻反馈，降低主观等待（非静默模式）
+            try:
+                if language_mode != "silent":
+                    if language_mode == "ja":
+                        yield "少々お待ちください。チュートリアルを確認します。"
+                    elif language_mode == "en":
+                        yield "One moment, fetching the tutorial for you."
+                    else:
+                        yield "稍等，我马上为您查找教程。"
+            except Exception:
+                pass
             
-            # 如果是洗衣机相关查询，直接调用洗衣机工具
-            if user_text and self._laundry_handler.is_laundry_related_query(user_text):
-                logger.info(f"🧺 检测到洗衣机相关查询: {user_text}")
-                machine_id = self._laundry_handler.extract_machine_number(user_text)
-                language_mode = self._laundry_handler.detect_language_mode(user_text)
-                # 即刻反馈，降低主观等待（非静默模式）
-                try:
-                    if language_mode != "silent":
-                        if language_mode == "ja":
-                            yield "少々お待ちください。チュートリアルを確認します。"
-                        elif language_mode == "en":
-                            yield "One moment, fetching the tutorial for you."
-                        else:
-                            yield "稍等，我马上为您查找教程。"
-                except Exception:
-                    pass
+            # 调用洗衣机MCP工具
+            if self._tool_executor:
+                tool_call = self._laundry_handler.format_mcp_tool_call(
+                    user_text, machine_id, language_mode
+                )
                 
-                # 调用洗衣机MCP工具
-                if self._tool_executor:
-                    tool_call = self._laundry_handler.format_mcp_tool_call(
-                        user_text, machine_id, language_mode
+                try:
+                    # 构造工具调用对象
+                    from ...mcpp.types import ToolCallObject, ToolCallFunctionObject
+                    tool_call_obj = ToolCallObject(
+                        id=f"laundry_{hash(user_text)}",
+                        type="function",
+                        index=0,
+                        function=ToolCallFunctionObject(
+                            name=tool_call["tool_name"],
+                            arguments=json.dumps(tool_call["arguments"])
+                        )
                     )
                     
-                    try:
-                        # 构造工具调用对象
-                        from ...mcpp.types import ToolCallObject, ToolCallFunctionObject
-                        tool_call_obj = ToolCallObject(
-                            id=f"laundry_{hash(user_text)}",
-                            type="function",
-                            index=0,
-                            function=ToolCallFunctionObject(
-                                name=tool_call["tool_name"],
-                                arguments=json.dumps(tool_call["arguments"])
-                            )
-                        )
-                        
-                        # 执行工具调用
-                        final_results = []
-                        async for result in self._tool_executor.execute_tools([tool_call_obj], "OpenAI"):
-                            # 只处理最终的工具结果
-                            if isinstance(result, dict) and result.get("type") == "final_tool_results":
-                                final_results = result.get("results", [])
-                                break
-                        
-                        # 处理工具结果
-                        if final_results:
-                            logger.debug(f"洗衣机工具调用返回最终结果数量: {len(final_results)}")
-                            # 先处理潜在的视频播放，通过 WebSocket 通知前端
-                            await self._process_laundry_tool_results(final_results)
-
-                            # 汇总可直接对用户朗读的文本内容
-                            speak_texts: list[str] = []
-                            try:
-                                for result in final_results:
-                                    if isinstance(result, dict) and result.get("role") == "tool":
-                                        content = result.get("content", "")
-                                        if isinstance(content, str) and content:
-                                            try:
-                                                parsed = json.loads(content)
-                                            except json.JSONDecodeError:
-                                                parsed = None
-
-                                            if isinstance(parsed, dict):
-                                                resp_type = parsed.get("type")
-                                                if resp_type == "video_response":
-                                                    # 使用工具自带的 response_text 作为口头反馈
-                                                    if parsed.get("response_text"):
-                                                        speak_texts.append(parsed["response_text"])
-                                                elif resp_type in ("text_response", "refresh_response"):
-                                                    if parsed.get("content"):
-                                                        speak_texts.append(parsed["content"])
-                                                    elif parsed.get("message"):
-                                                        speak_texts.append(parsed["message"])
-                                            else:
-                                                # 非 JSON 文本，直接朗读
-                                                speak_texts.append(str(content))
-                            except Exception as parse_err:
-                                logger.error(f"解析洗衣机工具结果用于回复时出错: {parse_err}")
-
-                            # 若收集到文本，直接回复用户这些文本
-                            if speak_texts:
-                                yield "\n".join(speak_texts)
-                                return
-
-                            # 否则退回到语言模式下的简短确认
-                            if language_mode == "silent":
-                                yield ""  # 静默模式下不说话
-                            elif language_mode == "ja":
-                                yield "承知いたしました。"
-                            else:
-                                yield "好的。"
+                    # 执行工具调用
+                    final_results = []
+                    async for result in self._tool_executor.execute_tools([tool_call_obj], "OpenAI"):
+                        # 只处理最终的工具结果
+                        if isinstance(result, dict) and result.get("type") == "final_tool_results":
+                            final_results = result.get("results", [])
+                            break
+                    
+                    # 处理工具结果
+                    if final_results:
+                        logger.debug(f"洗衣机工具调用返回最终结果数量: {len(final_results)}")
+                        # 先处理潜在的视频播放，通过 WebSocket 通知前端
+                        await self._process_laundry_tool_results(final_results)
+
+                        # 汇总可直接对用户朗读的文本内容
+                        speak_texts: list[str] = []
+                        try:
+                            for result in final_results:
+                                if isinstance(result, dict) and result.get("role") == "tool":
+                                    content = result.get("content", "")
+                                    if isinstance(content, str) and content:
+                                        try:
+                                            parsed = json.loads(content)
+                                        except json.JSONDecodeError:
+                                            parsed = None
+
+                                        if isinstance(parsed, dict):
+                                            resp_type = parsed.get("type")
+                                            if resp_type == "video_response":
+                                                # 使用工具自带的 response_text 作为口头反馈
+                                                if parsed.get("response_text"):
+                                                    speak_texts.append(parsed["response_text"])
+                                            elif resp_type in ("text_response", "refresh_response"):
+                                                if parsed.get("content"):
+                                                    speak_texts.append(parsed["content"])
+                                                elif parsed.get("message"):
+                                                    speak_texts.append(parsed["message"])
+                                        else:
+                                            # 非 JSON 文本，直接朗读
+                                            speak_texts.append(str(content))
+                        except Exception as parse_err:
+                            logger.error(f"解析洗衣机工具结果用于回复时出错: {parse_err}")
+
+                        # 若收集到文本，直接回复用户这些文本
+                        if speak_texts:
+                            yield "\n".join(speak_texts)
                             return
-                        else:
-                            logger.warning("洗衣机工具调用没有返回最终结果")
-                    except Exception as e:
-                        logger.error(f"洗衣机工具调用失败: {e}")
-                        # 如果工具调用失败，回退到正常流程
 
-            messages = self._to_messages(input_data)
-            tools = None
-            tool_mode = None
-            llm_supports_native_tools = False
-
-            if self._use_mcpp and self._tool_manager:
-                tools = None
-                if isinstance(self._llm, OpenAICompatibleAsyncLLM):
-                    tool_mode = "OpenAI"
-                    tools = self._formatted_tools_openai
-                    llm_supports_native_tools = True
-                else:
-                    logger.warning(
-                        f"LLM type {type(self._llm)} not explicitly handled for tool mode determination."
-                    )
+                        # 否则退回到语言模式下的简短确认
+                        if language_mode == "silent":
+                            yield ""  # 静默模式下不说话
+                        elif language_mode == "ja":
+                            yield "承知いたしました。"
+                        else:
+                            yield "好的。"
+                        return
+                    else:
+                        logger.warning("洗衣机工具调用没有返回最终结果")
+                except Exception as e:
+                    logger.error(f"洗衣机工具调用失败: {e}")
+                    # 如果工具调用失败，回退到正常流程
 
-                if llm_supports_native_tools and not tools:
-                    logger.warning(
-                        f"No tools available/formatted for '{tool_mode}' mode, despite MCP being enabled."
-                    )
+        messages = self._to_messages(input_data)
+        tools = None
+        tool_mode = None
+        llm_supports_native_tools = False
 
-            if self._use_mcpp and tool_mode == "Claude":
-                logger.debug(
-                    f"Starting Claude tool interaction loop with {len(tools)} tools."
+        if self._use_mcpp and self._tool_manager:
+            tools = None
+            if isinstance(self._llm, OpenAICompatibleAsyncLLM):
+                tool_mode = "OpenAI"
+                tools = self._formatted_tools_openai
+                llm_supports_native_tools = True
+            else:
+                logger.warning(
+                    f"LLM type {type(self._llm)} not explicitly handled for tool mode determination."
                 )
-                async for output in self._claude_tool_interaction_loop(
-                    messages, tools if tools else []
-                ):
-                    yield output
-                return
-            elif self._use_mcpp and tool_mode == "OpenAI":
-                logger.debug(
-                    f"Starting OpenAI tool interaction loop with {len(tools)} tools."
+
+            if llm_supports_native_tools and not tools:
+                logger.warning(
+                    f"No tools available/formatted for '{tool_mode}' mode, despite MCP being enabled."
                 )
-                async for output in self._openai_tool_interaction_loop(
-                    messages, tools if tools else []
-                ):
-                    yield output
-                return
-            else:
-                logger.info("Starting simple chat completion.")
-                token_stream = self._llm.chat_completion(messages, self._system)
-                complete_response = ""
+
+        if self._use_mcpp and tool_mode == "Claude":
+            logger.debug(
+                f"Starting Claude tool interaction loop with {len(tools)} tools."
+            )
+            async for output in self._claude_tool_interaction_loop(
+                messages, tools if tools else []
+            ):
+                yield output
+            return
+        elif self._use_mcpp and tool_mode == "OpenAI":
+            logger.debug(
+                f"Starting OpenAI tool interaction loop with {len(tools)} tools."
+            )
+            # Tools must not run on a speculative guess at the user's input
+            speculative = bool((input_data.metadata or {}).get("speculative"))
+            async for output in self._openai_tool_interaction_loop(
+                messages,
+                tools if tools else [],
+                early_tool_dispatch=not speculative,
+            ):
+                yield output
+            return
+        else:
+            logger.info("Starting simple chat completion.")
+            complete_response = ""
+            async with aclosing(
+                self._llm.chat_completion(messages, self._system)
+            ) as token_stream:
                 async for event in token_stream:
                     text_chunk = ""
                     if isinstance(event, dict) and event.get("type") == "text_delta":
@@ -771,19 +852,19 @@ class BasicMemoryAgent(AgentInterface):
                     if text_chunk:
                         yield text_chunk
                         complete_response += text_chunk
-                if complete_response:
-                    self._add_message(complete_response, "assistant")
-
-        return chat_with_memory
+            if complete_response:
+                self._add_message(complete_response, "assistant")
 
     async def chat(
         self,
         input_data: BatchInput,
     ) -> AsyncIterator[Union[SentenceOutput, Dict[str, Any]]]:
         """Run chat pipeline."""
-        chat_func_decorated = self._chat_function_factory()
-        async for output in chat_func_decorated(input_data):
-            yield output
+        async with aclosing(
+            self._output_pipeline.process(self._chat_with_memory(input_data))
+        ) as outputs:
+            async for output in outputs:
+                yield output
 
     def reset_interrupt(self) -> None:
         """Reset interrupt flag."""
@@ -3,6 +3,7 @@ This class is responsible for handling asynchronous interaction with OpenAI API
 endpoints for language generation.
 """
 
+import json
 from typing import AsyncIterator, List, Dict, Any
 from openai import (
     AsyncStream,
@@ -19,6 +20,7 @@ from loguru import logger
 
 from .stateless_llm_interface import StatelessLLMInterface
 from ...mcpp.types import ToolCallObject
+from ...utils.latency_tracer import trace_mark
 
 
 class AsyncLLM(StatelessLLMInterface):
@@ -52,6 +54,14 @@ class AsyncLLM(StatelessLLMInterface):
             api_key=llm_api_key,
         )
         self.support_tools = True
+        # Streamed-chunk accounting, used to estimate how much generation an
+        # interrupt saved. One streamed chunk is counted as one token.
+        self.stream_stats: Dict[str, float] = {
+            "completed_streams": 0,
+            "aborted_streams": 0,
+            "avg_completion_tokens": 0.0,
+            "ungenerated_tokens_estimate": 0,
+        }
 
         logger.info(
             f"Initialized AsyncLLM with the parameters: {self.base_url}, {self.model}"
@@ -63,6 +73,8 @@ class AsyncLLM(StatelessLLMInterface):
         messages: List[Dict[str, Any]],
         system: str = None,
         tools: List[Dict[str, Any]] | NotGiven = NOT_GIVEN,
+        early_tool_calls: bool = False,
+        stream_state: Dict[str, bool] | None = None,
     ) -> AsyncIterator[str | List[ChoiceDeltaToolCall]]:
         """
         Generates a chat completion using the OpenAI API asynchronously.
@@ -71,9 +83,17 @@ class AsyncLLM(StatelessLLMInterface):
         - messages (List[Dict[str, Any]]): The list of messages to send to the API.
         - system (str, optional): System prompt to use for this completion.
         - tools (List[Dict[str, str]], optional): List of tools to use for this completion.
+        - early_tool_calls (bool, optional): Also yield each tool call on its own
+            as soon as its arguments are complete JSON, while the stream goes on.
+        - stream_state (Dict[str, bool], optional): Owned by the caller, one per
+            call. Setting ``stream_state["complete"] = True`` before closing the
+            stream early (e.g. a tool call was found in its text) keeps the close
+            from being counted as an abort.
 
         Yields:
         - str: The content of each chunk from the API response.
+        - ToolCallObject: A tool call whose arguments just became complete
+            (only with early_tool_calls).
         - List[ChoiceDeltaToolCall]: The tool calls detected in the response.
 
         Raises:
@@ -85,6 +105,11 @@ class AsyncLLM(StatelessLLMInterface):
         # Tool call related state variables
         accumulated_tool_calls = {}
         in_tool_call = False
+        # Tool call indexes already yielded early
+        early_yielded = set()
+        # Abort accounting: tokens received so far and whether the provider finished
+        tokens_received = 0
+        stream_finished = False
 
         try:
             # If system prompt is provided, add it to the messages
@@ -112,6 +137,7 @@ class AsyncLLM(StatelessLLMInterface):
             )
 
             async for chunk in stream:
+                tokens_received += 1
                 if self.support_tools:
                     has_tool_calls = (
                         hasattr(chunk.choices[0].delta, "tool_calls")
@@ -161,6 +187,14 @@ class AsyncLLM(StatelessLLMInterface):
                                         "arguments"
                                     ] += tool_call.function.arguments
 
+                            if early_tool_calls and index not in early_yielded:
+                                ready_call = self._complete_tool_call(
+                                    accumulated_tool_calls[index]
+                                )
+                                if ready_call:
+                                    early_yielded.add(index)
+                                    yield ready_call
+
                         continue
 
                     # If we were in a tool call but now we're not, yield the tool call result
@@ -175,6 +209,8 @@ class AsyncLLM(StatelessLLMInterface):
                             for tool_data in accumulated_tool_calls.values()
                         ]
 
+                        # Nothing but the finish chunk follows the tool calls
+                        stream_finished = True
                         yield complete_tool_calls
                         accumulated_tool_calls = {}  # Reset for potential future tool calls
 
@@ -182,7 +218,9 @@ class AsyncLLM(StatelessLLMInterface):
                 if len(chunk.choices) == 0:
                     logger.info("Empty chunk received")
                     continue
-                elif chunk.choices[0].delta.content is None:
+                if chunk.choices[0].finish_reason:
+                    stream_finished = True
+                if chunk.choices[0].delta.content is None:
                     chunk.choices[0].delta.content = ""
                 yield chunk.choices[0].delta.content
 
@@ -196,7 +234,9 @@ class AsyncLLM(StatelessLLMInterface):
                     for tool_data in accumulated_tool_calls.values()
                 ]
 
+                stream_finished = True
                 yield complete_tool_calls
+            stream_finished = True
         # 连接错误
         except APIConnectionError as e:
             logger.error(
@@ -230,5 +270,64 @@ class AsyncLLM(StatelessLLMInterface):
             # so when interrupted, no more tokens will being generated.
             if stream:
                 logger.debug("Chat completion finished.")
-                await stream.close()
-                logger.debug("Stream closed.")
+                try:
+                    # Closing the response aborts the HTTP stream and hands the
+                    # connection back to the pool instead of draining it.
+                    await stream.close()
+                    logger.debug("Stream closed.")
+                except Exception as e:
+                    logger.warning(f"Error closing LLM stream: {e}")
+                self._record_stream_end(
+                    tokens_received,
+                    stream_finished or bool(stream_state and stream_state.get("complete")),
+                )
+
+    @staticmethod
+    def _complete_tool_call(tool_data: Dict[str, Any]) -> ToolCallObject | None:
+        """Return the tool call if its arguments already parse as a JSON object."""
+        arguments = tool_data["function"]["arguments"]
+        # Only try to parse once the object can be closed
+        if not (tool_data["id"] and tool_data["function"]["name"]):
+            return None
+        if not arguments.rstrip().endswith("}"):
+            return None
+        try:
+            parsed = json.loads(arguments)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(parsed, dict):
+            return None
+        return ToolCallObject.from_dict(
+            {**tool_data, "function": dict(tool_data["function"])}
+        )
+
+    def _record_stream_end(self, tokens_received: int, finished: bool) -> None:
+        """Update stream stats; on abort, log an estimate of the tokens not generated."""
+        stats = self.stream_stats
+        if finished:
+            stats["completed_streams"] += 1
+            # Running mean of completed response lengths
+            n = stats["completed_streams"]
+            stats["avg_completion_tokens"] += (
+                tokens_received - stats["avg_completion_tokens"]
+            ) / n
+            return
+
+        stats["aborted_streams"] += 1
+        ungenerated = 0
+        if stats["completed_streams"]:
+            ungenerated = max(
+                0, round(stats["avg_completion_tokens"] - tokens_received)
+            )
+        stats["ungenerated_tokens_estimate"] += ungenerated
+        trace_mark(
+            "llm_stream_aborted",
+            track="llm",
+            tokens_received=tokens_received,
+            ungenerated_estimate=ungenerated,
+        )
+        logger.info(
+            f"LLM stream aborted after {tokens_received} chunks; "
+            f"~{ungenerated} tokens left ungenerated "
+            f"(total saved so far: ~{stats['ungenerated_tokens_estimate']})"
+        )
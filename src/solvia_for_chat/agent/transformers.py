@@ -1,11 +1,13 @@
 from typing import AsyncIterator, Tuple, Callable, List, Union, Dict, Any
 from functools import wraps
+from contextlib import aclosing
 from .output_types import Actions, SentenceOutput, DisplayText
 from ..utils.tts_preprocessor import tts_filter as filter_text
 from ..live2d_model import Live2dModel
 from ..config_manager import TTSPreprocessorConfig
 from ..utils.sentence_divider import SentenceDivider
 from ..utils.sentence_divider import SentenceWithTags, TagState
+from ..utils.latency_tracer import traced_llm_stream, trace_mark
 from loguru import logger
 
 # 将连续的token流分割成完整的句子，并返回句子及其标签
@@ -39,14 +41,18 @@ def sentence_divider(
                 segment_method=segment_method,
                 valid_tags=valid_tags or [],
             )
-            stream_from_func = func(*args, **kwargs)
+            stream_from_func = traced_llm_stream(func(*args, **kwargs))
 
             # Process the mixed stream using the updated SentenceDivider
             async for item in divider.process_stream(stream_from_func):
                 if isinstance(item, SentenceWithTags):
-                    logger.debug(f"sentence_divider yielding sentence: {item}")
+                    logger.debug("sentence_divider yielding sentence: {}", item)
+                    if not any(
+                        tag.state in [TagState.START, TagState.END] for tag in item.tags
+                    ):
+                        trace_mark("first_sentence", once=True)
                 elif isinstance(item, dict):
-                    logger.debug(f"sentence_divider yielding dict: {item}")
+                    logger.debug("sentence_divider yielding dict: {}", item)
                 yield item  # Yield either SentenceWithTags or dict
             # Flushing is handled within divider.process_stream
 
@@ -198,8 +204,8 @@ def tts_filter(
                             ignore_angle_brackets=config.ignore_angle_brackets,
                         )
 
-                    logger.debug(f"[{display.name}] display: {display.text}")
-                    logger.debug(f"[{display.name}] tts: {tts}")
+                    logger.debug("[{}] display: {}", display.name, display.text)
+                    logger.debug("[{}] tts: {}", display.name, tts)
 
                     yield SentenceOutput(
                         display_text=display,
@@ -215,3 +221,104 @@ def tts_filter(
         return wrapper
 
     return decorator
+
+
+class OutputPipeline:
+    """
+    Fused agent output pipeline.
+
+    Does the work of ``sentence_divider`` -> ``actions_extractor`` ->
+    ``display_processor`` -> ``tts_filter`` in a single stage: every sentence
+    produced by the divider is turned into a ``SentenceOutput`` in one pass,
+    without crossing four async generator hops. Build it once per agent and
+    call ``process`` for every turn.
+    """
+
+    def __init__(
+        self,
+        live2d_model: Live2dModel,
+        tts_preprocessor_config: TTSPreprocessorConfig = None,
+        faster_first_response: bool = True,
+        segment_method: str = "pysbd",
+        valid_tags: List[str] = None,
+    ):
+        self._live2d_model = live2d_model
+        self._faster_first_response = faster_first_response
+        self._segment_method = segment_method
+        self._valid_tags = list(valid_tags or [])
+
+        config = tts_preprocessor_config or TTSPreprocessorConfig()
+        self._filter_kwargs = dict(
+            remove_special_char=config.remove_special_char,
+            ignore_brackets=config.ignore_brackets,
+            ignore_parentheses=config.ignore_parentheses,
+            ignore_asterisks=config.ignore_asterisks,
+            ignore_angle_brackets=config.ignore_angle_brackets,
+        )
+
+    def _new_divider(self) -> SentenceDivider:
+        # The divider is stateful, so each run gets its own; agents can be
+        # shared by several sessions at once.
+        return SentenceDivider(
+            faster_first_response=self._faster_first_response,
+            segment_method=self._segment_method,
+            valid_tags=self._valid_tags,
+        )
+
+    def build_output(self, sentence: SentenceWithTags) -> SentenceOutput:
+        """Turn one divided sentence into display text, actions and TTS text"""
+        text = sentence.text
+        is_tag_marker = False
+        in_think = False
+        for tag in sentence.tags:
+            if tag.state in (TagState.START, TagState.END):
+                is_tag_marker = True
+            if tag.name == "think":
+                in_think = True
+                if tag.state == TagState.START:
+                    text = "("
+                elif tag.state == TagState.END:
+                    text = ")"
+
+        actions = Actions()
+        if not is_tag_marker:
+            # Only extract emotions for non-tag text
+            expressions = self._live2d_model.extract_emotion(sentence.text)
+            if expressions:
+                actions.expressions = expressions
+
+        tts = "" if in_think else filter_text(text=text, **self._filter_kwargs)
+        display = DisplayText(text=text)
+        logger.debug(
+            "pipeline output: display='{}' tts='{}' tags={}", text, tts, sentence.tags
+        )
+        return SentenceOutput(display_text=display, tts_text=tts, actions=actions)
+
+    async def process(
+        self, token_stream: AsyncIterator[Union[str, Dict[str, Any]]]
+    ) -> AsyncIterator[Union[SentenceOutput, Dict[str, Any]]]:
+        """
+        Run a token stream through the pipeline.
+
+        Args:
+            token_stream: Raw LLM tokens, interleaved with tool status dicts
+
+        Yields:
+            Union[SentenceOutput, Dict[str, Any]]: Sentence outputs, with dicts
+            passed through unchanged
+        """
+        divider = self._new_divider()
+        # aclosing propagates an early close (interrupt) down to the LLM stream
+        async with aclosing(
+            divider.process_stream(traced_llm_stream(token_stream))
+        ) as items:
+            async for item in items:
+                if isinstance(item, SentenceWithTags):
+                    if not any(
+                        tag.state in (TagState.START, TagState.END) for tag in item.tags
+                    ):
+                        trace_mark("first_sentence", once=True)
+                    yield self.build_output(item)
+                else:
+                    # Tool status and other control dicts
+                    yield item
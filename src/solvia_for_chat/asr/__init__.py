@@ -1,6 +1,14 @@
 # 当前是空的，建议添加：
 from .asr_interface import ASRInterface
 from .asr_factory import ASRFactory
-from .sherpa_onnx_asr import VoiceRecognition
 
-__all__ = ['ASRInterface', 'ASRFactory', 'VoiceRecognition']
\ No newline at end of file
+__all__ = ['ASRInterface', 'ASRFactory', 'VoiceRecognition']
+
+
+def __getattr__(name):
+    # sherpa_onnx 导入较慢，首次使用时才加载
+    if name == "VoiceRecognition":
+        from .sherpa_onnx_asr import VoiceRecognition
+
+        return VoiceRecognition
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
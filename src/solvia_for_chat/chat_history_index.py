@@ -0,0 +1,197 @@
+"""
+Per-character index of chat histories.
+
+``get_history_list`` only needs the uid, message count and latest message of
+each history. They are kept in ``chat_history/<conf_uid>/index.sqlite3`` and
+updated incrementally by the history functions in ``chat_history_manager``,
+so listing reads one table instead of parsing every history file.
+
+The index is reconciled with the directory on every listing (a ``listdir``,
+no parsing): files it does not know are indexed, rows without a file are
+dropped. To rebuild it from the files::
+
+    python -m src.solvia_for_chat.chat_history_index rebuild [conf_uid ...]
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+INDEX_FILENAME = "index.sqlite3"
+
+# (message_count, latest_message) of a history file
+Summary = Tuple[int, Optional[dict]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS histories (
+    uid TEXT PRIMARY KEY,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    latest_message TEXT,
+    timestamp TEXT,
+    created_at TEXT
+)
+"""
+
+
+class HistoryIndex:
+    """SQLite index of the histories in one ``chat_history/<conf_uid>`` directory"""
+
+    def __init__(self, conf_dir: str) -> None:
+        self.conf_dir = conf_dir
+        self.path = os.path.join(conf_dir, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def add(self, uid: str, created_at: str) -> None:
+        self._execute(
+            "INSERT OR IGNORE INTO histories (uid, created_at) VALUES (?, ?)",
+            (uid, created_at),
+        )
+
+    def record_message(self, uid: str, message: dict, count: int = 1) -> bool:
+        """
+        Count ``count`` stored messages, ``message`` being the latest one.
+
+        Returns:
+            bool: False if the history is not indexed yet
+        """
+        return self._execute(
+            """
+            UPDATE histories
+            SET message_count = message_count + ?, latest_message = ?, timestamp = ?
+            WHERE uid = ?
+            """,
+            (count, json.dumps(message, ensure_ascii=False), message.get("timestamp"), uid),
+        ) > 0
+
+    def update_latest(self, uid: str, message: dict) -> None:
+        self._execute(
+            "UPDATE histories SET latest_message = ? WHERE uid = ?",
+            (json.dumps(message, ensure_ascii=False), uid),
+        )
+
+    def set_summary(self, uid: str, summary: Summary, created_at: Optional[str]) -> None:
+        message_count, latest_message = summary
+        self._execute(
+            """
+            INSERT OR REPLACE INTO histories
+                (uid, message_count, latest_message, timestamp, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                uid,
+                message_count,
+                json.dumps(latest_message, ensure_ascii=False) if latest_message else None,
+                latest_message.get("timestamp") if latest_message else None,
+                created_at,
+            ),
+        )
+
+    def remove(self, uid: str) -> None:
+        self._execute("DELETE FROM histories WHERE uid = ?", (uid,))
+
+    def rename(self, old_uid: str, new_uid: str) -> None:
+        self._execute("DELETE FROM histories WHERE uid = ?", (new_uid,))
+        self._execute("UPDATE histories SET uid = ? WHERE uid = ?", (new_uid, old_uid))
+
+    def entries(self) -> List[dict]:
+        """All rows, newest latest message first"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT uid, message_count, latest_message, timestamp, created_at
+                FROM histories ORDER BY timestamp DESC
+                """
+            ).fetchall()
+        return [
+            {
+                "uid": uid,
+                "message_count": message_count,
+                "latest_message": json.loads(latest_message) if latest_message else None,
+                "timestamp": timestamp,
+                "created_at": created_at,
+            }
+            for uid, message_count, latest_message, timestamp, created_at in rows
+        ]
+
+    def reconcile(
+        self, uids_on_disk: Iterable[str], summarize: Callable[[str], Summary]
+    ) -> None:
+        """Index histories missing from the index and drop rows without a file"""
+        on_disk = set(uids_on_disk)
+        with self._lock:
+            indexed = {
+                uid for (uid,) in self._conn.execute("SELECT uid FROM histories")
+            }
+        for uid in indexed - on_disk:
+            self.remove(uid)
+        for uid in on_disk - indexed:
+            try:
+                self.set_summary(uid, summarize(uid), None)
+            except Exception as e:
+                logger.error(f"Failed to index history {uid}: {e}")
+
+    def rebuild(self, uids_on_disk: Iterable[str], summarize: Callable[[str], Summary]) -> int:
+        """Re-index every history from its file"""
+        self._execute("DELETE FROM histories", ())
+        count = 0
+        for uid in uids_on_disk:
+            try:
+                self.set_summary(uid, summarize(uid), None)
+                count += 1
+            except Exception as e:
+                logger.error(f"Failed to index history {uid}: {e}")
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        with self._lock:
+            rowcount = self._conn.execute(sql, params).rowcount
+            self._conn.commit()
+        return rowcount
+
+
+_indexes: Dict[str, HistoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(conf_dir: str) -> HistoryIndex:
+    """The index of a conf directory, opened once per process"""
+    with _indexes_lock:
+        index = _indexes.get(conf_dir)
+        if index is None:
+            index = _indexes[conf_dir] = HistoryIndex(conf_dir)
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .chat_history_manager import rebuild_history_index
+
+    parser = argparse.ArgumentParser(description="Chat history index maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument(
+        "conf_uids", nargs="*", help="Characters to rebuild (default: all)"
+    )
+    args = parser.parse_args()
+
+    conf_uids = args.conf_uids or sorted(
+        name
+        for name in os.listdir("chat_history")
+        if os.path.isdir(os.path.join("chat_history", name))
+    )
+    for conf_uid in conf_uids:
+        count = rebuild_history_index(conf_uid)
+        print(f"{conf_uid}: indexed {count} histories")
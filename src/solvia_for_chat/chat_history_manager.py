@@ -1,11 +1,51 @@
+"""
+Chat history storage.
+
+Each history is an append-only JSON Lines file,
+``chat_history/<conf_uid>/<history_uid>.jsonl``. The first line is the
+metadata header (``{"role": "metadata", ...}``) and every message is one line,
+so storing a message appends a single line instead of rewriting the file.
+Metadata updates and edits of the latest message are appended as records too
+(``"role": "metadata"`` / ``"role": "edit"``) and folded in when the file is
+read. A background compactor rewrites files that collected such records back
+into header + messages.
+
+Appends are flushed immediately and fsync'ed in batches: after
+``FSYNC_EVERY`` records, otherwise by the compactor within ``FSYNC_INTERVAL``
+seconds and at interpreter exit.
+
+``store_message`` only queues the message; ``chat_history_writer`` writes it
+from a background thread, and every other function here flushes that queue
+first, so they block and async code calls them through ``asyncio.to_thread``.
+
+``get_history_list`` reads a per-character index (see
+``chat_history_index``) that the functions below keep up to date.
+
+With ``system_config.chat_history.backend: sqlite`` the same functions use
+``chat_history_sqlite`` instead of the files.
+
+Histories in the previous format (one ``<history_uid>.json`` array rewritten
+on every message) are migrated to ``.jsonl`` the first time they are touched.
+"""
+
 import os
 import re
 import json
 import uuid
+import atexit
+import threading
+import time
 from datetime import datetime
-from typing import Literal, List, TypedDict, Optional
+from typing import Callable, Dict, Literal, List, Tuple, TypedDict, Optional
 from loguru import logger
 
+from .chat_history_index import HistoryIndex, Summary, get_index
+from .chat_history_writer import HistoryWriter
+from .chat_history_sqlite import SqliteHistoryStore
+
+HISTORY_EXTENSION = ".jsonl"
+LEGACY_HISTORY_EXTENSION = ".json"
+
 
 class HistoryMessage(TypedDict):
     role: Literal["human", "ai"]
@@ -49,17 +89,391 @@ def _ensure_conf_dir(conf_uid: str) -> str:
     return base_dir
 
 
-def _get_safe_history_path(conf_uid: str, history_uid: str) -> str:
+def _get_safe_history_path(
+    conf_uid: str, history_uid: str, extension: str = HISTORY_EXTENSION
+) -> str:
     """Get sanitized path for history file"""
     safe_conf_uid = _sanitize_path_component(conf_uid)
     safe_history_uid = _sanitize_path_component(history_uid)
     base_dir = os.path.join("chat_history", safe_conf_uid)
-    full_path = os.path.normpath(os.path.join(base_dir, f"{safe_history_uid}.json"))
+    full_path = os.path.normpath(os.path.join(base_dir, f"{safe_history_uid}{extension}"))
     if not full_path.startswith(base_dir):
         raise ValueError("Invalid path: Path traversal detected")
     return full_path
 
 
+def _replay(records: List[dict]) -> Tuple[dict, List[dict]]:
+    """Fold metadata and edit records into (metadata, messages)"""
+    metadata: dict = {}
+    messages: List[dict] = []
+    for record in records:
+        role = record.get("role")
+        if role == "metadata":
+            metadata.update(record)
+        elif role == "edit":
+            if messages and messages[-1]["role"] == record.get("target_role"):
+                messages[-1]["content"] = record.get("content", "")
+        else:
+            messages.append(record)
+    return metadata, messages
+
+
+class JsonlHistoryStore:
+    """Append-only history files with batched fsync and background compaction"""
+
+    FSYNC_EVERY = 16
+    FSYNC_INTERVAL = 1.0
+    COMPACT_INTERVAL = 30.0
+    # Metadata/edit records a file may collect before it is compacted
+    COMPACT_MIN_RECORDS = 32
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        # path -> records appended since the last fsync
+        self._unsynced: Dict[str, int] = {}
+        # path -> metadata/edit records appended since the last compaction
+        self._overhead: Dict[str, int] = {}
+        self._last_compaction = time.monotonic()
+        self._maintenance: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats: Dict[str, int] = {
+            "appends": 0,
+            "fsyncs": 0,
+            "compactions": 0,
+            "migrations": 0,
+        }
+
+    def resolve(self, conf_uid: str, history_uid: str) -> str:
+        """Path of a history, migrating a legacy ``.json`` file if needed"""
+        path = _get_safe_history_path(conf_uid, history_uid)
+        if not os.path.exists(path):
+            legacy_path = _get_safe_history_path(
+                conf_uid, history_uid, LEGACY_HISTORY_EXTENSION
+            )
+            if os.path.exists(legacy_path):
+                self.migrate(legacy_path, path)
+        return path
+
+    def migrate(self, legacy_path: str, path: str) -> None:
+        """Convert a legacy JSON array history into a JSONL file"""
+        with self._lock:
+            if os.path.exists(path) or not os.path.exists(legacy_path):
+                return
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                metadata, messages = _replay(records)
+                self._write_compacted(path, metadata, messages)
+                os.remove(legacy_path)
+                self.stats["migrations"] += 1
+                logger.info(f"Migrated history file {legacy_path} to {path}")
+            except Exception as e:
+                logger.error(f"Failed to migrate history file {legacy_path}: {e}")
+
+    def create(self, path: str, metadata: dict) -> None:
+        with self._lock:
+            self._write_compacted(path, metadata, [])
+
+    def read(self, path: str) -> List[dict]:
+        """All records of a file; a torn last line is skipped"""
+        records = []
+        with self._lock, open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping unreadable line {line_no} of {path}")
+        return records
+
+    def load(self, path: str) -> Tuple[dict, List[dict]]:
+        return _replay(self.read(path))
+
+    def read_header(self, path: str) -> dict:
+        with self._lock, open(path, "r", encoding="utf-8") as f:
+            first_line = f.readline().strip()
+        try:
+            header = json.loads(first_line) if first_line else {}
+        except ValueError:
+            return {}
+        return header if header.get("role") == "metadata" else {}
+
+    def append(self, path: str, record: dict) -> None:
+        """Append one record; overhead records make the file a compaction candidate"""
+        self.append_many(path, [record])
+
+    def append_many(
+        self, path: str, records: List[dict], fsync: Optional[bool] = None
+    ) -> None:
+        """
+        Append records with a single write.
+
+        ``fsync`` True syncs before returning, False leaves it to the
+        maintenance thread, None syncs every ``FSYNC_EVERY`` records.
+        """
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self._lock:
+            with open(path, "a+b") as f:
+                # Never glue a record onto a line torn by a crash
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        data = "\n" + data
+                f.write(data.encode("utf-8"))
+                f.flush()
+                unsynced = self._unsynced.get(path, 0) + len(records)
+                if fsync or (fsync is None and unsynced >= self.FSYNC_EVERY):
+                    os.fsync(f.fileno())
+                    self.stats["fsyncs"] += 1
+                    self._unsynced.pop(path, None)
+                else:
+                    self._unsynced[path] = unsynced
+            overhead = sum(
+                1 for record in records if record.get("role") in ("metadata", "edit")
+            )
+            if overhead:
+                self._overhead[path] = self._overhead.get(path, 0) + overhead
+            self.stats["appends"] += len(records)
+        self._ensure_maintenance()
+
+    def remove(self, path: str) -> bool:
+        with self._lock:
+            self._forget(path)
+            if os.path.exists(path):
+                os.remove(path)
+                return True
+        return False
+
+    def rename(self, old_path: str, new_path: str) -> bool:
+        with self._lock:
+            if not os.path.exists(old_path):
+                return False
+            self._sync_path(old_path)
+            self._forget(old_path)
+            os.rename(old_path, new_path)
+        return True
+
+    def sync(self) -> None:
+        """fsync every file with unsynced appends"""
+        with self._lock:
+            for path in list(self._unsynced):
+                self._sync_path(path)
+
+    def compact(self, path: str) -> None:
+        """Rewrite a file as header + messages"""
+        with self._lock:
+            if not os.path.exists(path):
+                self._forget(path)
+                return
+            metadata, messages = self.load(path)
+            self._write_compacted(path, metadata, messages)
+            self._forget(path)
+            self.stats["compactions"] += 1
+            logger.debug(f"Compacted history file {path}")
+
+    def compact_pending(self, min_records: int = 1) -> None:
+        with self._lock:
+            candidates = [
+                path for path, count in self._overhead.items() if count >= min_records
+            ]
+        for path in candidates:
+            try:
+                self.compact(path)
+            except Exception as e:
+                logger.error(f"Failed to compact history file {path}: {e}")
+        self._last_compaction = time.monotonic()
+
+    def close(self) -> None:
+        """Sync and compact outstanding files and stop the maintenance thread"""
+        self._stop.set()
+        try:
+            self.sync()
+            self.compact_pending()
+        except Exception as e:
+            logger.error(f"Failed to flush chat history: {e}")
+
+    def _write_compacted(self, path: str, metadata: dict, messages: List[dict]) -> None:
+        header = {
+            "role": "metadata",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        }
+        header.update(metadata)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in [header, *messages]:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.stats["fsyncs"] += 1
+
+    def _sync_path(self, path: str) -> None:
+        if self._unsynced.pop(path, None) is None:
+            return
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+            self.stats["fsyncs"] += 1
+        finally:
+            os.close(fd)
+
+    def _forget(self, path: str) -> None:
+        self._unsynced.pop(path, None)
+        self._overhead.pop(path, None)
+
+    def _ensure_maintenance(self) -> None:
+        if self._maintenance is not None and self._maintenance.is_alive():
+            return
+        self._stop.clear()
+        self._maintenance = threading.Thread(
+            target=self._maintenance_loop, name="chat-history-maintenance", daemon=True
+        )
+        self._maintenance.start()
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self.FSYNC_INTERVAL):
+            try:
+                self.sync()
+                if time.monotonic() - self._last_compaction >= self.COMPACT_INTERVAL:
+                    self.compact_pending(self.COMPACT_MIN_RECORDS)
+            except Exception as e:
+                logger.error(f"Chat history maintenance failed: {e}")
+
+
+history_store = JsonlHistoryStore()
+atexit.register(history_store.close)
+
+
+def _summarize(conf_uid: str, history_uid: str) -> Summary:
+    """Message count and latest message of a history file"""
+    _, messages = history_store.load(history_store.resolve(conf_uid, history_uid))
+    return len(messages), messages[-1] if messages else None
+
+
+def _history_uids_on_disk(conf_dir: str) -> List[str]:
+    uids = set()
+    for filename in os.listdir(conf_dir):
+        for extension in (HISTORY_EXTENSION, LEGACY_HISTORY_EXTENSION):
+            if filename.endswith(extension):
+                uids.add(filename[: -len(extension)])
+                break
+    return sorted(uids)
+
+
+def _update_index(conf_uid: str, update: Callable[[HistoryIndex], None]) -> None:
+    """Apply an update to the history index; failures are logged, the rebuild command repairs it"""
+    try:
+        update(get_index(_ensure_conf_dir(conf_uid)))
+    except Exception as e:
+        logger.error(f"Failed to update history index of {conf_uid}: {e}")
+
+
+def rebuild_history_index(conf_uid: str) -> int:
+    """Re-index every history of a character from its file"""
+    conf_dir = _ensure_conf_dir(conf_uid)
+    return get_index(conf_dir).rebuild(
+        _history_uids_on_disk(conf_dir), lambda uid: _summarize(conf_uid, uid)
+    )
+
+
+def _write_messages(key: Tuple[str, str], messages: List[dict], fsync: bool) -> None:
+    """Write a batch of queued messages of one history (history writer thread)"""
+    conf_uid, history_uid = key
+    sqlite_store = _sqlite_history(conf_uid, history_uid)
+    if sqlite_store is not None:
+        sqlite_store.append_messages(conf_uid, history_uid, messages, fsync)
+        return
+
+    _ensure_conf_dir(conf_uid)
+    filepath = history_store.resolve(conf_uid, history_uid)
+    if not os.path.exists(filepath):
+        history_store.create(filepath, {})
+    history_store.append_many(filepath, messages, fsync)
+    logger.debug(f"Stored {len(messages)} message(s) to {filepath}")
+
+    def _record(index: HistoryIndex) -> None:
+        if not index.record_message(history_uid, messages[-1], len(messages)):
+            index.set_summary(
+                history_uid,
+                _summarize(conf_uid, history_uid),
+                messages[0].get("timestamp"),
+            )
+
+    _update_index(conf_uid, _record)
+
+
+history_writer = HistoryWriter(_write_messages)
+atexit.register(history_writer.close)
+
+_sqlite_store: Optional[SqliteHistoryStore] = None
+_import_lock = threading.Lock()
+
+
+def configure_chat_history(config) -> None:
+    """Apply ``system_config.chat_history``: backend and writer settings"""
+    global _sqlite_store
+    history_writer.configure(**config.model_dump(exclude={"backend"}))
+    if config.backend == "sqlite" and _sqlite_store is None:
+        history_writer.flush()
+        _sqlite_store = SqliteHistoryStore()
+        logger.info(f"Chat history backend: SQLite ({_sqlite_store.path})")
+
+
+def _import_file_history(conf_uid: str, history_uid: str) -> None:
+    """Move a history stored as a file into the SQLite store"""
+    filepath = history_store.resolve(conf_uid, history_uid)
+    if not os.path.exists(filepath):
+        return
+    try:
+        metadata, messages = history_store.load(filepath)
+        _sqlite_store.import_history(conf_uid, history_uid, metadata, messages)
+        history_store.rename(filepath, filepath + ".imported")
+        logger.info(f"Imported history file {filepath} into {_sqlite_store.path}")
+    except Exception as e:
+        logger.error(f"Failed to import history file {filepath}: {e}")
+
+
+def _import_file_histories(conf_uid: str) -> None:
+    for history_uid in _history_uids_on_disk(_ensure_conf_dir(conf_uid)):
+        _sqlite_history(conf_uid, history_uid)
+
+
+def _sqlite_history(conf_uid: str, history_uid: str) -> Optional[SqliteHistoryStore]:
+    """The SQLite store if enabled, with the history imported from its file"""
+    if _sqlite_store is None:
+        return None
+    with _import_lock:
+        if not _sqlite_store.has(conf_uid, history_uid):
+            _import_file_history(conf_uid, history_uid)
+    return _sqlite_store
+
+
+def _prune_empty_histories(conf_uid: str, keep: str) -> None:
+    """Remove histories without messages, except ``keep``"""
+    if _sqlite_store is not None:
+        for uid in _sqlite_store.prune_empty(conf_uid, keep):
+            logger.info(f"Removed empty history: {uid}")
+        return
+    try:
+        index = get_index(_ensure_conf_dir(conf_uid))
+        for entry in index.entries():
+            if entry["message_count"] or entry["uid"] == keep:
+                continue
+            for extension in (HISTORY_EXTENSION, LEGACY_HISTORY_EXTENSION):
+                history_store.remove(
+                    _get_safe_history_path(conf_uid, entry["uid"], extension)
+                )
+            index.remove(entry["uid"])
+            logger.info(f"Removed empty history file: {entry['uid']}")
+    except Exception as e:
+        logger.error(f"Failed to remove empty histories of {conf_uid}: {e}")
+
+
 def create_new_history(conf_uid: str) -> str:
     """Create a new history file with a unique ID and return the history_uid"""
     if not conf_uid:
@@ -69,24 +483,33 @@ def create_new_history(conf_uid: str) -> str:
     # Use uuid.uuid4().hex to generate a UUID without hyphens
     # New format: UUID_YYYY-MM-DD_HH-MM-SS
     history_uid = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex}"
-    conf_dir = _ensure_conf_dir(conf_uid)  # conf_uid is sanitized here
+    _ensure_conf_dir(conf_uid)  # conf_uid is sanitized here
 
     # Create history file with empty metadata
     try:
-        filepath = os.path.join(conf_dir, f"{history_uid}.json")
-        initial_data = [
-            {
-                "role": "metadata",
-                "timestamp": datetime.now().isoformat(timespec="seconds"),
-            }
-        ]
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(initial_data, f, ensure_ascii=False, indent=2)
+        filepath = _get_safe_history_path(conf_uid, history_uid)
+        if _sqlite_store is not None:
+            _sqlite_store.create(
+                conf_uid,
+                history_uid,
+                {
+                    "role": "metadata",
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                },
+            )
+        else:
+            history_store.create(filepath, {})
     except Exception as e:
         logger.error(f"Failed to create new history file: {e}")
         return ""
 
     logger.debug(f"Created new history file with empty metadata: {filepath}")
+    if _sqlite_store is None:
+        created_at = datetime.now().isoformat(timespec="seconds")
+        _update_index(conf_uid, lambda index: index.add(history_uid, created_at))
+    # Histories that were opened but never used are not worth keeping
+    history_writer.flush()
+    _prune_empty_histories(conf_uid, keep=history_uid)
     return history_uid
 
 
@@ -115,17 +538,9 @@ def store_message(
             logger.warning("Missing history_uid")
         return
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
-    logger.debug(f"Storing {role} message to {filepath}")
-
-    history_data = []
-    if os.path.exists(filepath):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                history_data = json.load(f)
-        except Exception:
-            logger.error(f"Failed to load history file: {filepath}")
-            pass
+    # Validate the uids here, the write happens on the history writer thread
+    _get_safe_history_path(conf_uid, history_uid)
+    logger.debug(f"Queueing {role} message for history {history_uid}")
 
     now_str = datetime.now().isoformat(timespec="seconds")
     new_item = {
@@ -140,11 +555,7 @@ def store_message(
     if avatar is not None:
         new_item["avatar"] = avatar
 
-    history_data.append(new_item)
-
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(history_data, f, ensure_ascii=False, indent=2)
-    logger.debug(f"Successfully stored {role} message")
+    history_writer.submit((conf_uid, history_uid), new_item)
 
 
 def get_metadata(conf_uid: str, history_uid: str) -> dict:
@@ -152,16 +563,18 @@ def get_metadata(conf_uid: str, history_uid: str) -> dict:
     if not conf_uid or not history_uid:
         return {}
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
+    history_writer.flush()
+    sqlite_store = _sqlite_history(conf_uid, history_uid)
+    if sqlite_store is not None:
+        return sqlite_store.get_metadata(conf_uid, history_uid)
+
+    filepath = history_store.resolve(conf_uid, history_uid)
     if not os.path.exists(filepath):
         return {}
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            history_data = json.load(f)
-
-        if history_data and history_data[0]["role"] == "metadata":
-            return history_data[0]
+        metadata, _ = history_store.load(filepath)
+        return metadata
     except Exception as e:
         logger.error(f"Failed to get metadata: {e}")
     return {}
@@ -176,28 +589,23 @@ def update_metadate(conf_uid: str, history_uid: str, metadata: dict) -> bool:
     if not conf_uid or not history_uid:
         return False
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
+    history_writer.flush()
+    sqlite_store = _sqlite_history(conf_uid, history_uid)
+    if sqlite_store is not None:
+        return sqlite_store.update_metadata(conf_uid, history_uid, metadata)
+
+    filepath = history_store.resolve(conf_uid, history_uid)
     if not os.path.exists(filepath):
         return False
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            history_data = json.load(f)
-
-        if history_data and history_data[0]["role"] == "metadata":
-            # Update existing metadata while preserving other fields
-            history_data[0].update(metadata)
-        else:
+        record = {"role": "metadata"}
+        if not history_store.read_header(filepath):
             # Create new metadata with timestamp if none exists
-            new_metadata = {
-                "role": "metadata",
-                "timestamp": datetime.now().isoformat(timespec="seconds"),
-            }
-            new_metadata.update(metadata)  # Add new fields
-            history_data.insert(0, new_metadata)
-
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=2)
+            record["timestamp"] = datetime.now().isoformat(timespec="seconds")
+        record.update(metadata)
+        record["role"] = "metadata"
+        history_store.append(filepath, record)
 
         logger.debug(f"Updated metadata for history {history_uid}")
         return True
@@ -208,27 +616,92 @@ def update_metadate(conf_uid: str, history_uid: str, metadata: dict) -> bool:
 
 def get_history(conf_uid: str, history_uid: str) -> List[HistoryMessage]:
     """Read chat history for the given conf_uid and history_uid"""
+    return get_history_tail(conf_uid, history_uid, None)
+
+
+def get_history_tail(
+    conf_uid: str, history_uid: str, limit: Optional[int]
+) -> List[HistoryMessage]:
+    """Read the latest ``limit`` messages of a history (all if None)"""
+    messages, _ = get_history_page(conf_uid, history_uid, None, limit)
+    return messages
+
+
+def get_history_page(
+    conf_uid: str,
+    history_uid: str,
+    before: Optional[int] = None,
+    limit: Optional[int] = 50,
+) -> Tuple[List[HistoryMessage], Optional[int]]:
+    """Read a page of a history, newest page first
+
+    Args:
+        conf_uid: Configuration unique identifier
+        history_uid: History unique identifier
+        before: Cursor returned with the previous page, None for the newest page
+        limit: Maximum number of messages, None for all
+
+    Returns:
+        Tuple: (messages oldest first, cursor of the next older page or None)
+    """
     if not conf_uid or not history_uid:
         if not conf_uid:
             logger.warning("Missing conf_uid")
         if not history_uid:
             logger.warning("Missing history_uid")
-        return []
+        return [], None
+
+    history_writer.flush()
+    sqlite_store = _sqlite_history(conf_uid, history_uid)
+    if sqlite_store is not None:
+        return sqlite_store.get_page(conf_uid, history_uid, before, limit)
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
+    filepath = history_store.resolve(conf_uid, history_uid)
 
     if not os.path.exists(filepath):
         logger.warning(f"History file not found: {filepath}")
-        return []
+        return [], None
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            history_data = json.load(f)
-            # Filter out metadata
-            return [msg for msg in history_data if msg["role"] != "metadata"]
+        _, messages = history_store.load(filepath)
     except Exception:
+        return [], None
+
+    # The cursor of the file backend is a message position
+    end = len(messages) if before is None else max(0, min(before, len(messages)))
+    start = 0 if limit is None else max(0, end - limit)
+    return messages[start:end], start if start > 0 else None
+
+
+def search_history(conf_uid: str, query: str, limit: int = 20) -> List[dict]:
+    """Find messages of a character containing ``query``
+
+    Returns:
+        List[dict]: ``{"history_uid": ..., "message": ...}`` entries
+    """
+    if not conf_uid or not query.strip():
         return []
 
+    history_writer.flush()
+    if _sqlite_store is not None:
+        _import_file_histories(conf_uid)
+        try:
+            return _sqlite_store.search(conf_uid, query, limit)
+        except Exception as e:
+            logger.error(f"History search failed: {e}")
+            return []
+
+    # The file backend has no text index and scans the histories, newest first
+    results = []
+    needle = query.casefold()
+    for history in get_history_list(conf_uid):
+        for message in reversed(get_history(conf_uid, history["uid"])):
+            if needle in str(message.get("content", "")).casefold():
+                results.append({"history_uid": history["uid"], "message": message})
+                if len(results) >= limit:
+                    return results
+    return results
+
 
 def delete_history(conf_uid: str, history_uid: str) -> bool:
     """Delete a specific history file"""
@@ -236,12 +709,19 @@ def delete_history(conf_uid: str, history_uid: str) -> bool:
         logger.warning("Missing conf_uid or history_uid")
         return False
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
+    history_writer.flush()
     try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.debug(f"Successfully deleted history file: {filepath}")
-            return True
+        deleted = False
+        if _sqlite_store is not None:
+            deleted = _sqlite_store.delete(conf_uid, history_uid)
+        for extension in (HISTORY_EXTENSION, LEGACY_HISTORY_EXTENSION):
+            filepath = _get_safe_history_path(conf_uid, history_uid, extension)
+            if history_store.remove(filepath):
+                logger.debug(f"Successfully deleted history file: {filepath}")
+                deleted = True
+        if _sqlite_store is None:
+            _update_index(conf_uid, lambda index: index.remove(history_uid))
+        return deleted
     except Exception as e:
         logger.error(f"Failed to delete history file: {e}")
     return False
@@ -252,56 +732,27 @@ def get_history_list(conf_uid: str) -> List[dict]:
     if not conf_uid:
         return []
 
-    histories = []
-    conf_dir = _ensure_conf_dir(conf_uid)
-    empty_history_uids = []
-
+    history_writer.flush()
     try:
-        for filename in os.listdir(conf_dir):
-            if not filename.endswith(".json"):
-                continue
-
-            history_uid = filename[:-5]
-            filepath = os.path.join(conf_dir, filename)
-
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    messages = json.load(f)
-
-                    # Filter out metadata for checking if history is empty
-                    actual_messages = [
-                        msg for msg in messages if msg["role"] != "metadata"
-                    ]
-                    if not actual_messages:
-                        empty_history_uids.append(history_uid)
-                        continue
-
-                    latest_message = actual_messages[-1]
-                    history_info = {
-                        "uid": history_uid,
-                        "latest_message": latest_message,
-                        "timestamp": (
-                            latest_message["timestamp"] if latest_message else None
-                        ),
-                    }
-                    histories.append(history_info)
-            except Exception as e:
-                logger.error(f"Error reading history file {filename}: {e}")
-                continue
-
-        # Clean up empty histories if there are other non-empty ones
-        if len(empty_history_uids) > 0 and len(os.listdir(conf_dir)) > 1:
-            for uid in empty_history_uids:
-                try:
-                    os.remove(os.path.join(conf_dir, f"{uid}.json"))
-                    logger.info(f"Removed empty history file: {uid}")
-                except Exception as e:
-                    logger.error(f"Failed to remove empty history file {uid}: {e}")
-
-        histories.sort(
-            key=lambda x: x["timestamp"] if x["timestamp"] else "", reverse=True
+        if _sqlite_store is not None:
+            _import_file_histories(conf_uid)
+            return _sqlite_store.list_histories(conf_uid)
+
+        conf_dir = _ensure_conf_dir(conf_uid)
+        index = get_index(conf_dir)
+        index.reconcile(
+            _history_uids_on_disk(conf_dir), lambda uid: _summarize(conf_uid, uid)
         )
-        return histories
+        # Empty histories are not listed
+        return [
+            {
+                "uid": entry["uid"],
+                "latest_message": entry["latest_message"],
+                "timestamp": entry["timestamp"],
+            }
+            for entry in index.entries()
+            if entry["message_count"]
+        ]
 
     except Exception as e:
         logger.error(f"Error listing histories: {e}")
@@ -319,29 +770,41 @@ def modify_latest_message(
         logger.warning("Missing conf_uid or history_uid")
         return False
 
-    filepath = _get_safe_history_path(conf_uid, history_uid)
+    history_writer.flush()
+    sqlite_store = _sqlite_history(conf_uid, history_uid)
+    if sqlite_store is not None:
+        latest_message = sqlite_store.edit_latest(conf_uid, history_uid, role, new_content)
+        if latest_message is None or latest_message["role"] != role:
+            logger.warning(f"Latest message of {history_uid} is not a {role} message")
+            return False
+        return True
+
+    filepath = history_store.resolve(conf_uid, history_uid)
     if not os.path.exists(filepath):
         logger.warning(f"History file not found: {filepath}")
         return False
 
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            history_data = json.load(f)
+        _, messages = history_store.load(filepath)
 
-        if not history_data:
+        if not messages:
             logger.warning("History is empty")
             return False
 
-        latest_message = history_data[-1]
+        latest_message = messages[-1]
         if latest_message["role"] != role:
             logger.warning(
                 f"Latest message role ({latest_message['role']}) doesn't match requested role ({role})"
             )
             return False
 
+        history_store.append(
+            filepath, {"role": "edit", "target_role": role, "content": new_content}
+        )
         latest_message["content"] = new_content
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=2)
+        _update_index(
+            conf_uid, lambda index: index.update_latest(history_uid, latest_message)
+        )
 
         logger.debug(f"Successfully modified latest {role} message")
         return True
@@ -359,15 +822,24 @@ def rename_history_file(
         logger.warning("Missing required parameters for rename")
         return False
 
-    old_filepath = _get_safe_history_path(conf_uid, old_history_uid)
-    new_filepath = _get_safe_history_path(conf_uid, new_history_uid)
-
+    history_writer.flush()
     try:
-        if os.path.exists(old_filepath):
-            os.rename(old_filepath, new_filepath)
+        sqlite_store = _sqlite_history(conf_uid, old_history_uid)
+        if sqlite_store is not None:
+            renamed = sqlite_store.rename(conf_uid, old_history_uid, new_history_uid)
+            if renamed:
+                logger.info(f"Renamed history from {old_history_uid} to {new_history_uid}")
+            return renamed
+
+        old_filepath = history_store.resolve(conf_uid, old_history_uid)
+        new_filepath = _get_safe_history_path(conf_uid, new_history_uid)
+        if history_store.rename(old_filepath, new_filepath):
             logger.info(
                 f"Renamed history file from {old_history_uid} to {new_history_uid}"
             )
+            _update_index(
+                conf_uid, lambda index: index.rename(old_history_uid, new_history_uid)
+            )
             return True
     except Exception as e:
         logger.error(f"Failed to rename history file: {e}")
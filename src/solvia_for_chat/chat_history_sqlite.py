@@ -0,0 +1,342 @@
+"""
+SQLite backend for chat histories.
+
+Enabled with ``system_config.chat_history.backend: sqlite``. All histories
+live in ``chat_history/history.sqlite3`` (WAL mode): one row per history with
+its metadata and one row per message, indexed by conf_uid, history_uid and
+timestamp. Message ids are increasing, so they double as cursors for
+paginated fetches and the tail of a history is a single index range scan.
+Message content is indexed with FTS5 for ``search``, with the trigram
+tokenizer where available so Chinese text matches by substring. Queries the
+index cannot answer (no FTS5, or words shorter than three characters with the
+trigram tokenizer) fall back to ``LIKE``.
+
+Histories still stored as files are imported the first time they are
+accessed; the file is then renamed to ``<name>.imported`` and kept.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, List, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_DB_PATH = os.path.join("chat_history", "history.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS histories (
+    conf_uid TEXT NOT NULL,
+    history_uid TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT,
+    PRIMARY KEY (conf_uid, history_uid)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conf_uid TEXT NOT NULL,
+    history_uid TEXT NOT NULL,
+    role TEXT NOT NULL,
+    timestamp TEXT,
+    content TEXT NOT NULL,
+    name TEXT,
+    avatar TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_by_history ON messages (conf_uid, history_uid, id);
+CREATE INDEX IF NOT EXISTS messages_by_time ON messages (conf_uid, timestamp);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+    USING fts5(content, content='messages', content_rowid='id'{tokenize});
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+_MESSAGE_COLUMNS = "id, role, timestamp, content, name, avatar"
+
+
+def _message(row: Tuple[Any, ...]) -> dict:
+    """Message dict in the same shape as the file backend's"""
+    _, role, timestamp, content, name, avatar = row
+    message = {"role": role, "timestamp": timestamp, "content": content}
+    if name is not None:
+        message["name"] = name
+    if avatar is not None:
+        message["avatar"] = avatar
+    return message
+
+
+class SqliteHistoryStore:
+    """Chat histories of all characters in one SQLite database"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.fts = False
+        self.trigram = False
+        # The trigram tokenizer needs SQLite 3.34
+        for tokenize in (", tokenize='trigram'", ""):
+            try:
+                self._conn.executescript(_FTS_SCHEMA.format(tokenize=tokenize))
+                self.fts = True
+                self.trigram = bool(tokenize)
+                break
+            except sqlite3.OperationalError as e:
+                logger.debug(f"FTS5 table with tokenizer '{tokenize}' unavailable: {e}")
+        if not self.fts:
+            logger.warning("FTS5 unavailable, history search falls back to LIKE")
+        self._conn.commit()
+
+    def has(self, conf_uid: str, history_uid: str) -> bool:
+        return self._fetchone(
+            "SELECT 1 FROM histories WHERE conf_uid = ? AND history_uid = ?",
+            (conf_uid, history_uid),
+        ) is not None
+
+    def create(self, conf_uid: str, history_uid: str, metadata: dict) -> None:
+        self._execute(
+            """
+            INSERT OR IGNORE INTO histories (conf_uid, history_uid, metadata, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (conf_uid, history_uid, json.dumps(metadata, ensure_ascii=False), metadata.get("timestamp")),
+        )
+
+    def append_messages(
+        self, conf_uid: str, history_uid: str, messages: List[dict], sync: bool = True
+    ) -> None:
+        """Insert messages in one transaction, creating the history if needed"""
+        with self._lock:
+            self._conn.execute(
+                "PRAGMA synchronous=" + ("FULL" if sync else "NORMAL")
+            )
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO histories (conf_uid, history_uid, created_at)
+                    VALUES (?, ?, ?)
+                    """,
+                    (conf_uid, history_uid, messages[0].get("timestamp")),
+                )
+                self._conn.executemany(
+                    """
+                    INSERT INTO messages
+                        (conf_uid, history_uid, role, timestamp, content, name, avatar)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            conf_uid,
+                            history_uid,
+                            message["role"],
+                            message.get("timestamp"),
+                            message.get("content", ""),
+                            message.get("name"),
+                            message.get("avatar"),
+                        )
+                        for message in messages
+                    ],
+                )
+
+    def import_history(
+        self, conf_uid: str, history_uid: str, metadata: dict, messages: List[dict]
+    ) -> None:
+        with self._lock:
+            self.create(conf_uid, history_uid, metadata)
+            if messages:
+                self.append_messages(conf_uid, history_uid, messages)
+
+    def get_metadata(self, conf_uid: str, history_uid: str) -> dict:
+        row = self._fetchone(
+            "SELECT metadata FROM histories WHERE conf_uid = ? AND history_uid = ?",
+            (conf_uid, history_uid),
+        )
+        return json.loads(row[0]) if row else {}
+
+    def update_metadata(self, conf_uid: str, history_uid: str, metadata: dict) -> bool:
+        with self._lock:
+            current = self.get_metadata(conf_uid, history_uid)
+            current.update(metadata)
+            current["role"] = "metadata"
+            return self._execute(
+                "UPDATE histories SET metadata = ? WHERE conf_uid = ? AND history_uid = ?",
+                (json.dumps(current, ensure_ascii=False), conf_uid, history_uid),
+            ) > 0
+
+    def get_page(
+        self,
+        conf_uid: str,
+        history_uid: str,
+        before: Optional[int],
+        limit: Optional[int],
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Messages older than the cursor ``before`` (newest page if None).
+
+        Returns:
+            Tuple: (messages oldest first, cursor of the next older page or None)
+        """
+        sql = f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE conf_uid = ? AND history_uid = ?"
+        params: List[Any] = [conf_uid, history_uid]
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._fetchall(sql, tuple(params))
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        rows.reverse()
+        return [_message(row) for row in rows], next_cursor
+
+    def edit_latest(self, conf_uid: str, history_uid: str, role: str, content: str) -> Optional[dict]:
+        """
+        Replace the content of the latest message if it has ``role``.
+
+        Returns:
+            Optional[dict]: The latest message, edited only if the role matched
+        """
+        with self._lock:
+            row = self._fetchone(
+                f"""
+                SELECT {_MESSAGE_COLUMNS} FROM messages
+                WHERE conf_uid = ? AND history_uid = ? ORDER BY id DESC LIMIT 1
+                """,
+                (conf_uid, history_uid),
+            )
+            if row is None:
+                return None
+            message = _message(row)
+            if message["role"] == role:
+                self._execute("UPDATE messages SET content = ? WHERE id = ?", (content, row[0]))
+                message["content"] = content
+            return message
+
+    def delete(self, conf_uid: str, history_uid: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE conf_uid = ? AND history_uid = ?",
+                (conf_uid, history_uid),
+            )
+            return self._conn.execute(
+                "DELETE FROM histories WHERE conf_uid = ? AND history_uid = ?",
+                (conf_uid, history_uid),
+            ).rowcount > 0
+
+    def rename(self, conf_uid: str, old_history_uid: str, new_history_uid: str) -> bool:
+        with self._lock, self._conn:
+            renamed = self._conn.execute(
+                "UPDATE histories SET history_uid = ? WHERE conf_uid = ? AND history_uid = ?",
+                (new_history_uid, conf_uid, old_history_uid),
+            ).rowcount
+            self._conn.execute(
+                "UPDATE messages SET history_uid = ? WHERE conf_uid = ? AND history_uid = ?",
+                (new_history_uid, conf_uid, old_history_uid),
+            )
+            return renamed > 0
+
+    def list_histories(self, conf_uid: str) -> List[dict]:
+        """Histories with at least one message, latest message first"""
+        rows = self._fetchall(
+            f"""
+            SELECT h.history_uid, {', '.join('m.' + c.strip() for c in _MESSAGE_COLUMNS.split(','))}
+            FROM histories h
+            JOIN messages m ON m.id = (
+                SELECT MAX(id) FROM messages
+                WHERE conf_uid = h.conf_uid AND history_uid = h.history_uid
+            )
+            WHERE h.conf_uid = ?
+            ORDER BY m.timestamp DESC
+            """,
+            (conf_uid,),
+        )
+        return [
+            {
+                "uid": row[0],
+                "latest_message": _message(row[1:]),
+                "timestamp": row[3],
+            }
+            for row in rows
+        ]
+
+    def prune_empty(self, conf_uid: str, keep: str) -> List[str]:
+        """Delete histories without messages, except ``keep``"""
+        with self._lock, self._conn:
+            uids = [
+                uid
+                for (uid,) in self._conn.execute(
+                    """
+                    SELECT history_uid FROM histories h
+                    WHERE conf_uid = ? AND history_uid != ? AND NOT EXISTS (
+                        SELECT 1 FROM messages
+                        WHERE conf_uid = h.conf_uid AND history_uid = h.history_uid
+                    )
+                    """,
+                    (conf_uid, keep),
+                )
+            ]
+            self._conn.executemany(
+                "DELETE FROM histories WHERE conf_uid = ? AND history_uid = ?",
+                [(conf_uid, uid) for uid in uids],
+            )
+        return uids
+
+    def search(self, conf_uid: str, query: str, limit: int = 20) -> List[dict]:
+        """Messages of a character matching ``query``, best matches first"""
+        words = query.split()
+        if self.fts and not (self.trigram and min(len(word) for word in words) < 3):
+            sql = f"""
+                SELECT m.history_uid, {', '.join('m.' + c.strip() for c in _MESSAGE_COLUMNS.split(','))}
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ? AND m.conf_uid = ?
+                ORDER BY rank LIMIT ?
+            """
+            # Search the words as phrases instead of FTS5 query syntax
+            match = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+            params: Tuple[Any, ...] = (match, conf_uid, limit)
+        else:
+            sql = f"""
+                SELECT history_uid, {_MESSAGE_COLUMNS} FROM messages
+                WHERE conf_uid = ? AND content LIKE ? ORDER BY id DESC LIMIT ?
+            """
+            params = (conf_uid, f"%{query.strip()}%", limit)
+        return [
+            {"history_uid": row[0], "message": _message(row[1:])}
+            for row in self._fetchall(sql, params)
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params: Tuple[Any, ...]) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params: Tuple[Any, ...]) -> Optional[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
@@ -0,0 +1,203 @@
+"""
+Background writer for chat history messages.
+
+``store_message`` is called from conversation coroutines, up to once per group
+member per message. Instead of doing file and index I/O on the event loop, it
+queues the message here. A dedicated thread coalesces the queued messages per
+history and writes each history's batch with a single append, when the oldest
+message is ``flush_interval`` seconds old, when ``max_batch`` messages are
+queued, or when a flush is requested.
+
+Durability modes (``system_config.chat_history.durability``):
+
+- ``strict``: write and fsync as soon as a message is queued
+- ``batched``: coalesce for ``flush_interval``, fsync every batch (default)
+- ``relaxed``: coalesce for ``flush_interval``, leave fsync to the history
+  store's maintenance thread (within a second)
+
+Readers call ``flush()`` first, so they always see every stored message.
+The server flushes on client disconnect and on shutdown, and at exit.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from loguru import logger
+
+DURABILITY_MODES = ("strict", "batched", "relaxed")
+
+# (key, items, fsync)
+WriteBatch = Callable[[Hashable, List[Any], bool], None]
+
+
+class HistoryWriter:
+    """Queue of history writes, coalesced per key and written by one thread"""
+
+    def __init__(
+        self,
+        write_batch: WriteBatch,
+        durability: str = "batched",
+        flush_interval: float = 0.2,
+        max_batch: int = 64,
+    ) -> None:
+        self._write_batch = write_batch
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._depth = 0
+        self._in_flight = 0
+        self._oldest_at: Optional[float] = None
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_depth": 0,
+        }
+
+    def configure(
+        self,
+        durability: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ) -> None:
+        with self._cond:
+            if durability is not None:
+                if durability not in DURABILITY_MODES:
+                    raise ValueError(
+                        f"Unknown history durability '{durability}', "
+                        f"expected one of {DURABILITY_MODES}"
+                    )
+                self.durability = durability
+            if flush_interval is not None:
+                self.flush_interval = max(0.0, flush_interval)
+            if max_batch is not None:
+                self.max_batch = max(1, max_batch)
+            self._cond.notify_all()
+
+    @property
+    def depth(self) -> int:
+        """Items queued and not yet written"""
+        return self._depth + self._in_flight
+
+    def submit(self, key: Hashable, item: Any) -> None:
+        """Queue an item; returns without doing any I/O"""
+        with self._cond:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                if not self._pending:
+                    self._oldest_at = time.monotonic()
+                self._pending.setdefault(key, []).append(item)
+                self._depth += 1
+                self.stats["submitted"] += 1
+                self.stats["max_depth"] = max(self.stats["max_depth"], self.depth)
+                if self.durability == "strict" or self._depth >= self.max_batch:
+                    self._cond.notify_all()
+                self._ensure_thread()
+        if closed:
+            # Late writes after shutdown are written synchronously
+            self._write(key, [item])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything queued so far is written.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        if threading.current_thread() is self._thread:
+            return True
+        with self._cond:
+            if not self.depth:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self.depth, timeout)
+
+    async def aflush(self, timeout: Optional[float] = None) -> bool:
+        """``flush()`` without blocking the event loop"""
+        if not self.depth:
+            return True
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self) -> None:
+        """Write everything queued and stop the writer thread"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.close)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": self.depth,
+            "durability": self.durability,
+            "flush_interval": self.flush_interval,
+            "max_batch": self.max_batch,
+        }
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="chat-history-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _should_write(self) -> bool:
+        return (
+            self.durability == "strict"
+            or self._flush_requested
+            or self._closed
+            or self._depth >= self.max_batch
+            or time.monotonic() - self._oldest_at >= self.flush_interval
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._depth and self._should_write()):
+                    if self._closed and not self._depth:
+                        return
+                    if self._depth:
+                        self._cond.wait(
+                            self._oldest_at + self.flush_interval - time.monotonic()
+                        )
+                    else:
+                        self._cond.wait()
+                batch, self._pending = self._pending, OrderedDict()
+                self._in_flight, self._depth = self._depth, 0
+                self._flush_requested = False
+                self._oldest_at = None
+
+            for key, items in batch.items():
+                self._write(key, items)
+
+            with self._cond:
+                self.stats["written"] += self._in_flight
+                self.stats["batches"] += 1
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _write(self, key: Hashable, items: List[Any]) -> None:
+        try:
+            self._write_batch(key, items, self.durability != "relaxed")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to write {len(items)} history item(s) for {key}: {e}")
@@ -31,6 +31,8 @@ class BasicMemoryAgentConfig(I18nMixin):
     use_mcpp: Optional[bool] = Field(False, alias="use_mcpp")
     # 为agent 启用 MCP 的服务器列表
     mcp_enabled_servers: Optional[List[str]] = Field([], alias="mcp_enabled_servers")
+    # 单轮对话中并行执行的工具调用数上限
+    max_parallel_tools: Optional[int] = Field(4, alias="max_parallel_tools", ge=1)
 
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         # 大语言模型提供者  
@@ -39,6 +41,7 @@ class BasicMemoryAgentConfig(I18nMixin):
         "segment_method": Description(en="Method for segmenting sentences: 'regex' or 'pysbd' (default: 'pysbd')", zh="分割句子的方法：'regex' 或 'pysbd'（默认：'pysbd'）"),
         "use_mcpp": Description(en="Whether to use mcpp", zh="是否使用mcpp"),
         "mcp_enabled_servers": Description(en="List of MCP enabled servers", zh="为agent 启用 MCP 的服务器列表"),
+        "max_parallel_tools": Description(en="Maximum number of tool calls from one response that run at the same time (default: 4)", zh="同一次回复中同时执行的工具调用数上限（默认：4）"),
     }
 
 # 智能体设置
@@ -1,6 +1,6 @@
 # config_manager/system.py
 from pydantic import Field,model_validator
-from typing import Dict, ClassVar, Optional
+from typing import Dict, ClassVar, Literal, Optional
 from pathlib import Path
 from .i18n import I18nMixin, Description
 
@@ -39,6 +39,118 @@ class MediaServerConfig(I18nMixin):
         return f"http://{self.host}:{self.port}/{category}/{filename}"
 
 
+class SpeculativeLLMConfig(I18nMixin):
+    """Speculative LLM start on partial transcripts during the VAD hangover"""
+    enabled: bool = Field(False, alias="enabled")
+    similarity_threshold: float = Field(0.9, alias="similarity_threshold")
+    min_partial_chars: int = Field(4, alias="min_partial_chars")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "enabled": Description(
+            en="Start the LLM on the partial transcript while VAD waits for end of speech",
+            zh="在 VAD 等待语音结束时，基于部分转录提前启动 LLM",
+        ),
+        "similarity_threshold": Description(
+            en="Minimum similarity (0-1) between partial and final transcript to reuse the speculative reply",
+            zh="部分转录与最终转录的最小相似度 (0-1)，达到后复用预测回复",
+        ),
+        "min_partial_chars": Description(
+            en="Minimum partial transcript length (without punctuation) before speculating",
+            zh="开始预测前部分转录的最小长度（不含标点）",
+        ),
+    }
+
+
+class ChatHistoryConfig(I18nMixin):
+    """Chat history storage backend and background writer"""
+    backend: Literal["jsonl", "sqlite"] = Field("jsonl", alias="backend")
+    durability: Literal["strict", "batched", "relaxed"] = Field("batched", alias="durability")
+    flush_interval: float = Field(0.2, alias="flush_interval")
+    max_batch: int = Field(64, alias="max_batch")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "backend": Description(
+            en="jsonl: one file per history; sqlite: one database with full-text search",
+            zh="jsonl：每段记录一个文件；sqlite：单个数据库，支持全文搜索",
+        ),
+        "durability": Description(
+            en="strict: fsync every message at once; batched: fsync every batch; relaxed: fsync within a second",
+            zh="strict：每条消息立即 fsync；batched：每批 fsync；relaxed：一秒内 fsync",
+        ),
+        "flush_interval": Description(
+            en="Seconds messages are coalesced before they are written",
+            zh="消息写入前合并等待的秒数",
+        ),
+        "max_batch": Description(
+            en="Queued messages that trigger a write before the interval ends",
+            zh="达到该排队消息数时提前写入",
+        ),
+    }
+
+
+class ContextPoolConfig(I18nMixin):
+    """Pre-initialized session contexts for new connections"""
+    size: int = Field(2, alias="size")
+    refill_concurrency: int = Field(1, alias="refill_concurrency")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "size": Description(
+            en="Session contexts kept ready for new connections (0 disables the pool)",
+            zh="为新连接预先准备的会话上下文数量（0 表示禁用）",
+        ),
+        "refill_concurrency": Description(
+            en="Contexts built in parallel when refilling the pool",
+            zh="补充上下文池时并行构建的数量",
+        ),
+    }
+
+
+class SessionResumeConfig(I18nMixin):
+    """Resuming a session after a websocket reconnect"""
+    grace_period: float = Field(30.0, alias="grace_period")
+    max_buffered_messages: int = Field(200, alias="max_buffered_messages")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "grace_period": Description(
+            en="Seconds a disconnected session is kept for the client to resume it (0 disables resuming)",
+            zh="断开连接的会话保留等待客户端恢复的秒数（0 表示禁用）",
+        ),
+        "max_buffered_messages": Description(
+            en="Messages buffered for a disconnected session, the oldest are dropped beyond this",
+            zh="断开期间缓存的消息数量上限，超出时丢弃最早的消息",
+        ),
+    }
+
+
+class EngineRegistryConfig(I18nMixin):
+    """Sharing of ASR and TTS engines across sessions"""
+    idle_timeout: float = Field(600.0, alias="idle_timeout")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "idle_timeout": Description(
+            en="Seconds an engine no session uses is kept before it is unloaded (0 unloads immediately)",
+            zh="无会话使用的引擎在卸载前保留的秒数（0 表示立即卸载）",
+        ),
+    }
+
+
+class ConfigReloadConfig(I18nMixin):
+    """Applying conf.yaml changes without a restart"""
+    watch: bool = Field(True, alias="watch")
+    poll_interval: float = Field(2.0, alias="poll_interval")
+
+    DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
+        "watch": Description(
+            en="Reload conf.yaml when it changes on disk",
+            zh="conf.yaml 在磁盘上变化时自动重新加载",
+        ),
+        "poll_interval": Description(
+            en="Seconds between checks of conf.yaml's modification time",
+            zh="检查 conf.yaml 修改时间的间隔秒数",
+        ),
+    }
+
+
 class SystemConfig(I18nMixin):
     """System configuration settings."""
 
@@ -49,6 +161,12 @@ class SystemConfig(I18nMixin):
     tool_prompts: Dict[str, str] = Field(..., alias="tool_prompts") # 要插入到角色提示词中的工具提示词
     enable_proxy: bool = Field(False, alias="enable_proxy") # 启用代理模式以支持多个客户端使用一个 ws 连接
     media_server: MediaServerConfig = Field(default_factory=MediaServerConfig, alias="media_server") # 媒体服务器配置
+    speculative_llm: SpeculativeLLMConfig = Field(default_factory=SpeculativeLLMConfig, alias="speculative_llm") # 部分转录时提前启动 LLM
+    chat_history: ChatHistoryConfig = Field(default_factory=ChatHistoryConfig, alias="chat_history") # 聊天记录后台写入
+    context_pool: ContextPoolConfig = Field(default_factory=ContextPoolConfig, alias="context_pool") # 预初始化会话上下文池
+    session_resume: SessionResumeConfig = Field(default_factory=SessionResumeConfig, alias="session_resume") # 断线重连后恢复会话
+    engine_registry: EngineRegistryConfig = Field(default_factory=EngineRegistryConfig, alias="engine_registry") # 跨会话共享的语音引擎
+    config_reload: ConfigReloadConfig = Field(default_factory=ConfigReloadConfig, alias="config_reload") # 配置热重载
 
     DESCRIPTIONS: ClassVar[Dict[str, Description]] = {
         "conf_version": Description(en="Configuration version", zh="配置文件版本"),
@@ -69,6 +187,30 @@ class SystemConfig(I18nMixin):
             en="Media server configuration for ads and videos",
             zh="广告和视频的媒体服务器配置",
         ),
+        "speculative_llm": Description(
+            en="Opt-in speculative LLM start on partial transcripts",
+            zh="可选：基于部分转录提前启动 LLM",
+        ),
+        "chat_history": Description(
+            en="Storage backend, durability and batching of chat history",
+            zh="聊天记录的存储后端、持久性与批量设置",
+        ),
+        "context_pool": Description(
+            en="Pool of pre-initialized session contexts for fast connects",
+            zh="预初始化会话上下文池，加快新连接",
+        ),
+        "session_resume": Description(
+            en="Keep sessions alive across websocket reconnects",
+            zh="websocket 重连时保留并恢复会话",
+        ),
+        "engine_registry": Description(
+            en="Reuse of ASR and TTS engines across sessions and characters",
+            zh="在会话和角色之间复用 ASR 和 TTS 引擎",
+        ),
+        "config_reload": Description(
+            en="Hot reload of conf.yaml with partial reinitialization",
+            zh="conf.yaml 热重载，仅重新初始化受影响的部分",
+        ),
     }
 
 @model_validator(mode="after")
@@ -0,0 +1,258 @@
+"""
+Hot reload of conf.yaml.
+
+``ConfigReloader`` polls the mtime of conf.yaml (``system_config.config_reload``)
+and is also triggered by ``POST /api/config/reload``. A reload re-runs
+``read_yaml`` and ``validate_config``, diffs the result against the live
+``Config`` and maps every changed path to the subsystem it affects, e.g.::
+
+    character_config.tts_config.fish_api_tts.reference_id  -> tts
+    character_config.agent_config.llm_configs...           -> agent
+    character_config.agent_config...mcp_enabled_servers    -> mcp
+
+Only those subsystems are reinitialized, in the default context and in every
+session; engines come from the shared engine registry, so a session picks up a
+new TTS voice without reloading anything else. Sessions take a changed value
+only where they still use the value from conf.yaml, so a session that switched
+to another character keeps that character's own settings. A session in the
+middle of a conversation is updated once the conversation has finished.
+
+Host, port and proxy mode cannot change without a restart; such changes are
+reported and otherwise ignored.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .config_manager import Config, read_yaml, validate_config
+from .utils.startup_profile import startup_profile
+
+if TYPE_CHECKING:
+    from .websocket_handler import WebSocketHandler
+
+RESTART = "restart"
+
+_BASIC_MEMORY_AGENT = "character_config.agent_config.agent_settings.basic_memory_agent"
+
+# Config path prefix -> affected subsystem, first match wins
+SUBSYSTEM_RULES: List[Tuple[str, str]] = [
+    ("system_config.host", RESTART),
+    ("system_config.port", RESTART),
+    ("system_config.enable_proxy", RESTART),
+    ("system_config.chat_history", "chat_history"),
+    ("system_config.context_pool", "context_pool"),
+    ("system_config.session_resume", "session_resume"),
+    ("system_config.engine_registry", "engine_registry"),
+    ("system_config.config_reload", "config_reload"),
+    ("system_config.tool_prompts", "agent"),
+    ("system_config", "system"),
+    ("character_config.live2d_model_name", "live2d"),
+    ("character_config.asr_config", "asr"),
+    ("character_config.tts_config", "tts"),
+    ("character_config.vad_config", "vad"),
+    (f"{_BASIC_MEMORY_AGENT}.use_mcpp", "mcp"),
+    (f"{_BASIC_MEMORY_AGENT}.mcp_enabled_servers", "mcp"),
+    (f"{_BASIC_MEMORY_AGENT}.max_parallel_tools", "mcp"),
+    ("character_config.agent_config", "agent"),
+    ("character_config.persona_prompt", "agent"),
+    ("character_config.tts_preprocessor_config", "agent"),
+    ("character_config.avatar", "agent"),
+    ("character_config", "character"),
+    ("live_config", "live"),
+]
+
+# Subsystems reinitialized per context by ServiceContext.apply_config
+CONTEXT_SUBSYSTEMS = {"live2d", "asr", "tts", "vad", "mcp", "agent"}
+
+_MISSING = object()
+
+
+@dataclass
+class ConfigDiff:
+    """Changed config paths and the subsystems they affect"""
+
+    paths: List[str] = field(default_factory=list)
+    subsystems: Set[str] = field(default_factory=set)
+    restart_required: List[str] = field(default_factory=list)
+
+    @classmethod
+    def between(cls, old: Dict[str, Any], new: Dict[str, Any]) -> "ConfigDiff":
+        return cls.of_paths(diff_paths(old, new))
+
+    @classmethod
+    def of_paths(cls, paths: List[str]) -> "ConfigDiff":
+        diff = cls(paths=paths)
+        for path in paths:
+            subsystem = classify(path)
+            if subsystem == RESTART:
+                diff.restart_required.append(path)
+            else:
+                diff.subsystems.add(subsystem)
+        return diff
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "changed": self.paths,
+            "subsystems": sorted(self.subsystems),
+            "restart_required": self.restart_required,
+        }
+
+
+def classify(path: str) -> str:
+    for prefix, subsystem in SUBSYSTEM_RULES:
+        if path == prefix or path.startswith(prefix + "."):
+            return subsystem
+    return "system"
+
+
+def diff_paths(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Dotted paths of the values that differ; lists are compared as a whole"""
+    paths = []
+    for key in sorted(set(old) | set(new), key=str):
+        path = f"{prefix}.{key}" if prefix else str(key)
+        old_value, new_value = old.get(key, _MISSING), new.get(key, _MISSING)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            paths.extend(diff_paths(old_value, new_value, path))
+        elif old_value != new_value:
+            paths.append(path)
+    return paths
+
+
+def get_path(data: Dict[str, Any], path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return _MISSING
+        data = data[key]
+    return data
+
+
+def set_path(data: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, last = path.split(".")
+    for key in parents:
+        data = data.setdefault(key, {})
+    if value is _MISSING:
+        data.pop(last, None)
+    else:
+        data[last] = value
+
+
+def inherit_changes(
+    session: Dict[str, Any], old: Dict[str, Any], new: Dict[str, Any], paths: List[str]
+) -> List[str]:
+    """
+    Apply the changed paths to a session's config data where the session
+    still has the old conf.yaml value.
+
+    Returns:
+        List[str]: The paths applied
+    """
+    applied = []
+    for path in paths:
+        if classify(path) == RESTART:
+            continue
+        if get_path(session, path) == get_path(old, path):
+            set_path(session, path, get_path(new, path))
+            applied.append(path)
+    return applied
+
+
+class ConfigReloader:
+    """Watches conf.yaml and applies its changes to the running server"""
+
+    def __init__(self, ws_handler: "WebSocketHandler", config_path: str = "conf.yaml") -> None:
+        self._ws_handler = ws_handler
+        self.config_path = config_path
+        self.watch = True
+        self.poll_interval = 2.0
+        self._mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.stats: Dict[str, int] = {"reloads": 0, "unchanged": 0, "failures": 0}
+
+    async def start(self) -> None:
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._watcher and not self._watcher.done():
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+
+    async def reload(self) -> Dict[str, Any]:
+        """
+        Re-read conf.yaml and apply what changed.
+
+        Raises:
+            Exception: If the file cannot be read or fails validation; the
+                running config is kept
+        """
+        async with self._lock:
+            self._mtime = self._stat()
+            try:
+                new_config = validate_config(read_yaml(self.config_path))
+            except Exception:
+                self.stats["failures"] += 1
+                raise
+            old_config: Config = self._ws_handler.default_context_cache.config
+            diff = ConfigDiff.between(old_config.model_dump(), new_config.model_dump())
+            if not diff.paths:
+                self.stats["unchanged"] += 1
+                return diff.to_dict()
+
+            logger.info(
+                f"{self.config_path} changed ({', '.join(sorted(diff.subsystems)) or 'no live subsystems'}): "
+                f"{diff.paths}"
+            )
+            if diff.restart_required:
+                logger.warning(
+                    f"Restart the server to apply: {', '.join(diff.restart_required)}"
+                )
+            if "config_reload" in diff.subsystems:
+                self._configure(new_config)
+
+            result = await self._ws_handler.apply_config_reload(old_config, new_config, diff)
+            self.stats["reloads"] += 1
+            self.last_result = {**diff.to_dict(), **result}
+            return self.last_result
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "config_path": self.config_path,
+            "watch": self.watch,
+            "poll_interval": self.poll_interval,
+            "last_reload": self.last_result,
+        }
+
+    def _configure(self, config: Config) -> None:
+        settings = getattr(config.system_config, "config_reload", None)
+        if settings is not None:
+            self.watch = settings.watch
+            self.poll_interval = max(0.1, settings.poll_interval)
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    async def _watch(self) -> None:
+        # The live config exists once the default context is loaded
+        await startup_profile.wait_ready()
+        self._configure(self._ws_handler.default_context_cache.config)
+        self._mtime = self._stat()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.watch:
+                continue
+            mtime = self._stat()
+            if mtime is None or mtime == self._mtime:
+                continue
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Failed to reload {self.config_path}, keeping the running config: {e}")
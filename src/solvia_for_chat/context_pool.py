@@ -0,0 +1,174 @@
+"""
+Pool of pre-initialized session service contexts.
+
+A new websocket session needs its own ``ServiceContext``: deep copies of the
+default configs and its own MCP components (client, tool manager, executor,
+warmed pooled sessions). Building one takes long enough to delay "Connection
+established", and kiosks reconnect after every network blip. The pool keeps
+``size`` contexts built ahead of time from the default context; a connection
+takes one and binds it to its client, and the pool refills in the background
+with at most ``refill_concurrency`` builds at a time. When the pool is empty
+the context is built inline and counted as a miss.
+
+Configured by ``system_config.context_pool``; ``size: 0`` disables it.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Set
+
+from loguru import logger
+
+from .service_context import ServiceContext
+
+
+class ServiceContextPool:
+    """Ready-to-use session contexts cloned from the default context"""
+
+    def __init__(self, default_context_cache: ServiceContext) -> None:
+        self._default = default_context_cache
+        self.size = 0
+        self.refill_concurrency = 1
+        self._ready: Deque[ServiceContext] = deque()
+        self._building = 0
+        self._refill_tasks: Set[asyncio.Task] = set()
+        # Contexts built for an older default context are discarded
+        self._generation = 0
+        self._closed = False
+        self._build_ms: Deque[float] = deque(maxlen=50)
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "built": 0,
+            "build_failures": 0,
+            "discarded": 0,
+        }
+
+    async def start(self) -> None:
+        """Read the pool settings and fill the pool in the background"""
+        config = getattr(self._default.system_config, "context_pool", None)
+        if config is not None:
+            self.size = max(0, config.size)
+            self.refill_concurrency = max(1, config.refill_concurrency)
+        self._closed = False
+        logger.info(
+            f"ServiceContext pool: size={self.size}, "
+            f"refill_concurrency={self.refill_concurrency}"
+        )
+        self._schedule_refill()
+
+    async def acquire(self, send_text: Callable, client_uid: str) -> ServiceContext:
+        """A context bound to the client, from the pool or built inline"""
+        if self._ready:
+            context = self._ready.popleft()
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            if self.size:
+                logger.info("ServiceContext pool empty, building a context inline.")
+            context = await self._build()
+        context.bind_client(send_text, client_uid)
+        self._schedule_refill()
+        return context
+
+    async def invalidate(self) -> None:
+        """Drop pooled contexts, e.g. after the default context changed"""
+        self._generation += 1
+        stale = list(self._ready)
+        self._ready.clear()
+        for context in stale:
+            self.stats["discarded"] += 1
+            await self._close_context(context)
+        self._schedule_refill()
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._refill_tasks):
+            task.cancel()
+        if self._refill_tasks:
+            await asyncio.gather(*self._refill_tasks, return_exceptions=True)
+        while self._ready:
+            await self._close_context(self._ready.popleft())
+
+    def report(self) -> Dict[str, Any]:
+        acquisitions = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": self.size,
+            "ready": len(self._ready),
+            "building": self._building,
+            "miss_rate": round(self.stats["misses"] / acquisitions, 3)
+            if acquisitions
+            else 0.0,
+            "avg_build_ms": round(sum(self._build_ms) / len(self._build_ms), 1)
+            if self._build_ms
+            else None,
+        }
+
+    def _schedule_refill(self) -> None:
+        if self._closed:
+            return
+        while (
+            len(self._ready) + self._building < self.size
+            and len(self._refill_tasks) < self.refill_concurrency
+        ):
+            self._building += 1
+            task = asyncio.create_task(self._refill_one(self._generation))
+            self._refill_tasks.add(task)
+            task.add_done_callback(self._refill_tasks.discard)
+
+    async def _refill_one(self, generation: int) -> None:
+        try:
+            context = await self._build()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Not rescheduled here; the next acquire retries
+            self.stats["build_failures"] += 1
+            logger.error(f"Failed to pre-build a ServiceContext: {e}")
+            return
+        finally:
+            self._building -= 1
+
+        if self._closed or generation != self._generation:
+            self.stats["discarded"] += 1
+            await self._close_context(context)
+            return
+        self._ready.append(context)
+        # This task is done building; let it count as a free refill slot
+        self._refill_tasks.discard(asyncio.current_task())
+        self._schedule_refill()
+
+    async def _build(self) -> ServiceContext:
+        """Clone the default context, without a client bound yet"""
+        started = time.perf_counter()
+        context = ServiceContext()
+        await context.load_cache(
+            config=self._default.config.model_copy(deep=True),
+            system_config=self._default.system_config.model_copy(deep=True),
+            character_config=self._default.character_config.model_copy(deep=True),
+            live2d_model=self._default.live2d_model,
+            asr_engine=self._default.asr_engine,
+            tts_engine=self._default.tts_engine,
+            vad_engine=None,
+            agent_engine=self._default.agent_engine,
+            mcp_server_registery=self._default.mcp_server_registery,
+            tool_adapter=self._default.tool_adapter,
+        )
+        # Each session detects speech on its own audio stream
+        await asyncio.to_thread(context.init_vad, context.character_config.vad_config)
+        self.stats["built"] += 1
+        self._build_ms.append((time.perf_counter() - started) * 1000)
+        return context
+
+    @staticmethod
+    async def _close_context(context: ServiceContext) -> None:
+        try:
+            # Pooled contexts share the agent engine, only their own MCP client is closed
+            if context.mcp_client:
+                await context.mcp_client.aclose()
+                context.mcp_client = None
+            context.release_engines()
+        except Exception as e:
+            logger.warning(f"Failed to close a pooled ServiceContext: {e}")
@@ -15,6 +15,9 @@ from .conversation_utils import EMOJI_LIST
 from .types import GroupConversationState
 from prompts import prompt_loader
 
+# Seconds to wait for an interrupted conversation task to finish its cleanup
+INTERRUPT_UNWIND_TIMEOUT = 2.0
+
 
 async def handle_conversation_trigger(
     msg_type: str,
@@ -129,6 +132,11 @@ async def handle_individual_interrupt(
         task = current_conversation_tasks[client_uid]
         if task and not task.done():
             task.cancel()
+            # Let the task unwind so the LLM stream is closed (and its pooled
+            # connection freed) before the interrupt is written to memory.
+            done, _ = await asyncio.wait({task}, timeout=INTERRUPT_UNWIND_TIMEOUT)
+            if not done:
+                logger.warning("Conversation task is still unwinding after interrupt")
             logger.info("🛑 Conversation task was successfully interrupted")
 
         try:
@@ -17,6 +17,7 @@ from ..utils.stream_audio import prepare_audio_payload
 from ..service_context import ServiceContext
 from ..agent.agents.agent_interface import AgentInterface
 from .wake_word_manager import wake_word_manager
+from ..utils.latency_tracer import trace_span
 
 
 # Convert class methods to standalone functions
@@ -154,7 +155,8 @@ async def process_user_input(
     """Process user input, converting audio to text if needed"""
     if isinstance(user_input, np.ndarray):
         logger.info("Transcribing audio input...")
-        input_text = await asr_engine.async_transcribe_np(user_input)
+        with trace_span("asr", samples=len(user_input)):
+            input_text = await asr_engine.async_transcribe_np(user_input)
         await websocket_send(
             json.dumps({"type": "user-input-transcription", "text": input_text})
         )
@@ -173,9 +175,10 @@ async def finalize_conversation_turn(
         await asyncio.gather(*tts_manager.task_list)
         await websocket_send(json.dumps({"type": "backend-synth-complete"}))
 
-        response = await message_handler.wait_for_response(
-            client_uid, "frontend-playback-complete"
-        )
+        with trace_span("playback_wait"):
+            response = await message_handler.wait_for_response(
+                client_uid, "frontend-playback-complete"
+            )
 
         if not response:
             logger.warning(f"No playback completion response from {client_uid}")
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List, Optional, Union
 import asyncio
+from contextlib import aclosing
 import json
 from loguru import logger
 from fastapi import WebSocket
@@ -24,6 +25,7 @@ from .types import (
 from ..service_context import ServiceContext
 from ..chat_history_manager import store_message
 from .tts_manager import TTSTaskManager
+from ..utils.latency_tracer import start_turn_trace, finish_turn_trace, trace_span
 
 
 async def process_group_conversation(
@@ -52,6 +54,7 @@ async def process_group_conversation(
     """
     # Create TTSTaskManager for each member
     tts_managers = {uid: TTSTaskManager() for uid in group_members}
+    trace = start_turn_trace(initiator_client_uid, kind="group")
 
     try:
         logger.info(f"Group Conversation Chain {session_emoji} started!")
@@ -149,6 +152,7 @@ async def process_group_conversation(
         # Cleanup all TTS managers
         for tts_manager in tts_managers.values():
             cleanup_conversation(tts_manager, session_emoji)
+        finish_turn_trace(trace)
         # Clean up
         GroupConversationState.remove_state(state.group_id)
 
@@ -258,14 +262,19 @@ async def handle_group_member_turn(
         f"(client {current_member_uid}) receiving context:\n{new_context}"
     )
 
-    full_response = await process_member_response(
-        context=context,
-        batch_input=batch_input,
-        current_ws_send=current_ws_send,
-        tts_manager=tts_manager,
-        broadcast_func=broadcast_func,
-        group_members=group_members,
-    )
+    with trace_span(
+        "member_response",
+        track=f"member:{current_member_uid[:8]}",
+        character=context.character_config.character_name,
+    ):
+        full_response = await process_member_response(
+            context=context,
+            batch_input=batch_input,
+            current_ws_send=current_ws_send,
+            tts_manager=tts_manager,
+            broadcast_func=broadcast_func,
+            group_members=group_members,
+        )
 
     if tts_manager.task_list:
         await asyncio.gather(*tts_manager.task_list)
@@ -353,35 +362,36 @@ async def process_member_response(
         # agent.chat now yields Union[SentenceOutput, Dict[str, Any]]
         agent_output_stream = context.agent_engine.chat(batch_input)
 
-        async for output_item in agent_output_stream:
-            if (
-                isinstance(output_item, dict)
-                and output_item.get("type") == "tool_call_status"
-            ):
-                if broadcast_func and group_members:
-                    logger.debug(f"Broadcasting tool status update: {output_item}")
-                    output_item["name"] = context.character_config.character_name
-                    await broadcast_func(group_members, output_item)
+        async with aclosing(agent_output_stream):
+            async for output_item in agent_output_stream:
+                if (
+                    isinstance(output_item, dict)
+                    and output_item.get("type") == "tool_call_status"
+                ):
+                    if broadcast_func and group_members:
+                        logger.debug(f"Broadcasting tool status update: {output_item}")
+                        output_item["name"] = context.character_config.character_name
+                        await broadcast_func(group_members, output_item)
+                    else:
+                        logger.warning(
+                            "Cannot broadcast tool status: broadcast_func or group_members missing."
+                        )
+                elif isinstance(output_item, (SentenceOutput, AudioOutput)):
+                    # Handle SentenceOutput or AudioOutput: Send to current user, broadcast audio later if needed
+                    response_part = await process_agent_output(
+                        output=output_item,
+                        character_config=context.character_config,
+                        live2d_model=context.live2d_model,
+                        tts_engine=context.tts_engine,
+                        websocket_send=current_ws_send,  # Send TTS/display text directly to speaker's client
+                        tts_manager=tts_manager,
+                        translate_engine=context.translate_engine,
+                    )
+                    full_response += response_part  # Accumulate text response
                 else:
                     logger.warning(
-                        "Cannot broadcast tool status: broadcast_func or group_members missing."
+                        f"Received unexpected item type from agent chat stream: {type(output_item)}"
                     )
-            elif isinstance(output_item, (SentenceOutput, AudioOutput)):
-                # Handle SentenceOutput or AudioOutput: Send to current user, broadcast audio later if needed
-                response_part = await process_agent_output(
-                    output=output_item,
-                    character_config=context.character_config,
-                    live2d_model=context.live2d_model,
-                    tts_engine=context.tts_engine,
-                    websocket_send=current_ws_send,  # Send TTS/display text directly to speaker's client
-                    tts_manager=tts_manager,
-                    translate_engine=context.translate_engine,
-                )
-                full_response += response_part  # Accumulate text response
-            else:
-                logger.warning(
-                    f"Received unexpected item type from agent chat stream: {type(output_item)}"
-                )
 
     except Exception as e:
         logger.exception(f"Error processing group member response stream: {e}")
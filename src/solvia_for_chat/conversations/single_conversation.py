@@ -1,5 +1,6 @@
 from typing import Union, List, Dict, Any, Optional
 import asyncio
+from contextlib import aclosing
 import json
 from loguru import logger
 import numpy as np
@@ -21,6 +22,8 @@ from ..service_context import ServiceContext
 # Import necessary types from agent outputs
 from ..agent.output_types import SentenceOutput, AudioOutput
 from .wake_word_manager import wake_word_manager
+from .speculation import speculation_manager
+from ..utils.latency_tracer import start_turn_trace, finish_turn_trace, trace_span
 
 
 async def process_single_conversation(
@@ -49,6 +52,8 @@ async def process_single_conversation(
     # Create TTSTaskManager for this conversation
     tts_manager = TTSTaskManager()
     full_response = ""  # Initialize full_response here
+    # Latency trace for this turn; TTS tasks spawned below inherit it
+    trace = start_turn_trace(client_uid, kind="single")
 
     try:
         # Send initial signals
@@ -61,12 +66,14 @@ async def process_single_conversation(
         )
 
         # 🌟 唤醒词处理 - 多语言支持
-        should_process, processed_text = await wake_word_manager.process_transcription(
-            input_text, client_uid, websocket_send
-        )
+        with trace_span("wake_word"):
+            should_process, processed_text = await wake_word_manager.process_transcription(
+                input_text, client_uid, websocket_send
+            )
 
         if not should_process:
             logger.debug(f"WakeWord: Ignoring input from client {client_uid} (listening mode)")
+            await speculation_manager.discard(client_uid, reason="ignored")
             return ""  # 忽略此次输入，不处理对话
 
         # 使用处理后的文本继续对话
@@ -103,41 +110,53 @@ async def process_single_conversation(
             if hasattr(context.agent_engine, 'set_websocket_send_func'):
                 context.agent_engine.set_websocket_send_func(websocket_send)
             
+            # Reuse a reply started speculatively on the partial transcript if
+            # it matches; special turns (metadata flags) never reuse one.
+            agent_output_stream = None
+            if metadata:
+                await speculation_manager.discard(client_uid, reason="special_turn")
+            else:
+                agent_output_stream = await speculation_manager.claim(
+                    context, client_uid, input_text
+                )
+
             # agent.chat yields Union[SentenceOutput, Dict[str, Any]]
-            agent_output_stream = context.agent_engine.chat(batch_input)
-
-            async for output_item in agent_output_stream:
-                if (
-                    isinstance(output_item, dict)
-                    and output_item.get("type") == "tool_call_status"
-                ):
-                    # Handle tool status event: send WebSocket message
-                    output_item["name"] = context.character_config.character_name
-                    logger.debug(f"Sending tool status update: {output_item}")
-
-                    await websocket_send(json.dumps(output_item))
-
-                elif isinstance(output_item, (SentenceOutput, AudioOutput)):
-                    # Handle SentenceOutput or AudioOutput
-                    response_part = await process_agent_output(
-                        output=output_item,
-                        character_config=context.character_config,
-                        live2d_model=context.live2d_model,
-                        tts_engine=context.tts_engine,
-                        websocket_send=websocket_send,  # Pass websocket_send for audio/tts messages
-                        tts_manager=tts_manager,
-                        translate_engine=context.translate_engine,
-                    )
-                    # Ensure response_part is treated as a string before concatenation
-                    response_part_str = (
-                        str(response_part) if response_part is not None else ""
-                    )
-                    full_response += response_part_str  # Accumulate text response
-                else:
-                    logger.warning(
-                        f"Received unexpected item type from agent chat stream: {type(output_item)}"
-                    )
-                    logger.debug(f"Unexpected item content: {output_item}")
+            if agent_output_stream is None:
+                agent_output_stream = context.agent_engine.chat(batch_input)
+
+            async with aclosing(agent_output_stream):
+                async for output_item in agent_output_stream:
+                    if (
+                        isinstance(output_item, dict)
+                        and output_item.get("type") == "tool_call_status"
+                    ):
+                        # Handle tool status event: send WebSocket message
+                        output_item["name"] = context.character_config.character_name
+                        logger.debug(f"Sending tool status update: {output_item}")
+
+                        await websocket_send(json.dumps(output_item))
+
+                    elif isinstance(output_item, (SentenceOutput, AudioOutput)):
+                        # Handle SentenceOutput or AudioOutput
+                        response_part = await process_agent_output(
+                            output=output_item,
+                            character_config=context.character_config,
+                            live2d_model=context.live2d_model,
+                            tts_engine=context.tts_engine,
+                            websocket_send=websocket_send,  # Pass websocket_send for audio/tts messages
+                            tts_manager=tts_manager,
+                            translate_engine=context.translate_engine,
+                        )
+                        # Ensure response_part is treated as a string before concatenation
+                        response_part_str = (
+                            str(response_part) if response_part is not None else ""
+                        )
+                        full_response += response_part_str  # Accumulate text response
+                    else:
+                        logger.warning(
+                            f"Received unexpected item type from agent chat stream: {type(output_item)}"
+                        )
+                        logger.debug(f"Unexpected item content: {output_item}")
 
         except Exception as e:
             logger.exception(
@@ -189,3 +208,4 @@ async def process_single_conversation(
         raise
     finally:
         cleanup_conversation(tts_manager, session_emoji)
+        finish_turn_trace(trace)
@@ -0,0 +1,299 @@
+"""
+Speculative LLM start on partial transcripts.
+
+While the server-side VAD sits in its end-of-speech hangover, the speech
+buffered so far is transcribed and, if the partial transcript is long enough,
+the agent starts generating a reply that is buffered instead of sent. When the
+final transcript arrives, ``claim`` hands the buffered (and still running)
+reply to the conversation if the two transcripts match, and the partial
+transcript in the agent memory is replaced by the final one; otherwise the
+speculative stream is cancelled and the agent memory is rolled back.
+"""
+
+import asyncio
+import difflib
+import time
+import unicodedata
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import numpy as np
+from loguru import logger
+
+from ..service_context import ServiceContext
+from ..utils.latency_tracer import (
+    TurnTrace,
+    finish_turn_trace,
+    start_turn_trace,
+    trace_mark,
+)
+from .conversation_utils import create_batch_input
+from .wake_word_manager import wake_word_manager
+
+_END_OF_STREAM = object()
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase and keep only letters and digits, so punctuation and spacing differences are ignored"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] in "LN")
+
+
+def transcripts_match(partial: str, final: str, threshold: float) -> bool:
+    """Exact match after normalization, or a difflib similarity ratio >= threshold"""
+    a, b = normalize_transcript(partial), normalize_transcript(final)
+    if not a or not b:
+        return False
+    if a == b:
+        return True
+    return difflib.SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+@dataclass
+class SpeculativeTurn:
+    """A reply being generated ahead of the final transcript"""
+
+    client_uid: str
+    text: str
+    agent: Any
+    memory_snapshot: List[Dict[str, Any]]
+    started_at: float = field(default_factory=time.perf_counter)
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    task: Optional[asyncio.Task] = None
+    trace: Optional[TurnTrace] = None
+    released: bool = False
+    final_text: Optional[str] = None
+    aborted_reason: Optional[str] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def tokens(self) -> int:
+        """LLM chunks generated so far by the speculative stream"""
+        if not self.trace:
+            return 0
+        return sum(
+            span.args.get("tokens", 0) for span in self.trace.spans if span.name == "llm"
+        )
+
+
+class SpeculationManager:
+    """Tracks at most one speculative turn per client and reports hit rate"""
+
+    def __init__(self) -> None:
+        self._turns: Dict[str, SpeculativeTurn] = {}
+        # Bumped whenever a client's turn is claimed or discarded, so a partial
+        # transcription that finishes after that does not start a stale guess
+        self._epochs: Dict[str, int] = {}
+        # Partial transcriptions in flight, kept so they are not garbage collected
+        self._pending: Set[asyncio.Task] = set()
+        self.stats: Dict[str, float] = {
+            "started": 0,
+            "hits": 0,
+            "misses": 0,
+            "discarded": 0,
+            "wasted_tokens": 0,
+            "head_start_ms_total": 0.0,
+        }
+
+    @staticmethod
+    def is_enabled(context: ServiceContext) -> bool:
+        config = getattr(context.system_config, "speculative_llm", None)
+        return bool(config and config.enabled)
+
+    def start(self, context: ServiceContext, client_uid: str, audio: np.ndarray) -> None:
+        """Run ``speculate`` in the background"""
+        task = asyncio.create_task(
+            self.speculate(context, client_uid, audio), name=f"speculate:{client_uid}"
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def speculate(
+        self, context: ServiceContext, client_uid: str, audio: np.ndarray
+    ) -> None:
+        """
+        Transcribe the speech buffered during the VAD hangover and start a
+        speculative reply if the partial transcript is usable.
+
+        Args:
+            context: Service context of the client
+            client_uid: Client unique identifier
+            audio: Speech so far, in the same format as the final audio buffer
+        """
+        config = context.system_config.speculative_llm
+        agent = context.agent_engine
+        if not hasattr(agent, "snapshot_memory"):
+            return
+
+        epoch = self._epochs.get(client_uid, 0)
+        try:
+            text = (await context.asr_engine.async_transcribe_np(audio) or "").strip()
+        except Exception as e:
+            logger.warning(f"Speculation: partial transcription failed: {e}")
+            return
+        if self._epochs.get(client_uid, 0) != epoch:
+            return
+
+        if len(normalize_transcript(text)) < config.min_partial_chars:
+            return
+
+        existing = self._turns.get(client_uid)
+        if existing:
+            if normalize_transcript(existing.text) == normalize_transcript(text):
+                return  # Same partial as before, keep the running speculation
+            await self.discard(client_uid, reason="superseded")
+
+        # Wake-word handling may rewrite or swallow the input; only speculate
+        # when the final transcript will reach the agent unchanged.
+        if wake_word_manager.enabled and (
+            wake_word_manager.get_client_state(client_uid) != "active"
+            or wake_word_manager.check_end_words(text)
+        ):
+            return
+        if hasattr(agent, "can_speculate") and not agent.can_speculate(text):
+            return
+
+        turn = SpeculativeTurn(
+            client_uid=client_uid,
+            text=text,
+            agent=agent,
+            memory_snapshot=agent.snapshot_memory(),
+        )
+        batch_input = create_batch_input(
+            input_text=text,
+            images=None,
+            from_name=context.character_config.human_name,
+            metadata={"speculative": True},
+        )
+        turn.task = asyncio.create_task(self._run(turn, batch_input))
+        self._turns[client_uid] = turn
+        self.stats["started"] += 1
+        logger.info(f"Speculation: started for {client_uid} on partial '{text}'")
+
+    async def _run(self, turn: SpeculativeTurn, batch_input: Any) -> None:
+        # A trace of its own, so the tokens of a discarded stream can be counted
+        turn.trace = start_turn_trace(turn.client_uid, kind="speculative")
+        try:
+            async with aclosing(turn.agent.chat(batch_input)) as outputs:
+                async for item in outputs:
+                    if (
+                        not turn.released
+                        and isinstance(item, dict)
+                        and item.get("type") == "tool_call_status"
+                    ):
+                        # Tools may have side effects; never run them on a guess
+                        turn.aborted_reason = "tool_call"
+                        break
+                    turn.queue.put_nowait(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Speculation: speculative stream failed: {e}")
+            turn.error = e
+        finally:
+            turn.queue.put_nowait(_END_OF_STREAM)
+            # Finished here, in the context the trace was started in
+            finish_turn_trace(turn.trace, record=False)
+
+    async def claim(
+        self, context: ServiceContext, client_uid: str, final_text: str
+    ) -> Optional[AsyncIterator[Any]]:
+        """
+        Match the final transcript against the pending speculation.
+
+        Returns:
+            Optional[AsyncIterator[Any]]: The agent output stream to use in
+            place of ``agent.chat`` on a hit, None on a miss or when there is
+            nothing pending
+        """
+        self._epochs[client_uid] = self._epochs.get(client_uid, 0) + 1
+        turn = self._turns.pop(client_uid, None)
+        if turn is None:
+            return None
+
+        threshold = context.system_config.speculative_llm.similarity_threshold
+        if turn.aborted_reason is None and transcripts_match(
+            turn.text, final_text, threshold
+        ):
+            head_start_ms = (time.perf_counter() - turn.started_at) * 1000
+            turn.released = True
+            turn.final_text = final_text
+            self.stats["hits"] += 1
+            self.stats["head_start_ms_total"] += head_start_ms
+            trace_mark("speculation_hit", head_start_ms=round(head_start_ms, 1))
+            logger.info(
+                f"Speculation: hit for {client_uid} "
+                f"('{turn.text}' ~ '{final_text}', {head_start_ms:.0f} ms head start)"
+            )
+            return self._release(turn)
+
+        self.stats["misses"] += 1
+        await self._cancel(turn, reason=turn.aborted_reason or "mismatch")
+        trace_mark("speculation_miss")
+        logger.info(
+            f"Speculation: miss for {client_uid} ('{turn.text}' vs '{final_text}')"
+        )
+        return None
+
+    async def _release(self, turn: SpeculativeTurn) -> AsyncIterator[Any]:
+        try:
+            while True:
+                item = await turn.queue.get()
+                if item is _END_OF_STREAM:
+                    break
+                yield item
+            if turn.error:
+                raise turn.error
+        finally:
+            # Interrupted while replaying: stop the generation behind it too
+            if turn.task and not turn.task.done():
+                turn.task.cancel()
+                await asyncio.wait({turn.task})
+            # The stream stored the partial transcript as the user message;
+            # keep the one the conversation saw (and wrote to history) instead
+            if turn.final_text != turn.text and hasattr(turn.agent, "rewrite_user_input"):
+                turn.agent.rewrite_user_input(turn.text, turn.final_text)
+
+    async def _cancel(self, turn: SpeculativeTurn, reason: str) -> None:
+        if turn.task and not turn.task.done():
+            turn.task.cancel()
+            await asyncio.wait({turn.task}, timeout=2.0)
+        wasted = turn.tokens
+        self.stats["wasted_tokens"] += wasted
+        turn.agent.restore_memory(turn.memory_snapshot)
+        logger.debug(
+            f"Speculation: cancelled for {turn.client_uid} ({reason}), {wasted} tokens wasted"
+        )
+
+    async def discard(self, client_uid: str, reason: str = "discarded") -> None:
+        """Cancel the pending speculation of a client, if any"""
+        self._epochs[client_uid] = self._epochs.get(client_uid, 0) + 1
+        turn = self._turns.pop(client_uid, None)
+        if turn is None:
+            return
+        self.stats["discarded"] += 1
+        await self._cancel(turn, reason)
+
+    def cleanup_client(self, client_uid: str) -> None:
+        self._epochs.pop(client_uid, None)
+        for task in list(self._pending):
+            if task.get_name() == f"speculate:{client_uid}":
+                task.cancel()
+
+    def report(self) -> Dict[str, float]:
+        """Stats plus hit rate over claimed speculations"""
+        claimed = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / claimed, 3) if claimed else 0.0,
+            "avg_head_start_ms": round(
+                self.stats["head_start_ms_total"] / self.stats["hits"], 1
+            )
+            if self.stats["hits"]
+            else 0.0,
+            "pending": len(self._turns),
+        }
+
+
+speculation_manager = SpeculationManager()
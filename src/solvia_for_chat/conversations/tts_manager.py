@@ -10,6 +10,7 @@ from ..agent.output_types import DisplayText, Actions
 from ..live2d_model import Live2dModel
 from ..tts.tts_interface import TTSInterface
 from ..utils.stream_audio import prepare_audio_payload
+from ..utils.latency_tracer import trace_span, trace_mark
 from .types import WebSocketSend
 
 
@@ -105,7 +106,12 @@ class TTSTaskManager:
                 # Send payloads in order
                 while self._next_sequence_to_send in buffered_payloads:
                     next_payload = buffered_payloads.pop(self._next_sequence_to_send)
-                    await websocket_send(json.dumps(next_payload))
+                    with trace_span(
+                        "ws_send", track="sender", seq=self._next_sequence_to_send
+                    ):
+                        await websocket_send(json.dumps(next_payload))
+                    if next_payload.get("audio"):
+                        trace_mark("first_audio_sent", track="sender", once=True)
                     self._next_sequence_to_send += 1
 
                 self._payload_queue.task_done()
@@ -138,13 +144,16 @@ class TTSTaskManager:
     ) -> None:
         """Process TTS generation and queue the result for ordered delivery"""
         audio_file_path = None
+        track = f"tts#{sequence_number}"
         try:
-            audio_file_path = await self._generate_audio(tts_engine, tts_text)
-            payload = prepare_audio_payload(
-                audio_path=audio_file_path,
-                display_text=display_text,
-                actions=actions,
-            )
+            with trace_span("tts_synthesis", track=track, chars=len(tts_text)):
+                audio_file_path = await self._generate_audio(tts_engine, tts_text)
+            with trace_span("payload_build", track=track):
+                payload = prepare_audio_payload(
+                    audio_path=audio_file_path,
+                    display_text=display_text,
+                    actions=actions,
+                )
             # Queue the payload with its sequence number
             await self._payload_queue.put((payload, sequence_number))
 
@@ -0,0 +1,161 @@
+"""
+Process-wide registry of ASR and TTS engines.
+
+Engines are keyed by a canonical hash of their kind, model and settings, so
+every session and every character using the same engine config shares one
+instance, and switching A -> B -> A does not reload A's models. Each
+``ServiceContext`` holds one reference per engine it uses and releases it
+when it switches away or closes. An engine nobody references is kept for
+``idle_timeout`` seconds in case it is needed again, then dropped.
+
+VAD engines are not registered: they keep the state of the audio stream they
+are fed, so every ``ServiceContext`` builds its own.
+
+Configured by ``system_config.engine_registry``.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+
+@dataclass
+class _Entry:
+    engine: Any
+    label: str
+    refs: int = 0
+    idle_since: Optional[float] = None
+    build_ms: float = 0.0
+
+
+class EngineRegistry:
+    """Refcounted engines shared across sessions, keyed by config hash"""
+
+    def __init__(self, idle_timeout: float = 600.0) -> None:
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # One build per key at a time; different engines build in parallel
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "builds": 0, "evicted": 0}
+
+    def configure(self, idle_timeout: Optional[float] = None) -> None:
+        if idle_timeout is not None:
+            self.idle_timeout = max(0.0, idle_timeout)
+
+    @staticmethod
+    def key(kind: str, model: str, settings: Dict[str, Any]) -> str:
+        """Canonical key of an engine config"""
+        canonical = json.dumps(
+            {"kind": kind, "model": model, "settings": settings},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return f"{kind}:{model}:{hashlib.sha256(canonical.encode()).hexdigest()[:16]}"
+
+    def acquire(self, key: str, factory: Callable[[], Any]) -> Any:
+        """The engine of ``key``, built by ``factory`` if not registered, with a reference taken"""
+        with self._lock:
+            if self._take(key):
+                return self._entries[key].engine
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                # Built by another caller while this one waited
+                if self._take(key):
+                    return self._entries[key].engine
+            started = time.perf_counter()
+            engine = factory()
+            with self._lock:
+                entry = self._entries[key] = _Entry(
+                    engine=engine,
+                    label=key.rsplit(":", 1)[0],
+                    build_ms=(time.perf_counter() - started) * 1000,
+                    refs=1,
+                )
+                self.stats["builds"] += 1
+                self._build_locks.pop(key, None)
+            return entry.engine
+
+    def _take(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry.refs += 1
+        entry.idle_since = None
+        self.stats["hits"] += 1
+        logger.info(f"Reusing engine {entry.label}")
+        return True
+
+    def retain(self, engine: Any) -> Optional[str]:
+        """Take another reference on a registered engine, returning its key"""
+        if engine is None:
+            return None
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.engine is engine:
+                    entry.refs += 1
+                    entry.idle_since = None
+                    return key
+        return None
+
+    def release(self, key: Optional[str]) -> None:
+        """Drop a reference; unreferenced engines are evicted after ``idle_timeout``"""
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refs <= 0:
+                return
+            entry.refs -= 1
+            if entry.refs:
+                return
+            entry.idle_since = time.monotonic()
+            if self.idle_timeout <= 0:
+                self._evict(key)
+                return
+        timer = threading.Timer(self.idle_timeout, self._evict_if_idle, (key,))
+        timer.daemon = True
+        timer.start()
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            engines = {
+                key: {
+                    "type": type(entry.engine).__name__,
+                    "refs": entry.refs,
+                    "idle_s": round(now - entry.idle_since, 1)
+                    if entry.idle_since is not None
+                    else None,
+                    "build_ms": round(entry.build_ms, 1),
+                }
+                for key, entry in self._entries.items()
+            }
+        return {**self.stats, "idle_timeout": self.idle_timeout, "engines": engines}
+
+    def _evict_if_idle(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.refs == 0
+                and entry.idle_since is not None
+                and time.monotonic() - entry.idle_since >= self.idle_timeout - 0.01
+            ):
+                self._evict(key)
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.stats["evicted"] += 1
+        logger.info(f"Evicted idle engine {entry.label}")
+
+
+engine_registry = EngineRegistry()
@@ -1,4 +1,5 @@
 import json
+import re
 import chardet
 from loguru import logger
 
@@ -51,6 +52,26 @@ class Live2dModel:
         self.emo_str: str = " ".join([f"[{key}]," for key in self.emo_map.keys()])
         # emo_str is a string of the keys in the emoMap dictionary. The keys are enclosed in square brackets.
         # example: `"[fear], [anger], [disgust], [sadness], [joy], [neutral], [surprise]"`
+        self._compile_emotion_patterns()
+
+    # 编译表情匹配正则
+    def _compile_emotion_patterns(self) -> None:
+        """
+        Compile the emotion map into the patterns used by `extract_emotion` and `remove_emotion_keywords`.
+
+        When no key contains a square bracket, any `[...]` without nested brackets is matched and its lowercased content looked up in `emo_map`, so the cost does not depend on the size of the map. Otherwise the keys are matched as an alternation in `emo_map` order, which is the order the keys used to be tried in.
+        """
+        keys = list(self.emo_map.keys())
+        alternation = "|".join(re.escape(key) for key in keys) or "(?!)"
+        if any("[" in key or "]" in key for key in keys):
+            self._emo_pattern = re.compile(rf"\[({alternation})\]")
+            self._emo_removal_pattern = re.compile(
+                rf"\[({alternation})\]", re.IGNORECASE
+            )
+        else:
+            self._emo_pattern = re.compile(r"\[([^\[\]]*)\]")
+            # Matched on the original text, so the result keeps its case
+            self._emo_removal_pattern = self._emo_pattern
     
     # 加载文件内容
     def _load_file_content(self, file_path: str) -> str:
@@ -157,22 +178,12 @@ class Live2dModel:
             list: A list of values of the emotions found in the string. An empty list is returned if no emotions are found.
         """
 
-        expression_list = []
-        str_to_check = str_to_check.lower()
-
-        i = 0
-        while i < len(str_to_check):
-            if str_to_check[i] != "[":
-                i += 1
-                continue
-            for key in self.emo_map.keys():
-                emo_tag = f"[{key}]"
-                if str_to_check[i : i + len(emo_tag)] == emo_tag:
-                    expression_list.append(self.emo_map[key])
-                    i += len(emo_tag) - 1
-                    break
-            i += 1
-        return expression_list
+        emo_map = self.emo_map
+        return [
+            emo_map[match.group(1)]
+            for match in self._emo_pattern.finditer(str_to_check.lower())
+            if match.group(1) in emo_map
+        ]
     
     # 移除表情关键词
     def remove_emotion_keywords(self, target_str: str) -> str:
@@ -186,13 +197,21 @@ class Live2dModel:
             str: The cleaned string with the emotion keywords removed.
         """
 
-        lower_str = target_str.lower()
-
-        for key in self.emo_map.keys():
-            lower_key = f"[{key}]".lower()
-            while lower_key in lower_str:
-                start_index = lower_str.find(lower_key)
-                end_index = start_index + len(lower_key)
-                target_str = target_str[:start_index] + target_str[end_index:]
-                lower_str = lower_str[:start_index] + lower_str[end_index:]
+        emo_map = self.emo_map
+        # Removing a tag can join the text around it into a new tag, which is only possible after an unclosed "["
+        may_join = True
+        while may_join and "[" in target_str:
+            may_join = False
+
+            def strip_tag(match: re.Match) -> str:
+                nonlocal may_join
+                if match.group(1).lower() not in emo_map:
+                    return match.group(0)
+                text = match.string
+                may_join = may_join or text.rfind("[", 0, match.start()) > text.rfind(
+                    "]", 0, match.start()
+                )
+                return ""
+
+            target_str = self._emo_removal_pattern.sub(strip_tag, target_str)
         return target_str
@@ -25,6 +25,7 @@ from mcp.types import (
 )
 import mcp.types as types
 from pydantic import AnyUrl
+from loguru import logger
 
 
 class SimpleMediaConfig:
@@ -57,7 +58,7 @@ def get_media_config():
         config = Config()
         return config.system_config.media_server
     except Exception as e:
-        print(f"Warning: Failed to load full system config: {e}")
+        logger.warning(f"Warning: Failed to load full system config: {e}")
         
         # 尝试直接从YAML加载媒体服务器配置
         try:
@@ -78,13 +79,13 @@ def get_media_config():
                     config.ads_directory = media_server_config.get('ads_directory', 'ads')
                     config.videos_directory = media_server_config.get('videos_directory', 'videos')
                     
-                    print(f"Loaded media config from YAML: host={config.host}, port={config.port}")
+                    logger.info(f"Loaded media config from YAML: host={config.host}, port={config.port}")
                     return config
         except Exception as yaml_error:
-            print(f"Warning: Failed to load YAML config: {yaml_error}")
+            logger.warning(f"Warning: Failed to load YAML config: {yaml_error}")
         
         # 最后的fallback
-        print("Using default media configuration")
+        logger.info("Using default media configuration")
         return SimpleMediaConfig()
 
 
@@ -103,6 +104,8 @@ class AdvertisementServer:
             self.ads_dir = Path(ads_dir)
         
         self.advertisements = {}
+        # 上次扫描时广告目录的mtime，目录有文件增删时重新扫描
+        self._ads_mtime = None
         self.supported_formats = {'.mp4', '.avi', '.mov', '.webm', '.mkv'}
         self.current_index = 0
         
@@ -139,12 +142,15 @@ class AdvertisementServer:
 
     def _scan_advertisements(self):
         """扫描广告目录中的视频文件"""
-        self.advertisements.clear()
-        
+        # 在扫描前记录，扫描途中的改动会在下次调用时再扫描
+        self._ads_mtime = self._directory_mtime()
         if not self.ads_dir.exists():
-            print(f"Warning: Ads directory {self.ads_dir} does not exist")
+            logger.warning(f"Warning: Ads directory {self.ads_dir} does not exist")
+            self.advertisements = {}
             return
         
+        # 扫描完成后再替换列表，工具在扫描途中读到的仍是旧列表
+        advertisements = {}
         ad_count = 0
         for file_path in self.ads_dir.iterdir():
             if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
@@ -164,20 +170,32 @@ class AdvertisementServer:
                         "category": "advertisement"
                     }
                     
-                    self.advertisements[ad_id] = ad_info
+                    advertisements[ad_id] = ad_info
                     ad_count += 1
-                    print(f"Loaded advertisement: {ad_info['name']}")
+                    logger.info(f"Loaded advertisement: {ad_info['name']}")
                     
                 except Exception as e:
-                    print(f"Error loading advertisement {file_path}: {e}")
+                    logger.error(f"Error loading advertisement {file_path}: {e}")
         
+        self.advertisements = advertisements
         self.stats["total_ads"] = len(self.advertisements)
-        print(f"Advertisement server initialized: {len(self.advertisements)} ads found")
+        logger.info(f"Advertisement server initialized: {len(self.advertisements)} ads found")
         
         # 如果没有广告，创建说明文件
         if not self.advertisements:
             self._create_ads_documentation()
 
+    def _directory_mtime(self) -> Optional[int]:
+        try:
+            return self.ads_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def _rescan_if_changed(self):
+        """广告目录有文件增删（如通过 /api/ads 上传或删除）时重新扫描"""
+        if self._directory_mtime() != self._ads_mtime:
+            await asyncio.to_thread(self._scan_advertisements)
+
     def _create_ads_documentation(self):
         """创建广告系统说明文档"""
         readme_content = """# 🎬 广告轮播系统
@@ -251,7 +269,7 @@ ad_004_用户评价.mp4
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config_data, f, ensure_ascii=False, indent=2)
         
-        print(f"Created ads documentation: {readme_path}")
+        logger.info(f"Created ads documentation: {readme_path}")
 
     def _register_tools(self):
         """注册MCP工具"""
@@ -366,6 +384,8 @@ ad_004_用户评价.mp4
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent]:
             """处理工具调用"""
+            if name != "refresh_advertisements":
+                await self._rescan_if_changed()
             if name == "get_advertisement_playlist":
                 return await self._get_advertisement_playlist(arguments)
             elif name == "get_next_advertisement":
@@ -394,6 +414,7 @@ ad_004_用户评价.mp4
         @self.server.list_resources()
         async def handle_list_resources() -> list[types.Resource]:
             """返回可用的资源列表"""
+            await self._rescan_if_changed()
             resources = []
             
             for ad_id, ad_info in self.advertisements.items():
@@ -521,7 +542,8 @@ ad_004_用户评价.mp4
     async def _refresh_advertisements(self, arguments: dict) -> list[types.TextContent]:
         """刷新广告列表"""
         old_count = len(self.advertisements)
-        self._scan_advertisements()
+        # 目录扫描是阻塞IO，进程内运行时不能占用事件循环
+        await asyncio.to_thread(self._scan_advertisements)
         new_count = len(self.advertisements)
         
         return [types.TextContent(
@@ -581,7 +603,7 @@ ad_004_用户评价.mp4
             file_path = self.ads_dir / filename
             
             # 验证文件是否存在
-            if not file_path.exists() or not file_path.is_file():
+            if not await asyncio.to_thread(file_path.is_file):
                 return [types.TextContent(
                     type="text",
                     text=json.dumps({
@@ -604,13 +626,11 @@ ad_004_用户评价.mp4
                     }, ensure_ascii=False)
                 )]
             
-            # 删除文件
-            file_path.unlink()
+            # 删除文件并重新扫描广告目录
+            await asyncio.to_thread(file_path.unlink)
+            await asyncio.to_thread(self._scan_advertisements)
             
-            # 重新扫描广告目录
-            self._scan_advertisements()
-            
-            print(f"Successfully deleted advertisement: {filename}")
+            logger.info(f"Successfully deleted advertisement: {filename}")
             
             return [types.TextContent(
                 type="text",
@@ -625,7 +645,7 @@ ad_004_用户评价.mp4
             
         except Exception as e:
             error_msg = f"删除失败: {str(e)}"
-            print(f"Error deleting advertisement: {e}")
+            logger.error(f"Error deleting advertisement: {e}")
             
             return [types.TextContent(
                 type="text",
@@ -704,7 +724,7 @@ ad_004_用户评价.mp4
             
         except Exception as e:
             error_msg = f"获取管理信息失败: {str(e)}"
-            print(f"Error getting management info: {e}")
+            logger.error(f"Error getting management info: {e}")
             
             return [types.TextContent(
                 type="text",
@@ -715,30 +735,32 @@ ad_004_用户评价.mp4
                 }, ensure_ascii=False)
             )]
 
+    async def serve(self, read_stream, write_stream):
+        """在给定的流上运行MCP会话（stdio或进程内内存流）"""
+        await self.server.run(
+            read_stream,
+            write_stream,
+            InitializationOptions(
+                server_name="advertisement-server",
+                server_version="1.0.0",
+                capabilities=self.server.get_capabilities(
+                    notification_options=NotificationOptions(),
+                    experimental_capabilities={}
+                )
+            )
+        )
+
     async def run(self):
         """运行服务器"""
         from mcp.server.stdio import stdio_server
         
         try:
             async with stdio_server() as (read_stream, write_stream):
-                await self.server.run(
-                    read_stream,
-                    write_stream,
-                    InitializationOptions(
-                        server_name="advertisement-server",
-                        server_version="1.0.0",
-                        capabilities=self.server.get_capabilities(
-                            notification_options=NotificationOptions(),
-                            experimental_capabilities={}
-                        )
-                    )
-                )
+                await self.serve(read_stream, write_stream)
         except (asyncio.CancelledError, KeyboardInterrupt) as e:
-            print(f"🛑 Advertisement server stopped: {type(e).__name__}")
+            logger.info(f"🛑 Advertisement server stopped: {type(e).__name__}")
         except Exception as e:
-            print(f"❌ Advertisement server error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ Advertisement server error: {e}")
 
 
 async def main():
@@ -753,24 +775,24 @@ async def main():
     
     for attempt in range(max_retries):
         try:
-            print(f"🚀 启动广告MCP服务器 (尝试 {attempt + 1}/{max_retries})")
+            logger.info(f"🚀 启动广告MCP服务器 (尝试 {attempt + 1}/{max_retries})")
             server = AdvertisementServer(ads_dir=args.ads_dir)
             await server.run()
             break  # 正常退出，不重启
             
         except (asyncio.CancelledError, KeyboardInterrupt):
-            print("🛑 广告MCP服务器被手动停止")
+            logger.info("🛑 广告MCP服务器被手动停止")
             break
             
         except Exception as e:
-            print(f"❌ 广告MCP服务器错误 (尝试 {attempt + 1}/{max_retries}): {e}")
+            logger.error(f"❌ 广告MCP服务器错误 (尝试 {attempt + 1}/{max_retries}): {e}")
             
             if attempt < max_retries - 1:
-                print(f"⏳ {retry_delay}秒后重试...")
+                logger.info(f"⏳ {retry_delay}秒后重试...")
                 await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, 30)  # 指数退避，最大30秒
             else:
-                print("💀 广告MCP服务器重试次数用尽，退出")
+                logger.error("💀 广告MCP服务器重试次数用尽，退出")
                 raise
 
 
@@ -0,0 +1,66 @@
+"""
+In-process transport for MCP servers that live in this repository.
+
+A server marked ``"transport": "inprocess"`` in ``mcp_servers.json`` is not
+launched as a subprocess. Its class is imported from ``entrypoint``
+(``"package.module:ClassName"``), instantiated with ``entrypoint_kwargs`` in a
+worker thread and its ``serve(read_stream, write_stream)`` coroutine runs in
+the current event loop on a pair of memory streams. The client still talks MCP
+over those streams, so tools behave exactly as over stdio, minus the
+interpreter start-up and the pipe round-trips. Since the tool handlers share
+the loop with the conversation, they must hand blocking work to a thread.
+"""
+
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Tuple
+
+import anyio
+from loguru import logger
+from mcp.shared.memory import create_client_server_memory_streams
+
+from .types import MCPServer
+
+
+def load_entrypoint(entrypoint: str) -> Any:
+    """Import ``"package.module:attribute"`` and return the attribute."""
+    module_name, _, attribute = entrypoint.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(
+            f"Invalid in-process entrypoint '{entrypoint}', expected 'module:attribute'."
+        )
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+@asynccontextmanager
+async def inprocess_client(server: MCPServer) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Run an in-process MCP server for the duration of the context.
+
+    Yields:
+        Tuple: (read_stream, write_stream) for ``mcp.ClientSession``, like
+        ``stdio_client`` does
+    """
+    factory = load_entrypoint(server.entrypoint)
+    # Server constructors read config and scan directories; keep that off the loop
+    app = await asyncio.to_thread(factory, **(server.entrypoint_kwargs or {}))
+
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_serve, server.name, app, *server_streams)
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
+
+
+async def _serve(name: str, app: Any, read_stream: Any, write_stream: Any) -> None:
+    try:
+        await app.serve(read_stream, write_stream)
+    except Exception as e:
+        logger.exception(f"MCPC: In-process server '{name}' stopped with an error: {e}")
+    finally:
+        # Let the client side see end-of-stream instead of hanging
+        await write_stream.aclose()
@@ -1,16 +1,41 @@
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import re
+from typing import List, Dict, Any, Tuple
 from loguru import logger
 
+# Characters that matter inside an object, and inside a string in an object
+_OBJECT_TOKENS = re.compile(r'[{}"]')
+_STRING_TOKENS = re.compile(r'["\\]')
+_NON_SPACE = re.compile(r"\S")
+
+# (start, end, children) of a closed object, offsets into the open text
+_Span = Tuple[int, int, List["_Span"]]
+
+
 # 流式JSON检测器，用于检测流式文本中的JSON对象
 class StreamJSONDetector:
-    """Detector for real-time JSON detection in streaming text."""
+    """Detector for real-time JSON detection in streaming text.
+
+    Keeps a brace-depth tokenizer state across chunks (the start offset of
+    every open object, inside a string, after a backslash) and only the text
+    of the outermost object currently open, so each chunk is scanned once.
+    Quotes are only tracked inside an object; braces inside JSON strings do
+    not count. An opening brace not followed by a key or ``}`` (e.g. a
+    ``:-{`` in prose) is dropped right away. A top-level object is parsed as
+    soon as its closing brace arrives; if it is not valid JSON, the objects
+    closed inside it are tried instead.
+    """
 
     def __init__(self):
-        self.buffer = ""  # Store text that has not been fully processed
-        self.potential_jsons = []  # Store possible JSON starting positions
         self.completed_jsons = []  # Store completed JSON objects
-        self.processed_ranges = []  # Store processed intervals [start, end]
+        self._parts: List[str] = []  # Text of the outermost object currently open
+        self._size = 0  # Length of the text in _parts
+        # Start offset and closed children of each open object, outermost first
+        self._open: List[Tuple[int, List[_Span]]] = []
+        self._opened = False  # The innermost object has no content yet
+        self._in_string = False
+        self._escape = False
+
     # 处理单个文本块，返回一个包含完整JSON对象的列表
     def process_chunk(self, chunk: str) -> List[Dict[str, Any]]:
         """Process a single text chunk, return a list of complete JSON objects found in this chunk.
@@ -21,108 +46,113 @@ class StreamJSONDetector:
         Returns:
             List[Dict[str, Any]]: List of complete JSON objects parsed from the current chunk
         """
-        # Add new chunk to buffer
-        old_length = len(self.buffer)
-        self.buffer += chunk
-
-        # Update potential JSON starting positions
-        self._find_potential_starts(old_length)
-
-        # Try to parse potential JSON objects
-        new_jsons = self._try_parse_jsons()
-
+        new_jsons: List[Dict[str, Any]] = []
+        self._scan(chunk, new_jsons)
         return new_jsons
 
-    # 查找潜在的JSON起始位置
-    def _find_potential_starts(self, start_from: int) -> None:
-        """Find new potential JSON starting positions in the buffer.
+    # 扫描文本并更新解析状态
+    def _scan(self, text: str, found: List[Dict[str, Any]]) -> None:
+        """Advance the tokenizer over text, appending completed objects to found.
 
         Args:
-            start_from (int): Position to start searching from
+            text (str): Text following everything scanned so far
+            found (List[Dict[str, Any]]): Receives the objects completed in text
         """
-        for i in range(start_from, len(self.buffer)):
-            if self.buffer[i] == "{" and not self._is_in_processed_range(i):
-                self.potential_jsons.append(i)
-
-    # 检查指定位置是否在已处理范围内
-    def _is_in_processed_range(self, pos: int) -> bool:
-        """Check if a specified position is within a processed range.
-
-        Args:
-            pos (int): Position to check
-
-        Returns:
-            bool: True if position is within a processed range, otherwise False
-        """
-        for start, end in self.processed_ranges:
-            if start <= pos <= end:
-                return True
-        return False
-
-    # 尝试解析当前缓冲区中的JSON对象
-    def _try_parse_jsons(self) -> List[Dict[str, Any]]:
-        """Try to parse JSON objects from the current buffer.
+        pos = 0
+        # Start of the part of text that belongs to the open object
+        part_start = 0
+        length = len(text)
+
+        while pos < length:
+            if not self._open:
+                pos = text.find("{", pos)
+                if pos == -1:
+                    return
+                part_start = pos
+                self._open.append((0, []))
+                self._opened = True
+                pos += 1
+                continue
 
-        Returns:
-            List[Dict[str, Any]]: List of newly parsed JSON objects
-        """
-        new_jsons = []
-        remaining_potential = []
+            if self._opened:
+                match = _NON_SPACE.search(text, pos)
+                if not match:
+                    break
+                pos = match.start()
+                self._opened = False
+                if text[pos] not in '"}':
+                    # Not an object, resync from here
+                    self._open.pop()
+                    if not self._open:
+                        self._parts = []
+                        self._size = 0
+                continue
 
-        # Sort by starting position, process outermost JSON first
-        self.potential_jsons.sort()
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
 
-        for start_idx in self.potential_jsons:
-            # Skip if this position is already within a processed range
-            if self._is_in_processed_range(start_idx):
+            if self._in_string:
+                match = _STRING_TOKENS.search(text, pos)
+                if not match:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
                 continue
 
-            result, end_idx = self._extract_json(start_idx)
-            if result is not None:
-                new_jsons.append(result)
-                # Mark this range as processed
-                self.processed_ranges.append((start_idx, end_idx))
-                self.completed_jsons.append(result)
+            match = _OBJECT_TOKENS.search(text, pos)
+            if not match:
+                break
+            pos = match.end()
+            token = match.group()
+            if token == '"':
+                self._in_string = True
+            elif token == "{":
+                self._open.append((self._size + pos - 1 - part_start, []))
+                self._opened = True
             else:
-                # This JSON may not be complete yet, keep it
-                remaining_potential.append(start_idx)
-
-        self.potential_jsons = remaining_potential
-        return new_jsons
-
-    # 尝试从指定位置提取完整的JSON对象
-    def _extract_json(self, start_idx: int) -> Tuple[Optional[Dict[str, Any]], int]:
-        """Try to extract a complete JSON object from the given position.
-
-        Args:
-            start_idx (int): Potential starting position of JSON
-
-        Returns:
-            Tuple[Optional[Dict[str, Any]], int]: Parsed JSON object and ending position,
-                                               or (None, -1) if incomplete
+                start, children = self._open.pop()
+                if self._open:
+                    self._open[-1][1].append(
+                        (start, self._size + pos - part_start, children)
+                    )
+                    continue
+                self._parts.append(text[part_start:pos])
+                candidate = "".join(self._parts)
+                self._parts = []
+                self._size = 0
+                self._finish(candidate, children, found)
+
+        if self._open:
+            self._parts.append(text[part_start:])
+            self._size += length - part_start
+
+    # 解析已闭合的候选JSON
+    def _finish(
+        self, candidate: str, children: List[_Span], found: List[Dict[str, Any]]
+    ) -> None:
+        """Parse a balanced candidate object.
+
+        If it is not valid JSON (e.g. a stray brace in plain text), the
+        objects closed inside it are tried, outermost first, in order.
         """
-        stack = 1
-        i = start_idx + 1
-
-        while i < len(self.buffer) and stack > 0:
-            if self.buffer[i] == "{":
-                stack += 1
-            elif self.buffer[i] == "}":
-                stack -= 1
-            i += 1
-
-        # If complete JSON is found
-        if stack == 0:
-            json_str = self.buffer[start_idx:i]
+        pending: List[_Span] = [(0, len(candidate), children)]
+        while pending:
+            start, end, nested = pending.pop()
             try:
-                json_data = json.loads(json_str)
-                return json_data, i - 1
+                json_data = json.loads(candidate[start:end])
             except json.JSONDecodeError:
                 logger.warning(
-                    f"JSON structure found but parsing failed: {json_str[:50]}..."
+                    f"JSON structure found but parsing failed: {candidate[start:start + 50]}..."
                 )
-
-        return None, -1
+                pending.extend(reversed(nested))
+                continue
+            found.append(json_data)
+            self.completed_jsons.append(json_data)
 
     # 获取所有已解析的JSON对象
     def get_all_jsons(self) -> List[Dict[str, Any]]:
@@ -136,10 +166,13 @@ class StreamJSONDetector:
     # 重置检测器状态，准备处理新的流
     def reset(self) -> None:
         """Reset detector state, prepare to process a new stream."""
-        self.buffer = ""
-        self.potential_jsons = []
         self.completed_jsons = []
-        self.processed_ranges = []
+        self._parts = []
+        self._size = 0
+        self._open = []
+        self._opened = False
+        self._in_string = False
+        self._escape = False
 
 
 # Usage example
@@ -23,6 +23,7 @@ from mcp.types import (
 )
 import mcp.types as types
 from pydantic import AnyUrl
+from loguru import logger
 
 
 class SimpleMediaConfig:
@@ -68,13 +69,13 @@ def get_media_config():
                 config.ads_directory = media_server_config.get('ads_directory', 'ads')
                 config.videos_directory = media_server_config.get('videos_directory', 'videos')
                 
-                print(f"✅ Loaded media config from YAML: host={config.host}, port={config.port}")
+                logger.info(f"✅ Loaded media config from YAML: host={config.host}, port={config.port}")
                 return config
     except Exception as yaml_error:
-        print(f"⚠️ Warning: Failed to load YAML config: {yaml_error}")
+        logger.warning(f"⚠️ Warning: Failed to load YAML config: {yaml_error}")
     
     # 最后的fallback
-    print("ℹ️ Using default media configuration")
+    logger.info("ℹ️ Using default media configuration")
     return SimpleMediaConfig()
 
 
@@ -93,6 +94,8 @@ class LaundryServer:
             self.videos_dir = Path(videos_dir)
         
         self.machine_videos = {}
+        # 上次扫描时视频目录的mtime，目录有文件增删时重新扫描
+        self._videos_mtime = None
         self.welcome_messages = {
             "zh": "欢迎来到自动洗衣店！请问您需要了解哪台洗衣机的使用方法？",
             "ja": "セルフランドリーへようこそ！どちらの洗濯機の使用方法をご案内いたしますか？",
@@ -125,21 +128,37 @@ class LaundryServer:
     def _scan_machine_videos(self):
         """扫描视频目录，发现可用的洗衣机教程视频"""
         video_extensions = ['.mp4', '.avi', '.mov', '.mkv']
+        # 扫描完成后再替换，工具在扫描途中读到的仍是旧列表
+        machine_videos = {}
+        # 在扫描前记录，扫描途中的改动会在下次调用时再扫描
+        self._videos_mtime = self._directory_mtime()
         
         for video_file in self.videos_dir.iterdir():
             if video_file.suffix.lower() in video_extensions:
                 # 解析文件名提取机器编号
                 machine_id = self._extract_machine_id_from_filename(video_file.name)
                 if machine_id:
-                    self.machine_videos[machine_id] = {
+                    machine_videos[machine_id] = {
                         'path': str(video_file),
                         'name': video_file.stem,
                         'exists': True
                     }
+        self.machine_videos = machine_videos
         
-        print(f"🎬 検出された洗濯機チュートリアル動画: {len(self.machine_videos)}個")
+        logger.info(f"🎬 検出された洗濯機チュートリアル動画: {len(self.machine_videos)}個")
         for machine_id, info in self.machine_videos.items():
-            print(f"  - 💻 {machine_id}番機: {info['name']}")
+            logger.info(f"  - 💻 {machine_id}番機: {info['name']}")
+
+    def _directory_mtime(self) -> Optional[int]:
+        try:
+            return self.videos_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def _rescan_if_changed(self):
+        """视频目录有文件增删（如通过 /api/videos 上传或删除）时重新扫描"""
+        if self._directory_mtime() != self._videos_mtime:
+            await asyncio.to_thread(self._scan_machine_videos)
 
     def _extract_machine_id_from_filename(self, filename: str) -> Optional[str]:
         """从文件名提取机器编号"""
@@ -208,7 +227,7 @@ class LaundryServer:
             match = re.search(pattern, text, re.IGNORECASE)
             if match:
                 result = match.group(1).upper()
-                print(f"Debug: 从文本 '{text}' 中提取到机器编号: '{result}' (模式: {pattern})")
+                logger.debug(f"从文本 '{text}' 中提取到机器编号: '{result}' (模式: {pattern})")
                 return result
         
         # 如果找不到明确的编号，尝试提取纯数字或字母
@@ -221,10 +240,10 @@ class LaundryServer:
             matches = re.findall(pattern, text, re.IGNORECASE)
             if matches:
                 result = matches[0].upper()
-                print(f"Debug: 从文本 '{text}' 中提取到简单编号: '{result}' (模式: {pattern})")
+                logger.debug(f"从文本 '{text}' 中提取到简单编号: '{result}' (模式: {pattern})")
                 return result
         
-        print(f"Debug: 无法从文本 '{text}' 中提取机器编号")
+        logger.debug(f"无法从文本 '{text}' 中提取机器编号")
         return None
 
     def _register_tools(self):
@@ -291,6 +310,8 @@ class LaundryServer:
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent]:
             """处理工具调用"""
+            if name != "refresh_machine_videos":
+                await self._rescan_if_changed()
             if name == "query_machine_tutorial":
                 return await self._query_machine_tutorial(arguments)
             elif name == "list_available_machines":
@@ -414,7 +435,8 @@ class LaundryServer:
     async def _refresh_machine_videos(self, arguments: dict) -> list[types.TextContent]:
         """刷新洗衣机教程视频列表"""
         old_count = len(self.machine_videos)
-        self._scan_machine_videos()
+        # 目录扫描是阻塞IO，进程内运行时不能占用事件循环
+        await asyncio.to_thread(self._scan_machine_videos)
         new_count = len(self.machine_videos)
         
         return [types.TextContent(
@@ -436,6 +458,7 @@ class LaundryServer:
             """
             列出所有可用的视频资源
             """
+            await self._rescan_if_changed()
             resources = []
             
             for machine_id, info in self.machine_videos.items():
@@ -471,33 +494,35 @@ class LaundryServer:
             
             raise ValueError(f"Unknown resource: {uri}")
 
+    async def serve(self, read_stream, write_stream):
+        """在给定的流上运行MCP会话（stdio或进程内内存流）"""
+        await self.server.run(
+            read_stream,
+            write_stream,
+            InitializationOptions(
+                server_name="laundry-assistant",
+                server_version="1.0.0",
+                capabilities=self.server.get_capabilities(
+                    notification_options=NotificationOptions(),
+                    experimental_capabilities={}
+                )
+            )
+        )
+
     async def run(self):
         """运行服务器"""
         from mcp.server.stdio import stdio_server
         
         try:
-            print("🔌 Starting stdio server...")
+            logger.info("🔌 Starting stdio server...")
             async with stdio_server() as (read_stream, write_stream):
-                print("✅ Stdio server started, initializing MCP server...")
-                await self.server.run(
-                    read_stream,
-                    write_stream,
-                    InitializationOptions(
-                        server_name="laundry-assistant",
-                        server_version="1.0.0",
-                        capabilities=self.server.get_capabilities(
-                            notification_options=NotificationOptions(),
-                            experimental_capabilities={}
-                        )
-                    )
-                )
+                logger.info("✅ Stdio server started, initializing MCP server...")
+                await self.serve(read_stream, write_stream)
         except (asyncio.CancelledError, KeyboardInterrupt) as e:
-            print(f"🛑 Laundry server stopped gracefully: {type(e).__name__}")
+            logger.info(f"🛑 Laundry server stopped gracefully: {type(e).__name__}")
             return  # 正常退出，不重新抛出异常
         except Exception as e:
-            print(f"❌ Laundry server error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ Laundry server error: {e}")
             raise  # 重新抛出异常以触发重试
 
 
@@ -518,24 +543,24 @@ async def main():
     
     for attempt in range(max_retries):
         try:
-            print(f"🚀 启动洗衣机MCP服务器 (尝试 {attempt + 1}/{max_retries})")
+            logger.info(f"🚀 启动洗衣机MCP服务器 (尝试 {attempt + 1}/{max_retries})")
             server = LaundryServer(videos_dir=args.videos_dir)
             await server.run()
             break  # 正常退出，不重启
             
         except (asyncio.CancelledError, KeyboardInterrupt):
-            print("🛑 洗衣机MCP服务器被手动停止")
+            logger.info("🛑 洗衣机MCP服务器被手动停止")
             break
             
         except Exception as e:
-            print(f"❌ 洗衣机MCP服务器错误 (尝试 {attempt + 1}/{max_retries}): {e}")
+            logger.error(f"❌ 洗衣机MCP服务器错误 (尝试 {attempt + 1}/{max_retries}): {e}")
             
             if attempt < max_retries - 1:
-                print(f"⏳ {retry_delay}秒后重试...")
+                logger.info(f"⏳ {retry_delay}秒后重试...")
                 await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, 30)  # 指数退避，最大30秒
             else:
-                print("💀 洗衣机MCP服务器重试次数用尽，退出")
+                logger.error("💀 洗衣机MCP服务器重试次数用尽，退出")
                 raise
 
 
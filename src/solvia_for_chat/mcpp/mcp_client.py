@@ -1,30 +1,23 @@
 """MCP Client for Open-LLM-Vtuber."""
-import json
 import asyncio
-from contextlib import AsyncExitStack
+import time
 from typing import Dict, Any, List, Callable
 from loguru import logger
-from datetime import timedelta
 
-from mcp import ClientSession, StdioServerParameters
-from anyio import ClosedResourceError
 from mcp.types import Tool
-from mcp.client.stdio import stdio_client
 
 from .server_registry import ServerRegistry
+from .session_pool import mcp_session_pool
+from .types import MCPServer
 from ..message_handler import message_handler
 
-# 默认超时时间
-DEFAULT_TIMEOUT = timedelta(seconds=30)
 
 class MCPClient:
-    """MCP Client ., Manages persistent connections to multiple MCP servers.
+    """MCP Client ., Calls tools on MCP servers through the shared session pool.
     """
 
     def __init__(self, server_registery: ServerRegistry, send_text: Callable = None, client_uid: str = None) -> None:
         """Initialize the MCP Client."""
-        self.exit_stack: AsyncExitStack = AsyncExitStack()
-        self.active_sessions: Dict[str, ClientSession] = {}
         self._list_tools_cache: Dict[str, List[Tool]] = {}  # Cache for list_tools
         self._send_text: Callable = send_text
         self._client_uid: str = client_uid
@@ -37,64 +30,24 @@ class MCPClient:
             )
         logger.info("MCPC: Initialized MCPClient instance.")
 
-    async def _ensure_server_running_and_get_session(
-        self, server_name: str
-    ) -> ClientSession:
-        """Gets the existing session or creates a new one."""
-        if server_name in self.active_sessions:
-            return self.active_sessions[server_name]
+    def bind_client(self, send_text: Callable, client_uid: str) -> None:
+        """Attach a client to a client created ahead of time (context pool)."""
+        self._send_text = send_text
+        self._client_uid = client_uid
 
-        logger.info(f"MCPC: Starting and connecting to server '{server_name}'...")
+    def _get_server(self, server_name: str) -> MCPServer:
         server = self.server_registery.get_server(server_name)
         if not server:
             raise ValueError(
                 f"MCPC: Server '{server_name}' not found in available servers."
             )
+        return server
 
-        timeout = server.timeout if server.timeout else DEFAULT_TIMEOUT
-        # Normalize timeout to timedelta expected by mcp client
-        try:
-            from datetime import timedelta as _td
-            if not isinstance(timeout, _td):
-                timeout = _td(seconds=float(timeout))
-        except Exception:
-            timeout = DEFAULT_TIMEOUT
-
-        server_params = StdioServerParameters(
-            command=server.command,
-            args=server.args,
-            env=server.env,
-        )
-
-        try:
-            # Add timeout to server startup
-            startup_timeout = 10  # seconds
-            logger.debug(f"MCPC: Starting server '{server_name}' with timeout {startup_timeout}s...")
-            
-            stdio_transport = await asyncio.wait_for(
-                self.exit_stack.enter_async_context(stdio_client(server_params)),
-                timeout=startup_timeout
-            )
-            read, write = stdio_transport
-
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write, read_timeout_seconds=timeout)
-            )
-            await session.initialize()
-
-            self.active_sessions[server_name] = session
-            logger.info(f"MCPC: Successfully connected to server '{server_name}'.")
-            return session
-        except asyncio.TimeoutError:
-            logger.error(f"MCPC: Timeout starting server '{server_name}' after {startup_timeout}s")
-            raise RuntimeError(
-                f"MCPC: Timeout starting server '{server_name}'"
-            )
-        except Exception as e:
-            logger.exception(f"MCPC: Failed to connect to server '{server_name}': {e}")
-            raise RuntimeError(
-                f"MCPC: Failed to connect to server '{server_name}'."
-            ) from e
+    async def connect(self, server_name: str) -> None:
+        """Make sure a session to the server is open, without any request."""
+        server = self._get_server(server_name)
+        async with mcp_session_pool.session(server, self):
+            pass
 
     async def list_tools(self, server_name: str) -> List[Tool]:
         """List all available tools on the specified server."""
@@ -104,13 +57,14 @@ class MCPClient:
             return self._list_tools_cache[server_name]
 
         logger.debug(f"MCPC: Cache miss for list_tools on server '{server_name}'. Fetching...")
-        
+        server = self._get_server(server_name)
+
         # Retry mechanism for list_tools
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                session = await self._ensure_server_running_and_get_session(server_name)
-                response = await session.list_tools()
+                async with mcp_session_pool.session(server, self) as session:
+                    response = await session.list_tools()
 
                 # Store in cache before returning
                 self._list_tools_cache[server_name] = response.tools
@@ -120,15 +74,9 @@ class MCPClient:
             except Exception as e:
                 logger.warning(f"MCPC: list_tools failed for '{server_name}' (attempt {attempt + 1}/{max_retries}): {e}")
                 
-                # Clear cache and active session on failure
-                if server_name in self._list_tools_cache:
-                    del self._list_tools_cache[server_name]
-                if server_name in self.active_sessions:
-                    try:
-                        await self.active_sessions[server_name].close()
-                    except:
-                        pass
-                    del self.active_sessions[server_name]
+                # Clear cache and drop the session if it is dead
+                self._list_tools_cache.pop(server_name, None)
+                await mcp_session_pool.check(server, self)
                 
                 if attempt < max_retries - 1:
                     await asyncio.sleep(0.5 * (attempt + 1))  # 渐进延迟
@@ -145,35 +93,34 @@ class MCPClient:
         """
         logger.info(f"MCPC: Calling tool '{tool_name}' on server '{server_name}'...")
 
-        # Try once, and on ClosedResourceError/connection failures, reset session and retry once
+        # Try once, and on connection failures, restart the session if it died and retry once
         max_attempts = 2
         last_error: Exception | None = None
         response = None
         for attempt in range(1, max_attempts + 1):
+            started = time.perf_counter()
             try:
-                session = await self._ensure_server_running_and_get_session(server_name)
-                response = await session.call_tool(tool_name, tool_args)
+                server = self._get_server(server_name)
+                async with mcp_session_pool.session(server, self) as session:
+                    # Measure the call itself, not waiting for a session to start
+                    started = time.perf_counter()
+                    response = await session.call_tool(tool_name, tool_args)
                 last_error = None
+                mcp_session_pool.record_call(
+                    server_name, (time.perf_counter() - started) * 1000, response.isError
+                )
+                break
+            except ValueError as e:
+                last_error = e
                 break
-            except ClosedResourceError as cre:
-                logger.warning(f"MCPC: Session closed when calling tool '{tool_name}' (attempt {attempt}/{max_attempts}). Reconnecting...")
-                # Remove broken session and retry
-                if server_name in self.active_sessions:
-                    try:
-                        await self.active_sessions[server_name].close()
-                    except Exception:
-                        pass
-                    self.active_sessions.pop(server_name, None)
-                last_error = cre
             except Exception as e:
                 logger.warning(f"MCPC: Error calling tool '{tool_name}' (attempt {attempt}/{max_attempts}): {e}")
-                # On generic errors, also reset and retry once
-                if server_name in self.active_sessions:
-                    try:
-                        await self.active_sessions[server_name].close()
-                    except Exception:
-                        pass
-                    self.active_sessions.pop(server_name, None)
+                mcp_session_pool.record_call(
+                    server_name, (time.perf_counter() - started) * 1000, error=True
+                )
+                # Other clients may share the session; only replace it if it no longer
+                # answers (the supervisor swaps in the warm standby when there is one)
+                await mcp_session_pool.check(server, self)
                 last_error = e
         if last_error is not None and response is None:
             logger.error(f"MCPC: Failed to call tool '{tool_name}' after retries: {last_error}")
@@ -215,20 +162,14 @@ class MCPClient:
         return result
 
     async def aclose(self) -> None:
-        """Closes all active server connections (robust to cleanup errors)."""
-        logger.info(
-            f"MCPC: Closing client instance and {len(self.active_sessions)} active connections..."
-        )
+        """Releases this client's hold on the pooled server sessions."""
+        logger.info("MCPC: Closing client instance...")
         try:
-            try:
-                await self.exit_stack.aclose()
-            except Exception as e:
-                # Swallow cleanup errors from anyio cancel scopes to avoid breaking callers
-                logger.warning(f"MCPC: exit_stack.aclose() raised during cleanup: {e}")
+            await mcp_session_pool.release(self)
+        except Exception as e:
+            logger.warning(f"MCPC: Releasing pooled sessions raised during cleanup: {e}")
         finally:
-            self.active_sessions.clear()
             self._list_tools_cache.clear()  # Clear cache on close
-            self.exit_stack = AsyncExitStack()
             logger.info("MCPC: Client instance closed (cleanup safe).")
 
     async def __aenter__(self) -> "MCPClient":
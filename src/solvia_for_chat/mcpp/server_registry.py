@@ -7,10 +7,12 @@ from pathlib import Path
 from typing import Dict, Optional, Union, Any
 from loguru import logger
 
-from .types import MCPServer
+from .types import MCPServer, ToolCacheConfig
+from .session_pool import mcp_session_pool
 from .utils.path import validate_file
 
 DEFAULT_CONFIG_PATH = "mcp_servers.json"
+DEFAULT_MAX_CONCURRENCY = 4
 
 
 
@@ -40,6 +42,7 @@ class ServerRegistry:
         self.node_available = self._detect_runtime("node")
 
         self.load_servers()
+        mcp_session_pool.configure(**self.config.get("supervisor", {}))
 
     def _detect_runtime(self, target: str) -> bool:
         """Check if a runtime is available in the system PATH."""
@@ -54,14 +57,28 @@ class ServerRegistry:
             return
 
         for server_name, server_details in servers_config.items():
-            if "command" not in server_details or "args" not in server_details:
+            transport = server_details.get("transport", "stdio")
+            if transport == "inprocess":
+                if "entrypoint" not in server_details:
+                    logger.warning(
+                        f"MCPSM: In-process server '{server_name}' has no entrypoint. Ignoring."
+                    )
+                    continue
+            elif transport != "stdio":
+                logger.warning(
+                    f"MCPSM: Unknown transport '{transport}' for '{server_name}'. Ignoring."
+                )
+                continue
+            elif "command" not in server_details or "args" not in server_details:
                 logger.warning(
                     f"MCPSM: Invalid server details for '{server_name}'. Ignoring."
                 )
                 continue
 
-            command = server_details["command"]
-            if command == "npx":
+            command = server_details.get("command", "")
+            if transport == "inprocess":
+                pass  # Runs in this process; no runtime to check
+            elif command == "npx":
                 if not self.npx_available:
                     logger.warning(
                         f"MCPSM: npx is not available. Cannot load server '{server_name}'."
@@ -84,9 +101,21 @@ class ServerRegistry:
             self.servers[server_name] = MCPServer(
                 name=server_name,
                 command=command,
-                args=server_details["args"],
+                args=server_details.get("args", []),
                 env=server_details.get("env", None),
                 timeout=server_details.get("timeout", None),
+                max_concurrency=max(
+                    1, int(server_details.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+                ),
+                cache=ToolCacheConfig.from_dict(server_details["cache"])
+                if server_details.get("cache")
+                else None,
+                transport=transport,
+                entrypoint=server_details.get("entrypoint"),
+                entrypoint_kwargs=server_details.get("entrypoint_kwargs"),
+                shared=bool(server_details.get("shared", True)),
+                pool_size=max(1, int(server_details.get("pool_size", 1))),
+                standby=bool(server_details.get("standby", False)),
             )
             logger.debug(f"MCPSM: Loaded server: '{server_name}'.")
 
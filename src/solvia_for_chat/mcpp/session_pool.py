@@ -0,0 +1,504 @@
+"""
+Process-wide pool of MCP sessions shared by the websocket clients.
+
+Without the pool every ``MCPClient`` (one per websocket connection) launches
+its own copy of every MCP server. The pool keeps ``pool_size`` sessions per
+server and hands them to all clients; requests are multiplexed over a session
+(JSON-RPC ids keep them apart) and go to the least busy one. Servers that keep
+per-client state can opt out with ``"shared": false`` in ``mcp_servers.json``
+and get private sessions per client, still managed by the pool.
+
+Each session is opened and closed by a task of its own, so the transport's
+cancel scopes are always exited by the task that entered them. Holders are
+refcounted; a server's sessions are closed ``idle_timeout`` seconds after the
+last client released them. A supervisor loop pings every session
+periodically and restarts the ones that died, with exponential backoff when
+restarts fail. Servers marked ``"standby": true`` keep an extra warm session
+that takes over at once when the active one dies.
+"""
+
+import asyncio
+import bisect
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from .inprocess import inprocess_client
+from .types import MCPServer
+
+DEFAULT_TIMEOUT = timedelta(seconds=30)
+STARTUP_TIMEOUT = 10  # seconds
+PING_TIMEOUT = 5  # seconds
+
+
+def _read_timeout(server: MCPServer) -> timedelta:
+    timeout = server.timeout if server.timeout else DEFAULT_TIMEOUT
+    try:
+        if not isinstance(timeout, timedelta):
+            timeout = timedelta(seconds=float(timeout))
+    except (TypeError, ValueError):
+        timeout = DEFAULT_TIMEOUT
+    return timeout
+
+
+def _open_transport(server: MCPServer):
+    if server.transport == "inprocess":
+        return inprocess_client(server)
+    return stdio_client(
+        StdioServerParameters(command=server.command, args=server.args, env=server.env)
+    )
+
+
+class PooledSession:
+    """An MCP session owned by a dedicated task"""
+
+    def __init__(self, server: MCPServer) -> None:
+        self.server = server
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(
+            self._run(), name=f"mcp-session-{self.server.name}"
+        )
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=STARTUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise RuntimeError(
+                f"MCPC: Timeout starting server '{self.server.name}' after {STARTUP_TIMEOUT}s"
+            )
+        if self.session is None:
+            raise RuntimeError(
+                f"MCPC: Failed to connect to server '{self.server.name}'."
+            ) from self.error
+
+    async def _run(self) -> None:
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(_open_transport(self.server))
+                session = await stack.enter_async_context(
+                    ClientSession(read, write, read_timeout_seconds=_read_timeout(self.server))
+                )
+                await session.initialize()
+                self.session = session
+                self.started_at = time.monotonic()
+                self._ready.set()
+                logger.info(f"MCPC: Connected to server '{self.server.name}'.")
+                await self._stop.wait()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+            logger.error(f"MCPC: Session of server '{self.server.name}' failed: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=PING_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning(f"MCPC: Ping to server '{self.server.name}' failed: {e}")
+            return False
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self._task and not self._task.done():
+            done, _ = await asyncio.wait({self._task}, timeout=5)
+            if not done:
+                self._task.cancel()
+                await asyncio.wait({self._task})
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of call latencies in milliseconds"""
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+
+    def record(self, elapsed_ms: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if above the last bucket)"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        buckets["gt_10000ms"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _ServerStats:
+    """Lifecycle and call metrics of one server, across its pool entries"""
+
+    def __init__(self) -> None:
+        self.restarts = 0
+        self.failed_starts = 0
+        self.calls = LatencyHistogram()
+
+
+class _PoolEntry:
+    """Sessions of one server (or of one client, for servers that are not shared)"""
+
+    def __init__(self, key: str, server: MCPServer) -> None:
+        self.key = key
+        self.server = server
+        self.loop = asyncio.get_running_loop()
+        self.sessions: List[PooledSession] = []
+        self.standby: Optional[PooledSession] = None
+        self.holders: Set[int] = set()
+        self.lock = asyncio.Lock()
+        self.close_task: Optional[asyncio.Task] = None
+        self.restarts = 0
+        # Restart backoff
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.last_check_at = time.monotonic()
+        self.replenishing = False
+
+
+class MCPSessionPool:
+    """Refcounted MCP sessions, shared across clients for stateless servers.
+
+    Also supervises them: sessions are pinged in the background, dead ones
+    are replaced (by the warm standby when the server has one) and restarts
+    that fail are retried with exponential backoff, so a crashed server is
+    usually back before the next user request needs it.
+    """
+
+    def __init__(
+        self,
+        health_check_interval: float = 10.0,
+        idle_timeout: float = 30.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> None:
+        self.health_check_interval = health_check_interval
+        self.idle_timeout = idle_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._entries: Dict[str, _PoolEntry] = {}
+        self._stats: Dict[str, _ServerStats] = {}
+        # Pool key -> (event loop, semaphore enforcing the server's max_concurrency)
+        self._call_limits: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._health_loop_owner: Optional[asyncio.AbstractEventLoop] = None
+
+    def configure(self, **settings: Any) -> None:
+        """Update supervisor settings, e.g. from the "supervisor" block of mcp_servers.json"""
+        for name in ("health_check_interval", "idle_timeout", "backoff_base", "backoff_max"):
+            if settings.get(name) is not None:
+                setattr(self, name, float(settings[name]))
+
+    @staticmethod
+    def _key(server: MCPServer, owner: Any) -> str:
+        if server.shared:
+            return server.name
+        return f"{server.name}#{id(owner):x}"
+
+    def _server_stats(self, server_name: str) -> _ServerStats:
+        return self._stats.setdefault(server_name, _ServerStats())
+
+    def _entry(self, server: MCPServer, owner: Any) -> _PoolEntry:
+        key = self._key(server, owner)
+        entry = self._entries.get(key)
+        if entry is not None and entry.loop is not asyncio.get_running_loop():
+            # Created on an event loop that is gone (e.g. during startup)
+            logger.debug(f"MCPC: Dropping sessions of '{key}' from a previous event loop.")
+            entry = None
+        if entry is None:
+            entry = self._entries[key] = _PoolEntry(key, server)
+        return entry
+
+    async def _start_session(self, entry: _PoolEntry) -> PooledSession:
+        pooled = PooledSession(entry.server)
+        try:
+            await pooled.start()
+        except Exception:
+            entry.failures += 1
+            entry.next_attempt_at = time.monotonic() + min(
+                self.backoff_max, self.backoff_base * 2 ** (entry.failures - 1)
+            )
+            self._server_stats(entry.server.name).failed_starts += 1
+            raise
+        entry.failures = 0
+        entry.next_attempt_at = 0.0
+        return pooled
+
+    def _drop(self, entry: _PoolEntry, pooled: PooledSession, reason: str) -> None:
+        entry.sessions.remove(pooled)
+        entry.restarts += 1
+        self._server_stats(entry.server.name).restarts += 1
+        logger.warning(f"MCPC: Session of '{entry.key}' is {reason}, restarting it.")
+        asyncio.create_task(pooled.close())
+
+    def _promote_standby(self, entry: _PoolEntry) -> bool:
+        standby, entry.standby = entry.standby, None
+        if standby is None:
+            return False
+        if not standby.alive:
+            asyncio.create_task(standby.close())
+            return False
+        entry.sessions.append(standby)
+        logger.info(f"MCPC: Promoted the standby session of '{entry.key}'.")
+        return True
+
+    async def _get(self, server: MCPServer, owner: Any) -> PooledSession:
+        entry = self._entry(server, owner)
+        entry.holders.add(id(owner))
+        if entry.close_task and not entry.close_task.done():
+            entry.close_task.cancel()
+        entry.close_task = None
+        self._ensure_health_task()
+
+        async with entry.lock:
+            for pooled in [p for p in entry.sessions if not p.alive]:
+                self._drop(entry, pooled, "dead")
+            if not entry.sessions:
+                self._promote_standby(entry)
+
+            idle = [p for p in entry.sessions if p.in_flight == 0]
+            if not idle and len(entry.sessions) < max(1, entry.server.pool_size):
+                logger.info(
+                    f"MCPC: Starting session {len(entry.sessions) + 1} of '{entry.key}'..."
+                )
+                pooled = await self._start_session(entry)
+                entry.sessions.append(pooled)
+                return pooled
+            return min(entry.sessions, key=lambda p: p.in_flight)
+
+    @asynccontextmanager
+    async def session(self, server: MCPServer, owner: Any) -> AsyncIterator[ClientSession]:
+        """Borrow the least busy session of a server for one request"""
+        pooled = await self._get(server, owner)
+        pooled.in_flight += 1
+        try:
+            yield pooled.session
+        finally:
+            pooled.in_flight -= 1
+
+    def call_limit(self, server: MCPServer, owner: Any) -> asyncio.Semaphore:
+        """Semaphore enforcing the server's max_concurrency across every client sharing its sessions"""
+        key = self._key(server, owner)
+        loop = asyncio.get_running_loop()
+        limit = self._call_limits.get(key)
+        if limit is None or limit[0] is not loop:
+            limit = self._call_limits[key] = (
+                loop,
+                asyncio.Semaphore(max(1, server.max_concurrency)),
+            )
+        return limit[1]
+
+    def record_call(self, server_name: str, elapsed_ms: float, error: bool = False) -> None:
+        """Add a tool call to the server's latency histogram"""
+        self._server_stats(server_name).calls.record(elapsed_ms, error)
+
+    async def check(self, server: MCPServer, owner: Any) -> None:
+        """Ping the sessions of a server after a failed request; replace dead ones"""
+        entry = self._entries.get(self._key(server, owner))
+        if entry is None:
+            return
+        await self._check_entry(entry)
+
+    async def _check_entry(self, entry: _PoolEntry) -> None:
+        entry.last_check_at = time.monotonic()
+        # Ping without the lock, so a hung session does not hold up requests
+        checked = list(entry.sessions) + ([entry.standby] if entry.standby else [])
+        healthy = await asyncio.gather(*(p.ping() for p in checked))
+        async with entry.lock:
+            for pooled, ok in zip(checked, healthy):
+                if ok:
+                    continue
+                if pooled in entry.sessions:
+                    self._drop(entry, pooled, "unhealthy")
+                elif pooled is entry.standby:
+                    logger.warning(f"MCPC: Standby session of '{entry.key}' is unhealthy.")
+                    asyncio.create_task(pooled.close())
+                    entry.standby = None
+            if not entry.sessions:
+                self._promote_standby(entry)
+        if entry.holders and (not entry.sessions or entry.server.standby):
+            # In the background, so a request that hit a dead session can retry on the standby
+            asyncio.create_task(self._replenish(entry))
+
+    async def _replenish(self, entry: _PoolEntry) -> None:
+        """Reconnect a held server and refill its standby, honouring the backoff"""
+        if entry.replenishing or not entry.holders:
+            return
+        if time.monotonic() < entry.next_attempt_at:
+            return
+        entry.replenishing = True
+        try:
+            # Sessions start outside the lock so requests keep using the
+            # promoted standby (or wait only for their own start) meanwhile
+            if not entry.sessions:
+                # Reconnect now rather than on the next request of a client
+                pooled = await self._start_session(entry)
+                async with entry.lock:
+                    if not entry.sessions:
+                        entry.sessions.append(pooled)
+                    elif entry.server.standby and entry.standby is None:
+                        entry.standby = pooled
+                    else:
+                        asyncio.create_task(pooled.close())
+            if entry.server.standby and entry.standby is None:
+                pooled = await self._start_session(entry)
+                if entry.standby is None:
+                    entry.standby = pooled
+                else:
+                    asyncio.create_task(pooled.close())
+        except Exception as e:
+            logger.warning(
+                f"MCPC: Restarting '{entry.key}' failed ({entry.failures} in a row), "
+                f"next attempt in {entry.next_attempt_at - time.monotonic():.1f}s: {e}"
+            )
+        finally:
+            entry.replenishing = False
+
+    async def release(self, owner: Any) -> None:
+        """Drop the owner's hold on its servers; idle servers close after idle_timeout"""
+        for entry in list(self._entries.values()):
+            if id(owner) not in entry.holders:
+                continue
+            entry.holders.discard(id(owner))
+            if not entry.server.shared:
+                self._call_limits.pop(entry.key, None)
+            if not entry.holders and entry.close_task is None:
+                if entry.loop is not asyncio.get_running_loop():
+                    self._entries.pop(entry.key, None)
+                    continue
+                entry.close_task = asyncio.create_task(self._close_when_idle(entry))
+
+    async def _close_when_idle(self, entry: _PoolEntry) -> None:
+        await asyncio.sleep(self.idle_timeout if entry.server.shared else 0)
+        if entry.holders:
+            return
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        await self._close_entry(entry)
+
+    async def _close_entry(self, entry: _PoolEntry) -> None:
+        sessions = entry.sessions + ([entry.standby] if entry.standby else [])
+        logger.info(f"MCPC: Closing {len(sessions)} idle session(s) of '{entry.key}'.")
+        await asyncio.gather(*(p.close() for p in sessions), return_exceptions=True)
+        entry.sessions.clear()
+        entry.standby = None
+
+    def _ensure_health_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._health_task is None
+            or self._health_task.done()
+            or self._health_loop_owner is not loop
+        ):
+            self._health_task = asyncio.create_task(self._health_loop())
+            self._health_loop_owner = loop
+
+    async def _health_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._entries:
+            await asyncio.sleep(min(1.0, self.health_check_interval))
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if entry.loop is not loop:
+                    continue
+                try:
+                    if now - entry.last_check_at >= self.health_check_interval:
+                        await self._check_entry(entry)
+                    elif not entry.sessions or (entry.server.standby and entry.standby is None):
+                        await self._replenish(entry)
+                except Exception as e:
+                    logger.warning(f"MCPC: Health check of '{entry.key}' failed: {e}")
+
+    async def close_all(self) -> None:
+        """Close every session, e.g. on server shutdown"""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        loop = asyncio.get_running_loop()
+        if self._health_task and self._health_loop_owner is loop:
+            self._health_task.cancel()
+        for entry in entries:
+            if entry.close_task and not entry.close_task.done():
+                entry.close_task.cancel()
+            if entry.loop is loop:
+                await self._close_entry(entry)
+
+    def report(self) -> Dict[str, Any]:
+        """Sessions per pool entry plus uptime, restarts and call latency per server"""
+        now = time.monotonic()
+        sessions = {
+            key: {
+                "shared": entry.server.shared,
+                "holders": len(entry.holders),
+                "sessions": len(entry.sessions),
+                "alive": sum(1 for p in entry.sessions if p.alive),
+                "standby": bool(entry.standby and entry.standby.alive),
+                "in_flight": sum(p.in_flight for p in entry.sessions),
+                "restarts": entry.restarts,
+                "consecutive_failures": entry.failures,
+                "uptime_s": round(
+                    max((now - p.started_at for p in entry.sessions if p.alive), default=0.0), 1
+                ),
+            }
+            for key, entry in self._entries.items()
+        }
+        servers = {
+            name: {
+                "restarts": stats.restarts,
+                "failed_starts": stats.failed_starts,
+                "calls": stats.calls.report(),
+            }
+            for name, stats in self._stats.items()
+        }
+        return {"sessions": sessions, "servers": servers}
+
+
+mcp_session_pool = MCPSessionPool()
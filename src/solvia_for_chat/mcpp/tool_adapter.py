@@ -7,6 +7,7 @@ from loguru import logger
 from .types import FormattedTool
 from .mcp_client import MCPClient
 from .server_registry import ServerRegistry
+from .tool_schema_cache import DiscoveredTools, schema_cache_key, tool_schema_cache
 
 
 class ToolAdapter:
@@ -15,6 +16,8 @@ class ToolAdapter:
     def __init__(self, server_registery: Optional[ServerRegistry] = None) -> None:
         """Initialize with an ServerRegistry."""
         self.server_registery = server_registery or ServerRegistry()
+        # Contexts created at the same time share one discovery run
+        self._discovery_lock = asyncio.Lock()
 
     async def get_server_and_tool_info(
         self, enabled_servers: List[str]
@@ -63,6 +66,7 @@ class ToolAdapter:
                                 description=tool.description,
                                 # Generic schema will be generated later if needed
                                 generic_schema=None,
+                                cache_ttl=self._metadata_cache_ttl(tool),
                             )
                         break  # Success - break retry loop
                         
@@ -94,6 +98,17 @@ class ToolAdapter:
         )
         return servers_info, formatted_tools
 
+    @staticmethod
+    def _metadata_cache_ttl(tool: Any) -> Optional[float]:
+        """Result cache TTL a server declares with `_meta: {"cache_ttl": seconds}`."""
+        meta = getattr(tool, "meta", None) or {}
+        try:
+            ttl = meta.get("cache_ttl")
+            return float(ttl) if ttl is not None else None
+        except (AttributeError, TypeError, ValueError):
+            logger.warning(f"MC: Ignoring invalid cache_ttl metadata of tool '{tool.name}'.")
+            return None
+
     def construct_mcp_prompt_string(
         self, servers_info: Dict[str, Dict[str, str]]
     ) -> str:
@@ -227,17 +242,51 @@ class ToolAdapter:
         )
         return openai_tools, claude_tools
 
+    async def discover(self, enabled_servers: List[str]) -> DiscoveredTools:
+        """Fetch and format the tools of the enabled servers, once per process.
+
+        Results are served from the tool schema cache while mcp_servers.json
+        and the server code are unchanged.
+        """
+        persist = bool(self.server_registery.config.get("persist_tool_schemas", True))
+        key = schema_cache_key(self.server_registery, enabled_servers)
+        cached = tool_schema_cache.get(key, persist)
+        if cached is not None:
+            return cached
+
+        async with self._discovery_lock:
+            cached = tool_schema_cache.get(key, persist)
+            if cached is not None:
+                return cached
+
+            logger.info(
+                f"MC: Running dynamic tool construction for servers: {enabled_servers}"
+            )
+            servers_info, formatted_tools_dict = await self.get_server_and_tool_info(
+                enabled_servers
+            )
+            openai_tools, claude_tools = self.format_tools_for_api(formatted_tools_dict)
+            discovered = DiscoveredTools(
+                mcp_prompt=self.construct_mcp_prompt_string(servers_info),
+                openai_tools=openai_tools,
+                claude_tools=claude_tools,
+                tools=formatted_tools_dict,
+            )
+            logger.info("MC: Dynamic tool construction complete.")
+
+            # Only cache complete results, so a server that failed is retried next time
+            complete = all(
+                servers_info.get(name)
+                for name in enabled_servers
+                if name in self.server_registery.servers
+            )
+            if complete and formatted_tools_dict:
+                tool_schema_cache.put(key, discovered, persist)
+            return discovered
+
     async def get_tools(
         self, enabled_servers: List[str]
     ) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
         """Run the dynamic fetching and formatting process."""
-        logger.info(
-            f"MC: Running dynamic tool construction for servers: {enabled_servers}"
-        )
-        servers_info, formatted_tools_dict = await self.get_server_and_tool_info(
-            enabled_servers
-        )
-        mcp_prompt_string = self.construct_mcp_prompt_string(servers_info)
-        openai_tools, claude_tools = self.format_tools_for_api(formatted_tools_dict)
-        logger.info("MC: Dynamic tool construction complete.")
-        return mcp_prompt_string, openai_tools, claude_tools
+        discovered = await self.discover(enabled_servers)
+        return discovered.mcp_prompt, discovered.openai_tools, discovered.claude_tools
@@ -0,0 +1,177 @@
+"""
+TTL cache for the results of idempotent MCP tools.
+
+Tools such as ``list_available_machines`` or ``get_advertisement_playlist``
+return the same data until the media directories change, yet every call is a
+JSON-RPC round-trip to the server subprocess. Results are cached per server,
+tool and canonicalized arguments for the TTL configured for the tool, either
+in ``mcp_servers.json``::
+
+    "laundry-assistant": {
+      ...
+      "cache": {
+        "ttls": {"list_available_machines": 300},
+        "invalidated_by": ["videos"],
+        "invalidating_tools": ["refresh_machine_videos"]
+      }
+    }
+
+or by the server itself through a ``cache_ttl`` entry in the tool's ``_meta``.
+Entries are dropped when their topic is invalidated (e.g. the video upload
+route invalidates ``"videos"``) or when an invalidating tool of the same
+server is called. The cache is shared by all sessions.
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from .types import ToolCacheConfig
+
+CacheKey = Tuple[str, str, str]
+
+
+def canonical_arguments(tool_args: Any) -> str:
+    """Arguments as a stable string, independent of key order and spacing"""
+    try:
+        return json.dumps(
+            tool_args or {}, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+    except (TypeError, ValueError):
+        return repr(tool_args)
+
+
+class ToolResultCache:
+    """LRU + TTL cache of tool results, with topic invalidation and hit stats"""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self._max_entries = max_entries
+        # key -> (expires_at, topics, result)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Tuple[str, ...], Dict[str, Any]]]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "invalidated": 0,
+        }
+        self._tool_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def ttl_for(
+        config: Optional[ToolCacheConfig],
+        tool_name: str,
+        metadata_ttl: Optional[float] = None,
+    ) -> Optional[float]:
+        """TTL of a tool in seconds, or None if its results must not be cached"""
+        ttl = None
+        if config and tool_name in config.ttls:
+            ttl = config.ttls[tool_name]
+        elif metadata_ttl is not None:
+            ttl = metadata_ttl
+        return ttl if ttl and ttl > 0 else None
+
+    def get(
+        self, server_name: str, tool_name: str, tool_args: Any
+    ) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss"""
+        key = (server_name, tool_name, canonical_arguments(tool_args))
+        entry = self._entries.get(key)
+        tool_stats = self._tool_stats.setdefault(
+            f"{server_name}/{tool_name}", {"hits": 0, "misses": 0}
+        )
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.stats["expired"] += 1
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            tool_stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        tool_stats["hits"] += 1
+        logger.debug(f"ToolCache: hit for '{tool_name}' on '{server_name}'.")
+        return copy.deepcopy(entry[2])
+
+    def put(
+        self,
+        server_name: str,
+        tool_name: str,
+        tool_args: Any,
+        result: Dict[str, Any],
+        ttl: float,
+        config: Optional[ToolCacheConfig] = None,
+    ) -> None:
+        """Store a successful result for ``ttl`` seconds"""
+        key = (server_name, tool_name, canonical_arguments(tool_args))
+        topics = tuple(config.invalidated_by) if config else ()
+        self._entries[key] = (time.monotonic() + ttl, topics, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def note_call(
+        self, server_name: str, tool_name: str, config: Optional[ToolCacheConfig]
+    ) -> None:
+        """Clear the server's results when a tool that changes its state is called"""
+        if config and tool_name in config.invalidating_tools:
+            self.invalidate(server_name=server_name)
+
+    def invalidate(
+        self, server_name: Optional[str] = None, topic: Optional[str] = None
+    ) -> int:
+        """
+        Drop cached results of a server, of a topic, or everything when
+        neither is given.
+
+        Returns:
+            int: Number of entries dropped
+        """
+        if server_name is None and topic is None:
+            keys = list(self._entries)
+        else:
+            keys = [
+                key
+                for key, (_, topics, _) in self._entries.items()
+                if (server_name is not None and key[0] == server_name)
+                or (topic is not None and topic in topics)
+            ]
+        for key in keys:
+            del self._entries[key]
+        self.stats["invalidated"] += len(keys)
+        if keys:
+            logger.info(
+                f"ToolCache: invalidated {len(keys)} result(s) "
+                f"(server={server_name}, topic={topic})."
+            )
+        return len(keys)
+
+    def report(self) -> Dict[str, Any]:
+        """Stats plus hit rate, overall and per tool"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "tools": {
+                name: {
+                    **counts,
+                    "hit_rate": round(
+                        counts["hits"] / (counts["hits"] + counts["misses"]), 3
+                    )
+                    if counts["hits"] + counts["misses"]
+                    else 0.0,
+                }
+                for name, counts in self._tool_stats.items()
+            },
+        }
+
+
+tool_result_cache = ToolResultCache()
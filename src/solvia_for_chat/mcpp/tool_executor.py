@@ -1,11 +1,15 @@
+import asyncio
 import json
 import datetime
+from contextlib import nullcontext
 from loguru import logger
 from typing import (
     Dict,
     Any,
     List,
     Literal,
+    Optional,
+    Tuple,
     Union,
     AsyncIterator,
 )
@@ -13,6 +17,8 @@ from typing import (
 from .types import ToolCallObject
 from .mcp_client import MCPClient
 from .tool_manager import ToolManager
+from .tool_cache import tool_result_cache
+from .session_pool import mcp_session_pool
 
 
 class ToolExecutor:
@@ -20,9 +26,12 @@ class ToolExecutor:
         self,
         mcp_client: MCPClient,
         tool_manager: ToolManager,
+        max_parallel_tools: int = 4,
     ):
         self._mcp_client = mcp_client
         self._tool_manager = tool_manager
+        # Calls of one LLM response that may run at the same time
+        self._max_parallel_tools = max(1, max_parallel_tools)
 
     def parse_tool_call(self, call: Union[Dict[str, Any], ToolCallObject]) -> tuple:
         """Parse tool call from different formats.
@@ -148,144 +157,314 @@ class ToolExecutor:
                 logger.warning(f"Skipping invalid tool structure in prompt mode JSON")
         return parsed_tools
 
+    def _running_status(
+        self, tool_id: str, tool_name: str, tool_input: Any
+    ) -> Dict[str, Any]:
+        return {
+            "type": "tool_call_status",
+            "tool_id": tool_id,
+            "tool_name": tool_name,
+            "status": "running",
+            "content": f"Input: {json.dumps(tool_input)}",
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
+            + "Z",
+        }
+
+    def response_limit(self) -> asyncio.Semaphore:
+        """A new `max_parallel_tools` limit for the calls of one LLM response"""
+        return asyncio.Semaphore(self._max_parallel_tools)
+
+    def start_tool_call(
+        self, call: ToolCallObject, turn_limit: asyncio.Semaphore
+    ) -> Optional[Tuple[asyncio.Task, Dict[str, Any]]]:
+        """Start running a tool call in the background, ahead of `execute_tools`.
+
+        Used while the LLM is still streaming: the call runs as soon as its
+        arguments are complete. Pass the returned task to `execute_tools` via
+        `started` to pick up its result, and `turn_limit` (from
+        `response_limit`, one per LLM response) to both.
+
+        Returns:
+            Optional[Tuple[asyncio.Task, Dict[str, Any]]]: The task running the
+            tool and the 'running' status update to send, or None if the call
+            cannot be started early
+        """
+        tool_name, tool_id, tool_input, _, _, parse_error = self.parse_tool_call(call)
+        if parse_error or not tool_id:
+            return None
+        logger.info(f"Starting tool early: {tool_name} (ID: {tool_id})")
+        task = asyncio.create_task(
+            self._run_limited(turn_limit, tool_name, tool_id, tool_input)
+        )
+        return task, self._running_status(tool_id, tool_name, tool_input)
+
+    async def _run_limited(
+        self,
+        turn_limit: asyncio.Semaphore,
+        tool_name: str,
+        tool_id: str,
+        tool_input: Any,
+    ) -> tuple[bool, str, Dict[str, Any], List[Dict[str, Any]]]:
+        async with turn_limit:
+            return await self.run_single_tool(tool_name, tool_id, tool_input)
+
     async def execute_tools(
         self,
         tool_calls: Union[List[Dict[str, Any]], List[ToolCallObject]],
         caller_mode: Literal["Claude", "OpenAI", "Prompt"],
+        started: Optional[Dict[str, Tuple[asyncio.Task, str]]] = None,
+        turn_limit: Optional[asyncio.Semaphore] = None,
     ) -> AsyncIterator[Dict[str, Any]]:
-        """Execute tools and yield status updates."""
-        tool_results_for_llm = []
+        """Execute tools and yield status updates.
+
+        Independent calls run concurrently, at most `max_parallel_tools` at a
+        time (and at most `max_concurrency` per server). Status updates are
+        yielded as calls start and finish; `final_tool_results` keeps the
+        original call order.
+
+        Args:
+            tool_calls: The tool calls to run, in order
+            caller_mode: Format of the results for the LLM
+            started: Tool id -> (task, arguments) for calls already started
+                with `start_tool_call`. Their results are awaited instead of
+                running them again; entries are consumed.
+            turn_limit: The limit the `started` calls were started with, so
+                they count against max_parallel_tools; a new one if None
+        """
+        started = started if started is not None else {}
+        # One slot per call, so results can be returned in call order
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        updates: asyncio.Queue = asyncio.Queue()
+        if turn_limit is None:
+            turn_limit = self.response_limit()
+        tasks: List[asyncio.Task] = []
 
         logger.info(f"Executing {len(tool_calls)} tool(s) for {caller_mode} caller.")
-        for call in tool_calls:
-            (
-                tool_name,
-                tool_id,
-                tool_input,
-                is_error,
-                result_content,
-                parse_error,
-            ) = self.parse_tool_call(call)
-            
-            logger.info(f"Executing tool: {call}")
-            
-            if parse_error:
-                logger.warning(
-                    f"Skipping tool call due to parsing error: {result_content}"
+        try:
+            for index, call in enumerate(tool_calls):
+                (
+                    tool_name,
+                    tool_id,
+                    tool_input,
+                    is_error,
+                    result_content,
+                    parse_error,
+                ) = self.parse_tool_call(call)
+
+                logger.info(f"Executing tool: {call}")
+
+                if parse_error:
+                    logger.warning(
+                        f"Skipping tool call due to parsing error: {result_content}"
+                    )
+                    status_update = {
+                        "type": "tool_call_status",
+                        "tool_id": tool_id
+                        or f"parse_error_{datetime.datetime.now(datetime.timezone.utc).isoformat()}",
+                        "tool_name": tool_name or "Unknown Tool",
+                        "status": "error",
+                        "content": result_content,
+                        "timestamp": datetime.datetime.now(
+                            datetime.timezone.utc
+                        ).isoformat()
+                        + "Z",
+                    }
+                    yield status_update
+                    # Even on parse error, we might need to format a result for the LLM
+                    # Use dummy values or the error message
+                    results[index] = self.format_tool_result(
+                        caller_mode,
+                        tool_id or f"parse_error_{datetime.datetime.now(datetime.timezone.utc).isoformat()}",
+                        result_content,
+                        True,  # is_error
+                    )
+                    continue  # Skip execution logic for this call
+
+                early_task, early_arguments = started.pop(tool_id, (None, None))
+                if early_task and (
+                    not isinstance(call, ToolCallObject)
+                    or call.function.arguments != early_arguments
+                ):
+                    # The arguments changed after the call was started; run it again
+                    logger.warning(f"Discarding early run of tool '{tool_name}'.")
+                    early_task.cancel()
+                    early_task = None
+
+                tasks.append(
+                    asyncio.create_task(
+                        self._run_call(
+                            index,
+                            tool_name,
+                            tool_id,
+                            tool_input,
+                            caller_mode,
+                            early_task,
+                            turn_limit,
+                            updates,
+                        )
+                    )
                 )
-                status_update = {
-                    "type": "tool_call_status",
-                    "tool_id": tool_id
-                    or f"parse_error_{datetime.datetime.now(datetime.timezone.utc).isoformat()}",
-                    "tool_name": tool_name or "Unknown Tool",
-                    "status": "error",
-                    "content": result_content,
-                    "timestamp": datetime.datetime.now(
-                        datetime.timezone.utc
-                    ).isoformat()
-                    + "Z",
-                }
-                yield status_update
-                # Even on parse error, we might need to format a result for the LLM
-                # Use dummy values or the error message
-                formatted_result = self.format_tool_result(
-                     caller_mode,
-                     tool_id or f"parse_error_{datetime.datetime.now(datetime.timezone.utc).isoformat()}",
-                     result_content,
-                     True # is_error
-                 )
-                if formatted_result:
-                    tool_results_for_llm.append(formatted_result)
-                continue # Skip execution logic for this call
-
-            # Yield 'running' status before execution
-            yield {
-                "type": "tool_call_status",
-                "tool_id": tool_id,
-                "tool_name": tool_name,
-                "status": "running",
-                "content": f"Input: {json.dumps(tool_input)}",
-                "timestamp": datetime.datetime.now(
-                    datetime.timezone.utc
-                ).isoformat()
-                + "Z",
-            }
 
-            # Execute the tool
-            (
-                is_error,
-                text_content,
-                metadata,
-                content_items,
-            ) = await self.run_single_tool(tool_name, tool_id, tool_input)
-
-            # Determine content for status update and LLM result format
-            status_content = text_content # Default to text content
-            llm_formatted_content = text_content # Default to text content for LLM
-
-            has_image = False
-            if content_items:
-                image_items = [item for item in content_items if item.get('type') == 'image']
-                if image_items:
-                    has_image = True
-                    num_images = len(image_items)
-                    status_content = f"{text_content}\n[Tool returned {num_images} image(s)]".strip()
-
-                    if caller_mode == "Claude":
-                        # Format for Claude: list of blocks
-                        claude_blocks = []
-                        if text_content:
-                            claude_blocks.append({"type": "text", "text": text_content})
-                        for item in content_items:
-                             if item.get('type') == 'image' and 'data' in item and 'mimeType' in item:
-                                 claude_blocks.append({
-                                     "type": "image",
-                                     "source": {
-                                         "type": "base64",
-                                         "media_type": item['mimeType'],
-                                         "data": item['data'],
-                                     }
-                                 })
-                             # Add other non-text types here
-                        llm_formatted_content = claude_blocks if claude_blocks else "" # Use blocks or empty string
-                    elif caller_mode in ["OpenAI", "Prompt"]:
-                        llm_formatted_content = status_content
-
-            # Prepare and yield tool call status update
-            status_update = {
-                "type": "tool_call_status",
-                "tool_id": tool_id,
-                "tool_name": tool_name,
-                "status": "error" if is_error else "completed",
-                "content": status_content if not is_error else f"Error: {text_content}", # Use descriptive content or error message
-                "timestamp": datetime.datetime.now(
-                    datetime.timezone.utc
-                ).isoformat()
-                + "Z",
-            }
+            pending = len(tasks)
+            while pending:
+                kind, payload = await updates.get()
+                if kind == "status":
+                    yield payload
+                    continue
+                # A call finished
+                pending -= 1
+                index, status_update, formatted_result = payload
+                yield status_update
+                results[index] = formatted_result
+        finally:
+            # Interrupted: stop calls that are still running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        tool_results_for_llm = [result for result in results if result]
+        logger.info(
+            f"Finished executing tools with {len(tool_results_for_llm)} results."
+        )
+        yield {"type": "final_tool_results", "results": tool_results_for_llm}
 
-            # For stagehand_navigate tool, include browser view links if available
-            if tool_name == "stagehand_navigate" and not is_error:
-                live_view_data = metadata.get("liveViewData", {})
-                if live_view_data:
-                    logger.info(
-                        f"Found live view data for stagehand_navigate: {live_view_data}"
+    async def _run_call(
+        self,
+        index: int,
+        tool_name: str,
+        tool_id: str,
+        tool_input: Any,
+        caller_mode: Literal["Claude", "OpenAI", "Prompt"],
+        early_task: Optional[asyncio.Task],
+        turn_limit: asyncio.Semaphore,
+        updates: asyncio.Queue,
+    ) -> None:
+        """Run one call of `execute_tools` and report through the updates queue."""
+        try:
+            if early_task:
+                # 'running' was already sent when the call was started
+                outcome = await early_task
+            else:
+                async with turn_limit:
+                    # Yield 'running' status before execution
+                    updates.put_nowait(
+                        ("status", self._running_status(tool_id, tool_name, tool_input))
                     )
-                    status_update["browser_view"] = live_view_data
+                    outcome = await self.run_single_tool(tool_name, tool_id, tool_input)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Unexpected error running tool '{tool_name}': {e}")
+            text_content = f"Unexpected error executing tool '{tool_name}': {e}"
+            outcome = (True, text_content, {}, [{"type": "error", "text": text_content}])
+
+        status_update, formatted_result = self._build_result(
+            caller_mode, tool_name, tool_id, *outcome
+        )
+        updates.put_nowait(("done", (index, status_update, formatted_result)))
 
-            yield status_update
+    def _build_result(
+        self,
+        caller_mode: Literal["Claude", "OpenAI", "Prompt"],
+        tool_name: str,
+        tool_id: str,
+        is_error: bool,
+        text_content: str,
+        metadata: Dict[str, Any],
+        content_items: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Build the status update and the LLM-formatted result of a finished call."""
+        # Determine content for status update and LLM result format
+        status_content = text_content # Default to text content
+        llm_formatted_content = text_content # Default to text content for LLM
+
+        if content_items:
+            image_items = [item for item in content_items if item.get('type') == 'image']
+            if image_items:
+                num_images = len(image_items)
+                status_content = f"{text_content}\n[Tool returned {num_images} image(s)]".strip()
+
+                if caller_mode == "Claude":
+                    # Format for Claude: list of blocks
+                    claude_blocks = []
+                    if text_content:
+                        claude_blocks.append({"type": "text", "text": text_content})
+                    for item in content_items:
+                         if item.get('type') == 'image' and 'data' in item and 'mimeType' in item:
+                             claude_blocks.append({
+                                 "type": "image",
+                                 "source": {
+                                     "type": "base64",
+                                     "media_type": item['mimeType'],
+                                     "data": item['data'],
+                                 }
+                             })
+                         # Add other non-text types here
+                    llm_formatted_content = claude_blocks if claude_blocks else "" # Use blocks or empty string
+                elif caller_mode in ["OpenAI", "Prompt"]:
+                    llm_formatted_content = status_content
+
+        # Prepare tool call status update
+        status_update = {
+            "type": "tool_call_status",
+            "tool_id": tool_id,
+            "tool_name": tool_name,
+            "status": "error" if is_error else "completed",
+            "content": status_content if not is_error else f"Error: {text_content}", # Use descriptive content or error message
+            "timestamp": datetime.datetime.now(
+                datetime.timezone.utc
+            ).isoformat()
+            + "Z",
+        }
+
+        # For stagehand_navigate tool, include browser view links if available
+        if tool_name == "stagehand_navigate" and not is_error:
+            live_view_data = metadata.get("liveViewData", {})
+            if live_view_data:
+                logger.info(
+                    f"Found live view data for stagehand_navigate: {live_view_data}"
+                )
+                status_update["browser_view"] = live_view_data
 
-            # Format result for LLM and add to list
-            formatted_result = self.format_tool_result(
-                caller_mode, tool_id, llm_formatted_content, is_error
+        # Format result for LLM
+        formatted_result = self.format_tool_result(
+            caller_mode, tool_id, llm_formatted_content, is_error
+        )
+        return status_update, formatted_result
+
+    async def _call_tool(
+        self,
+        server_name: str,
+        tool_name: str,
+        tool_input: Any,
+        metadata_ttl: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Call a tool through MCPClient, serving idempotent tools from the result cache."""
+        server = self._mcp_client.server_registery.get_server(server_name)
+        cache_config = server.cache if server else None
+        ttl = tool_result_cache.ttl_for(cache_config, tool_name, metadata_ttl)
+
+        if ttl:
+            cached = tool_result_cache.get(server_name, tool_name, tool_input)
+            if cached is not None:
+                return cached
+
+        # Shared with every session using the server's pooled MCP sessions
+        limit = mcp_session_pool.call_limit(server, self._mcp_client) if server else nullcontext()
+        async with limit:
+            result_dict = await self._mcp_client.call_tool(
+                server_name=server_name,
+                tool_name=tool_name,
+                tool_args=tool_input,
             )
-            if formatted_result:
-                tool_results_for_llm.append(formatted_result)
 
-        logger.info(
-            f"Finished executing tools with {len(tool_results_for_llm)} results."
-        )
-        yield {"type": "final_tool_results", "results": tool_results_for_llm}
+        tool_result_cache.note_call(server_name, tool_name, cache_config)
+        content_items = result_dict.get("content_items", [])
+        if ttl and not (content_items and content_items[0].get("type") == "error"):
+            tool_result_cache.put(
+                server_name, tool_name, tool_input, result_dict, ttl, cache_config
+            )
+        return result_dict
 
     async def run_single_tool(
         self, tool_name: str, tool_id: str, tool_input: Any
@@ -318,10 +497,8 @@ class ToolExecutor:
             is_error = True
         else:
             try:
-                result_dict = await self._mcp_client.call_tool(
-                    server_name=tool_info.related_server,
-                    tool_name=tool_name,
-                    tool_args=tool_input,
+                result_dict = await self._call_tool(
+                    tool_info.related_server, tool_name, tool_input, tool_info.cache_ttl
                 )
 
                 metadata = result_dict.get("metadata", {})
@@ -0,0 +1,169 @@
+"""
+Cache of discovered MCP tool schemas.
+
+Tool discovery (start every enabled server, list its tools, format the
+schemas for the LLM APIs) is the same for every ``ServiceContext`` as long as
+``mcp_servers.json`` and the server code do not change. The result is kept in
+memory for the process and persisted to ``DEFAULT_CACHE_PATH`` so restarts can
+skip discovery. Entries are keyed by a hash of the enabled servers' config
+entries and the modification times of their code (and of the formatting code
+in this package); any change makes the key miss and discovery runs again.
+
+Set ``"persist_tool_schemas": false`` at the top level of ``mcp_servers.json``
+to keep the cache in memory only.
+"""
+
+import dataclasses
+import hashlib
+import importlib.util
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .server_registry import ServerRegistry
+from .types import FormattedTool
+
+DEFAULT_CACHE_PATH = Path(".mcp_cache") / "tool_schemas.json"
+MAX_PERSISTED_KEYS = 8
+
+# Code whose changes alter the discovered output
+_FORMATTING_MODULES = [
+    Path(__file__).with_name("tool_adapter.py"),
+    Path(__file__).with_name("types.py"),
+]
+
+
+@dataclass
+class DiscoveredTools:
+    """Result of MCP tool discovery for a set of enabled servers"""
+
+    mcp_prompt: str = ""
+    openai_tools: List[Dict[str, Any]] = field(default_factory=list)
+    claude_tools: List[Dict[str, Any]] = field(default_factory=list)
+    tools: Dict[str, FormattedTool] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mcp_prompt": self.mcp_prompt,
+            "openai_tools": self.openai_tools,
+            "claude_tools": self.claude_tools,
+            "tools": {name: dataclasses.asdict(tool) for name, tool in self.tools.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DiscoveredTools":
+        known = {f.name for f in dataclasses.fields(FormattedTool)}
+        return cls(
+            mcp_prompt=data["mcp_prompt"],
+            openai_tools=data["openai_tools"],
+            claude_tools=data["claude_tools"],
+            tools={
+                name: FormattedTool(**{k: v for k, v in tool.items() if k in known})
+                for name, tool in data["tools"].items()
+            },
+        )
+
+
+def _module_mtime(module_name: str) -> Optional[float]:
+    """Modification time of a module's source file, without importing it"""
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return None
+    return os.path.getmtime(spec.origin)
+
+
+def _server_code_mtimes(server_config: Dict[str, Any]) -> List[Optional[float]]:
+    modules = []
+    entrypoint = server_config.get("entrypoint")
+    if entrypoint:
+        modules.append(entrypoint.partition(":")[0])
+    args = list(server_config.get("args", []))
+    if "-m" in args and args.index("-m") + 1 < len(args):
+        modules.append(args[args.index("-m") + 1])
+    return [_module_mtime(module) for module in modules]
+
+
+def schema_cache_key(registry: ServerRegistry, enabled_servers: List[str]) -> str:
+    """Hash of everything the discovered schemas depend on"""
+    servers_config = registry.config.get("mcp_servers", {})
+    material = {
+        "servers": {
+            name: {
+                "config": servers_config.get(name),
+                "code_mtimes": _server_code_mtimes(servers_config.get(name) or {}),
+            }
+            for name in sorted(enabled_servers)
+        },
+        "formatting": [
+            os.path.getmtime(path) if path.exists() else None
+            for path in _FORMATTING_MODULES
+        ],
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ToolSchemaCache:
+    """Discovered tool schemas by key, in memory and optionally on disk"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH) -> None:
+        self.path = Path(path)
+        self._memory: Dict[str, DiscoveredTools] = {}
+
+    def get(self, key: str, persist: bool = True) -> Optional[DiscoveredTools]:
+        if key in self._memory:
+            return self._memory[key]
+        if not persist or not self.path.exists():
+            return None
+        try:
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+            entry = stored.get(key)
+            if entry is None:
+                return None
+            discovered = DiscoveredTools.from_dict(entry)
+        except Exception as e:
+            logger.warning(f"MC: Ignoring unreadable tool schema cache '{self.path}': {e}")
+            return None
+        self._memory[key] = discovered
+        logger.info(f"MC: Loaded {len(discovered.tools)} tool schemas from '{self.path}'.")
+        return discovered
+
+    def put(self, key: str, discovered: DiscoveredTools, persist: bool = True) -> None:
+        self._memory[key] = discovered
+        if not persist:
+            return
+        try:
+            stored: Dict[str, Any] = {}
+            if self.path.exists():
+                try:
+                    stored = json.loads(self.path.read_text(encoding="utf-8"))
+                except ValueError:
+                    stored = {}
+            stored.pop(key, None)
+            stored[key] = discovered.to_dict()
+            # Keep the most recent keys; older ones are stale after code changes
+            stored = dict(list(stored.items())[-MAX_PERSISTED_KEYS:])
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(stored, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"MC: Failed to persist tool schema cache to '{self.path}': {e}")
+
+    def clear(self) -> None:
+        self._memory.clear()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+tool_schema_cache = ToolSchemaCache()
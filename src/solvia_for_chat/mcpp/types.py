@@ -3,6 +3,29 @@ from datetime import timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+# 工具结果缓存配置
+@dataclass
+class ToolCacheConfig:
+    """Result caching of a server's tools
+
+    Args:
+        ttls (Dict[str, float], optional): Tool name -> seconds a result stays valid. Defaults to an empty dict.
+        invalidated_by (List[str], optional): Topics whose invalidation drops the cached results, e.g. "videos". Defaults to an empty list.
+        invalidating_tools (List[str], optional): Tools whose call drops the server's cached results. Defaults to an empty list.
+    """
+
+    ttls: Dict[str, float] = field(default_factory=dict)
+    invalidated_by: List[str] = field(default_factory=list)
+    invalidating_tools: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolCacheConfig":
+        return cls(
+            ttls={name: float(ttl) for name, ttl in data.get("ttls", {}).items()},
+            invalidated_by=list(data.get("invalidated_by", [])),
+            invalidating_tools=list(data.get("invalidating_tools", [])),
+        )
+
 # MCP服务器
 @dataclass
 class MCPServer:
@@ -14,6 +37,14 @@ class MCPServer:
         args (List[str], optional): Arguments for the command. Defaults to an empty list.
         env (Optional[Dict[str, str]], optional): Environment variables for the command. Defaults to None.
         timeout (Optional[timedelta], optional): Timeout for the command. Defaults to 10 seconds.
+        max_concurrency (int, optional): Maximum number of tool calls running on the server at once. Defaults to 4.
+        cache (Optional[ToolCacheConfig], optional): Result caching of the server's tools. Defaults to None.
+        transport (str, optional): "stdio" to launch the command as a subprocess, or "inprocess" to run the server in this event loop. Defaults to "stdio".
+        entrypoint (Optional[str], optional): "module:ClassName" of an in-process server. Defaults to None.
+        entrypoint_kwargs (Optional[Dict[str, Any]], optional): Keyword arguments for the in-process server class. Defaults to None.
+        shared (bool, optional): Whether all clients share the server's sessions; False gives every client its own. Defaults to True.
+        pool_size (int, optional): Maximum number of sessions opened to a shared server. Defaults to 1.
+        standby (bool, optional): Keep a warm spare session that takes over when the active one dies. Defaults to False.
     """
 
     name: str
@@ -22,6 +53,14 @@ class MCPServer:
     env: Optional[Dict[str, str]] = None
     timeout: Optional[timedelta] = timedelta(seconds=30)
     description: str = "No description available."
+    max_concurrency: int = 4
+    cache: Optional[ToolCacheConfig] = None
+    transport: str = "stdio"
+    entrypoint: Optional[str] = None
+    entrypoint_kwargs: Optional[Dict[str, Any]] = None
+    shared: bool = True
+    pool_size: int = 1
+    standby: bool = False
 
 # 格式化工具
 @dataclass
@@ -33,12 +72,14 @@ class FormattedTool:
         related_server (str): The name of the server that contains the tool.
         generic_schema (Optional[Dict[str, Any]], optional): Generic schema for the tool. Defaults to None.
         description (str, optional): Description of the tool, usually from the server's tool definition. Defaults to "No description available.".
+        cache_ttl (Optional[float], optional): Result cache TTL declared by the server in the tool's metadata. Defaults to None.
     """
 
     input_schema: Dict[str, Any]
     related_server: str
     generic_schema: Optional[Dict[str, Any]] = None
     description: str = "No description available."
+    cache_ttl: Optional[float] = None
 
 # 工具调用函数对象
 @dataclass
@@ -13,6 +13,14 @@ from loguru import logger
 from .service_context import ServiceContext
 from .websocket_handler import WebSocketHandler
 from .proxy_handler import ProxyHandler
+from .utils.latency_tracer import trace_aggregator
+from .conversations.speculation import speculation_manager
+from .mcpp.tool_cache import tool_result_cache
+from .mcpp.session_pool import mcp_session_pool
+from .chat_history_manager import history_writer
+from .engine_registry import engine_registry
+from .config_reload import ConfigReloader
+from .utils.startup_profile import startup_profile
 
 # 从文件名中提取机器编号
 def extract_machine_id_from_filename(filename: str) -> Optional[str]:
@@ -53,21 +61,66 @@ def init_client_ws_route(default_context_cache: ServiceContext) -> APIRouter:
 
     router = APIRouter()
     ws_handler = WebSocketHandler(default_context_cache)
+    # Fill the context pool in the server's event loop, tear down parked sessions on shutdown
+    router.add_event_handler("startup", ws_handler.start)
+    router.add_event_handler("shutdown", ws_handler.close)
+    # Watch conf.yaml and apply its changes to the running sessions
+    config_reloader = ConfigReloader(ws_handler)
+    router.add_event_handler("startup", config_reloader.start)
+    router.add_event_handler("shutdown", config_reloader.close)
+
+    @router.post("/api/config/reload")
+    async def reload_config():
+        """Re-read conf.yaml and reinitialize what changed"""
+        try:
+            return await config_reloader.reload()
+        except Exception as e:
+            logger.error(f"Config reload failed: {e}")
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+    @router.get("/api/config/reload/stats")
+    async def get_config_reload_stats():
+        """Reload counters and the result of the last reload"""
+        return config_reloader.report()
+
+    @router.get("/api/context-pool/stats")
+    async def get_context_pool_stats():
+        """Hits, misses and build times of the session context pool"""
+        return ws_handler.context_pool.report()
+
+    @router.get("/api/startup/profile")
+    async def get_startup_profile():
+        """Time per component of the server startup"""
+        return startup_profile.report()
+
+    @router.get("/api/engines/stats")
+    async def get_engine_stats():
+        """Shared ASR/TTS engines with their reference counts"""
+        return engine_registry.report()
+
+    @router.get("/api/sessions/resume/stats")
+    async def get_session_resume_stats():
+        """Parked sessions and resume counters"""
+        return ws_handler.session_resumer.report()
 
     @router.websocket("/client-ws")
     async def websocket_endpoint(websocket: WebSocket):
         """WebSocket endpoint for client connections"""
+        if not startup_profile.ready:
+            logger.info("Client connecting while the server is starting, waiting for it")
+            await startup_profile.wait_ready()
         await websocket.accept()
         client_uid = str(uuid4())
 
         try:
-            await ws_handler.handle_new_connection(websocket, client_uid)
+            # A resumed session keeps its original client uid
+            client_uid = await ws_handler.handle_new_connection(websocket, client_uid)
             await ws_handler.handle_websocket_communication(websocket, client_uid)
         except WebSocketDisconnect:
-            await ws_handler.handle_disconnect(client_uid)
+            await ws_handler.handle_disconnect(client_uid, websocket)
         except Exception as e:
             logger.error(f"Error in WebSocket connection: {e}")
-            await ws_handler.handle_disconnect(client_uid)
+            await ws_handler.handle_disconnect(client_uid, websocket)
             raise
 
     return router
@@ -322,6 +375,7 @@ def init_webtool_routes(default_context_cache: ServiceContext) -> APIRouter:
             file_size = len(contents)
             
             logger.info(f"Successfully uploaded advertisement: {filename} ({file_size/(1024*1024):.2f}MB)")
+            tool_result_cache.invalidate(topic="ads")
             
             return {
                 "status": "success",
@@ -375,6 +429,7 @@ def init_webtool_routes(default_context_cache: ServiceContext) -> APIRouter:
             file_path.unlink()
             
             logger.info(f"Successfully deleted advertisement: {filename}")
+            tool_result_cache.invalidate(topic="ads")
             
             return {
                 "status": "success",
@@ -492,6 +547,7 @@ def init_webtool_routes(default_context_cache: ServiceContext) -> APIRouter:
             machine_id = extract_machine_id_from_filename(filename)
             
             logger.info(f"Successfully uploaded laundry video: {filename} ({file_size/(1024*1024):.2f}MB)")
+            tool_result_cache.invalidate(topic="videos")
             
             return {
                 "status": "success",
@@ -546,6 +602,7 @@ def init_webtool_routes(default_context_cache: ServiceContext) -> APIRouter:
             file_path.unlink()
             
             logger.info(f"Successfully deleted laundry video: {filename}")
+            tool_result_cache.invalidate(topic="videos")
             
             return {
                 "status": "success",
@@ -561,6 +618,49 @@ def init_webtool_routes(default_context_cache: ServiceContext) -> APIRouter:
                 media_type="application/json",
             )
 
+    @router.get("/api/latency/summary")
+    async def get_latency_summary():
+        """Per-stage latency percentiles over recent conversation turns"""
+        return {
+            "percentiles": trace_aggregator.percentiles(),
+            "recent_turns": trace_aggregator.recent(),
+        }
+
+    @router.get("/api/speculation/stats")
+    async def get_speculation_stats():
+        """Hit rate and wasted tokens of speculative LLM starts"""
+        return speculation_manager.report()
+
+    @router.get("/api/mcp/tool-cache/stats")
+    async def get_tool_cache_stats():
+        """Hit rate of the MCP tool result cache"""
+        return tool_result_cache.report()
+
+    @router.get("/api/mcp/sessions")
+    async def get_mcp_sessions():
+        """Pooled MCP server sessions, their holders and restarts"""
+        return mcp_session_pool.report()
+
+    @router.get("/api/chat-history/writer/stats")
+    async def get_history_writer_stats():
+        """Queue depth and batching of the chat history writer"""
+        return history_writer.report()
+
+    @router.get("/api/latency/traces/{turn_id}")
+    async def get_latency_trace(turn_id: str):
+        """Chrome trace JSON for a single recent turn"""
+        trace = trace_aggregator.get_trace(turn_id)
+        if trace is None:
+            return JSONResponse(
+                {"error": f"Trace {turn_id} not found"}, status_code=404
+            )
+        return JSONResponse(
+            trace.to_chrome_trace(),
+            headers={
+                "Content-Disposition": f'attachment; filename="turn_{turn_id}.json"'
+            },
+        )
+
     @router.websocket("/tts-ws")
     async def tts_endpoint(websocket: WebSocket):
         """WebSocket endpoint for TTS generation"""
@@ -10,6 +10,7 @@ import os
 import shutil
 
 from fastapi import FastAPI
+from loguru import logger
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import Response
 from starlette.staticfiles import StaticFiles as StarletteStaticFiles
@@ -17,6 +18,10 @@ from starlette.staticfiles import StaticFiles as StarletteStaticFiles
 from .routes import init_client_ws_route, init_webtool_routes, init_proxy_route
 from .service_context import ServiceContext
 from .config_manager.utils import Config
+from .mcpp.session_pool import mcp_session_pool
+from .chat_history_manager import configure_chat_history, history_writer
+from .engine_registry import engine_registry
+from .utils.startup_profile import startup_profile
 
 
 # Create a custom StaticFiles class that adds CORS headers
@@ -82,6 +87,8 @@ class WebSocketServer:
             default_context_cache or ServiceContext()
         )  # Use provided context or initialize a new empty one waiting to be loaded
         # It will be populated during the initialize method call
+        if default_context_cache is not None:
+            startup_profile.mark_ready()
 
         # Add global CORS middleware
         self.app.add_middleware(
@@ -101,8 +108,23 @@ class WebSocketServer:
             init_webtool_routes(default_context_cache=self.default_context_cache),
         )
 
+        # HTTP is served while the default context is still loading
+        self.app.add_event_handler(
+            "startup", lambda: startup_profile.mark("http server")
+        )
+
+        # Close the pooled MCP server sessions when the server stops
+        self.app.add_event_handler("shutdown", mcp_session_pool.close_all)
+
         # Initialize and include proxy routes if proxy is enabled
         system_config = config.system_config
+
+        # Write queued chat history messages before the server stops
+        configure_chat_history(system_config.chat_history)
+        self.app.add_event_handler("shutdown", history_writer.aclose)
+
+        # How long engines no session uses stay loaded
+        engine_registry.configure(idle_timeout=system_config.engine_registry.idle_timeout)
         if hasattr(system_config, "enable_proxy") and system_config.enable_proxy:
             # Construct the server URL for the proxy
             host = system_config.host
@@ -166,8 +188,14 @@ class WebSocketServer:
 
     async def initialize(self):
         """Asynchronously load the service context from config.
-        Calling this function is needed if default_context_cache was not provided to the constructor."""
-        await self.default_context_cache.load_from_config(self.config)
+        Calling this function is needed if default_context_cache was not provided to the constructor.
+        Websocket sessions wait until it has finished."""
+        await self.default_context_cache.load_from_config(
+            self.config, profile=startup_profile
+        )
+        startup_profile.mark_ready()
+        logger.info(startup_profile.waterfall())
+        startup_profile.warm_deferred_imports()
 
     @staticmethod
     def clean_cache():
@@ -1,7 +1,8 @@
 import os
 import json
 import asyncio
-from typing import Callable
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Set
 from loguru import logger
 from fastapi import WebSocket
 
@@ -23,6 +24,8 @@ from .asr.asr_factory import ASRFactory
 from .tts.tts_factory import TTSFactory
 from .vad.vad_factory import VADFactory
 from .agent.agent_factory import AgentFactory
+from .engine_registry import engine_registry
+from .utils.startup_profile import StartupProfile
 
 from .config_manager import (
     Config,
@@ -53,6 +56,12 @@ class ServiceContext:
         # translate_engine can be none if translation is disabled
         self.vad_engine: VADInterface | None = None
         self.translate_engine = None  # Add translate_engine attribute
+        # What is loaded, tracked here so the caller's config objects are never modified
+        self._live2d_model_name: str | None = None
+        # Registry keys of the asr/tts engines this context holds a reference on
+        self._engine_keys: Dict[str, str] = {}
+        # VAD keeps per-stream state, so every context builds its own
+        self._vad_key: str | None = None
 
         self.mcp_server_registery: ServerRegistry | None = None
         self.tool_adapter: ToolAdapter | None = None
@@ -91,13 +100,15 @@ class ServiceContext:
 
     # ==== Initializers
 
-    async def _init_mcp_components(self, use_mcpp, enabled_servers):
+    async def _init_mcp_components(self, use_mcpp, enabled_servers, max_parallel_tools=4):
         """Initializes MCP components based on configuration, dynamically fetching tool info."""
         logger.debug(
             f"Initializing MCP components: use_mcpp={use_mcpp}, enabled_servers={enabled_servers}"
         )
 
-        # Reset MCP components first
+        # Reset MCP components first, releasing the previous client's pooled sessions
+        if self.mcp_client:
+            await self.mcp_client.aclose()
         self.mcp_server_registery = None
         self.tool_manager = None
         self.mcp_client = None
@@ -124,23 +135,18 @@ class ServiceContext:
                 try:
                     logger.info(f"🔄 Attempting MCP tool construction (attempt {attempt + 1}/{max_retries})...")
                     
-                    (
-                        mcp_prompt_string,
-                        openai_tools,
-                        claude_tools,
-                    ) = await self.tool_adapter.get_tools(enabled_servers)
-                    
-                    # Get raw tools dict in same call to ensure consistency
-                    _, raw_tools_dict = await self.tool_adapter.get_server_and_tool_info(
-                        enabled_servers
-                    )
+                    # Discovery runs once per process (cached on disk across restarts)
+                    discovered = await self.tool_adapter.discover(enabled_servers)
+                    openai_tools = discovered.openai_tools
+                    claude_tools = discovered.claude_tools
+                    raw_tools_dict = discovered.tools
                     
                     # Validate that we actually got tools
                     if not raw_tools_dict:
                         raise ValueError("No tools retrieved from MCP servers")
                     
                     # Store the generated prompt string
-                    self.mcp_prompt = mcp_prompt_string
+                    self.mcp_prompt = discovered.mcp_prompt
                     logger.info(
                         f"✅ Dynamically generated MCP prompt string (length: {len(self.mcp_prompt)})."
                     )
@@ -188,7 +194,11 @@ class ServiceContext:
 
             # 5. Initialize ToolExecutor
             if self.mcp_client and self.tool_manager:
-                self.tool_executor = ToolExecutor(self.mcp_client, self.tool_manager)
+                self.tool_executor = ToolExecutor(
+                    self.mcp_client,
+                    self.tool_manager,
+                    max_parallel_tools=max_parallel_tools or 1,
+                )
                 logger.info("ToolExecutor initialized for this session.")
             else:
                 logger.warning(
@@ -198,16 +208,18 @@ class ServiceContext:
 
             logger.info("StreamJSONDetector initialized for this session.")
 
-            # 6. Warm up MCP servers (optional best-effort): list tools to establish sessions
+            # 6. Warm up MCP servers (optional best-effort): open the pooled sessions
             try:
                 if self.mcp_client and enabled_servers:
-                    # Warm up commonly used servers (e.g., laundry-assistant)
-                    for server_name in enabled_servers:
+                    # Warm up commonly used servers (e.g., laundry-assistant), all at once
+                    async def warm_up(server_name: str) -> None:
                         try:
-                            await self.mcp_client.list_tools(server_name)
+                            await self.mcp_client.connect(server_name)
                             logger.debug(f"MCP warm-up completed for server '{server_name}'.")
                         except Exception as warm_err:
                             logger.warning(f"MCP warm-up failed for '{server_name}': {warm_err}")
+
+                    await asyncio.gather(*(warm_up(name) for name in enabled_servers))
             except Exception as warm_outer_err:
                 logger.warning(f"MCP warm-up step encountered an error: {warm_outer_err}")
 
@@ -229,8 +241,22 @@ class ServiceContext:
             self.mcp_client = None
         if self.agent_engine and hasattr(self.agent_engine, "close"):
             await self.agent_engine.close()  # Ensure agent resources are also closed
+        self.release_engines()
         logger.info("ServiceContext closed.")
 
+    def release_engines(self) -> None:
+        """Drop this context's references on shared engines."""
+        for key in self._engine_keys.values():
+            engine_registry.release(key)
+        self._engine_keys = {}
+
+    def bind_client(self, send_text: Callable, client_uid: str) -> None:
+        """Bind a context that was built without a client to a websocket client."""
+        self.send_text = send_text
+        self.client_uid = client_uid
+        if self.mcp_client:
+            self.mcp_client.bind_client(send_text, client_uid)
+
     async def load_cache(
         self,
         config: Config,
@@ -259,10 +285,17 @@ class ServiceContext:
         self.system_config = system_config
         self.character_config = character_config
         self.live2d_model = live2d_model
+        self._live2d_model_name = character_config.live2d_model_name if live2d_model else None
         self.asr_engine = asr_engine
         self.tts_engine = tts_engine
         self.vad_engine = vad_engine
         self.agent_engine = agent_engine
+        # Shared engines are referenced, so they outlive the context they came from
+        self.release_engines()
+        for kind, engine in (("asr", asr_engine), ("tts", tts_engine)):
+            key = engine_registry.retain(engine)
+            if key:
+                self._engine_keys[kind] = key
         # Load potentially shared components by reference
         self.mcp_server_registery = mcp_server_registery
         self.tool_adapter = tool_adapter
@@ -270,18 +303,34 @@ class ServiceContext:
         self.client_uid = client_uid
 
         # Initialize session-specific MCP components
-        await self._init_mcp_components(self.character_config.agent_config.agent_settings.basic_memory_agent.use_mcpp, self.character_config.agent_config.agent_settings.basic_memory_agent.mcp_enabled_servers)
+        basic_memory_agent_config = self.character_config.agent_config.agent_settings.basic_memory_agent
+        await self._init_mcp_components(basic_memory_agent_config.use_mcpp, basic_memory_agent_config.mcp_enabled_servers, basic_memory_agent_config.max_parallel_tools)
 
         logger.debug(f"Loaded service context with cache: {character_config}")
 
-    async def load_from_config(self, config: Config) -> None:
+    async def load_from_config(
+        self, config: Config, profile: StartupProfile | None = None
+    ) -> None:
         """
         Load the ServiceContext with the config.
         Reinitialize the instances if the config is different.
 
+        Live2D, ASR, TTS and VAD are independent and load in worker threads
+        while the MCP tools are discovered; the agent needs all of them and
+        is initialized last.
+
         Parameters:
         - config (Dict): The configuration dictionary.
+        - profile (StartupProfile, optional): Records the time per component.
         """
+
+        def track(name: str):
+            return profile.track(name) if profile else nullcontext()
+
+        def timed(name: str, init: Callable, *args) -> None:
+            with track(name):
+                init(*args)
+
         if not self.config:
             self.config = config
 
@@ -293,19 +342,38 @@ class ServiceContext:
 
         # update all sub-configs
 
-        # init live2d from character config
-        self.init_live2d(config.character_config.live2d_model_name)
+        # Initialize shared ToolAdapter if it doesn't exist yet
+        self._ensure_tool_adapter(config)
 
-        # init asr from character config
-        self.init_asr(config.character_config.asr_config)
+        # Initialize MCP Components before initializing Agent
+        basic_memory_agent_config = config.character_config.agent_config.agent_settings.basic_memory_agent
+
+        async def init_mcp() -> None:
+            with track("mcp"):
+                await self._init_mcp_components(basic_memory_agent_config.use_mcpp, basic_memory_agent_config.mcp_enabled_servers, basic_memory_agent_config.max_parallel_tools)
+
+        # init live2d, asr, tts and vad from character config, concurrently with MCP
+        await asyncio.gather(
+            asyncio.to_thread(timed, "live2d", self.init_live2d, config.character_config.live2d_model_name),
+            asyncio.to_thread(timed, "asr", self.init_asr, config.character_config.asr_config),
+            asyncio.to_thread(timed, "tts", self.init_tts, config.character_config.tts_config),
+            asyncio.to_thread(timed, "vad", self.init_vad, config.character_config.vad_config),
+            init_mcp(),
+        )
 
-        # init tts from character config
-        self.init_tts(config.character_config.tts_config)
+        # init agent from character config
+        with track("agent"):
+            await self.init_agent(
+                config.character_config.agent_config,
+                config.character_config.persona_prompt,
+            )
 
-        # init vad from character config
-        self.init_vad(config.character_config.vad_config)
+        # store typed config references
+        self.config = config
+        self.system_config = config.system_config or self.system_config
+        self.character_config = config.character_config
 
-        # Initialize shared ToolAdapter if it doesn't exist yet
+    def _ensure_tool_adapter(self, config: Config) -> None:
         if not self.tool_adapter and config.character_config.agent_config.agent_settings.basic_memory_agent.use_mcpp:
             if not self.mcp_server_registery:
                 logger.info("Initializing shared ServerRegistry within load_from_config.")
@@ -313,57 +381,105 @@ class ServiceContext:
             logger.info("Initializing shared ToolAdapter within load_from_config.")
             self.tool_adapter = ToolAdapter(server_registery=self.mcp_server_registery)
 
-        # Initialize MCP Components before initializing Agent
-        await self._init_mcp_components(config.character_config.agent_config.agent_settings.basic_memory_agent.use_mcpp, config.character_config.agent_config.agent_settings.basic_memory_agent.mcp_enabled_servers)
-
-        # init agent from character config
-        await self.init_agent(
-            config.character_config.agent_config,
-            config.character_config.persona_prompt,
-        )
+    async def apply_config(self, config: Config, subsystems: Set[str]) -> None:
+        """
+        Switch to an updated config, reinitializing only the given subsystems
+        ("live2d", "asr", "tts", "vad", "mcp", "agent"; see config_reload).
+        Everything else is kept as is.
+        """
+        character_config = config.character_config
+        # The agent holds the Live2D model and the MCP tools
+        if subsystems & {"live2d", "mcp"}:
+            subsystems = subsystems | {"agent"}
+
+        engine_inits = []
+        if "live2d" in subsystems:
+            engine_inits.append(asyncio.to_thread(self.init_live2d, character_config.live2d_model_name))
+        if "asr" in subsystems:
+            engine_inits.append(asyncio.to_thread(self.init_asr, character_config.asr_config))
+        if "tts" in subsystems:
+            engine_inits.append(asyncio.to_thread(self.init_tts, character_config.tts_config))
+        if "vad" in subsystems:
+            engine_inits.append(asyncio.to_thread(self.init_vad, character_config.vad_config))
+        await asyncio.gather(*engine_inits)
+
+        if "mcp" in subsystems:
+            self._ensure_tool_adapter(config)
+            basic_memory_agent_config = character_config.agent_config.agent_settings.basic_memory_agent
+            await self._init_mcp_components(basic_memory_agent_config.use_mcpp, basic_memory_agent_config.mcp_enabled_servers, basic_memory_agent_config.max_parallel_tools)
 
-        # store typed config references
         self.config = config
         self.system_config = config.system_config or self.system_config
-        self.character_config = config.character_config
+        self.character_config = character_config
+
+        if "agent" in subsystems:
+            await self.init_agent(
+                character_config.agent_config,
+                character_config.persona_prompt,
+                force=True,
+            )
+            # The new agent starts with the memory of the current history
+            if self.history_uid and hasattr(self.agent_engine, "set_memory_from_history"):
+                await asyncio.to_thread(
+                    self.agent_engine.set_memory_from_history,
+                    character_config.conf_uid,
+                    self.history_uid,
+                )
 
     def init_live2d(self, live2d_model_name: str) -> None:
+        if (
+            self.live2d_model is not None
+            and self._live2d_model_name == live2d_model_name
+        ):
+            logger.info("Live2D already initialized with the same model.")
+            return
         logger.info(f"Initializing Live2D: {live2d_model_name}")
         try:
             self.live2d_model = Live2dModel(live2d_model_name)
-            self.character_config.live2d_model_name = live2d_model_name
+            self._live2d_model_name = live2d_model_name
         except Exception as e:
             logger.critical(f"Error initializing Live2D: {e}")
             logger.critical("Try to proceed without Live2D...")
 
+    def _use_engine(self, kind: str, key: str, factory: Callable[[], Any]) -> Any:
+        """Take the registry's engine for ``key`` and release the one used before."""
+        engine = engine_registry.acquire(key, factory)
+        engine_registry.release(self._engine_keys.get(kind))
+        self._engine_keys[kind] = key
+        return engine
+
     def init_asr(self, asr_config: ASRConfig) -> None:
-        if not self.asr_engine or (self.character_config.asr_config != asr_config):
+        asr_settings = getattr(asr_config, asr_config.asr_model).model_dump()
+        key = engine_registry.key("asr", asr_config.asr_model, asr_settings)
+        if not self.asr_engine or self._engine_keys.get("asr") != key:
             logger.info(f"Initializing ASR: {asr_config.asr_model}")
             try:
-                self.asr_engine = ASRFactory.get_asr_system(
-                    asr_config.asr_model,
-                    **getattr(asr_config, asr_config.asr_model).model_dump(),
+                self.asr_engine = self._use_engine(
+                    "asr",
+                    key,
+                    lambda: ASRFactory.get_asr_system(
+                        asr_config.asr_model, **asr_settings
+                    ),
                 )
-                # saving config should be done after successful initialization
-                self.character_config.asr_config = asr_config
                 logger.info("ASR initialized successfully.")
             except Exception as e:
                 logger.critical(f"Error initializing ASR: {e}")
                 logger.critical("Proceeding without ASR. Speech-to-text features will be disabled.")
                 self.asr_engine = None
-                # Do not update stored config to avoid persisting a broken state
+                engine_registry.release(self._engine_keys.pop("asr", None))
         else:
             logger.info("ASR already initialized with the same config.")
 
     def init_tts(self, tts_config: TTSConfig) -> None:
-        if not self.tts_engine or (self.character_config.tts_config != tts_config):
+        tts_settings = getattr(tts_config, tts_config.tts_model.lower()).model_dump()
+        key = engine_registry.key("tts", tts_config.tts_model, tts_settings)
+        if not self.tts_engine or self._engine_keys.get("tts") != key:
             logger.info(f"Initializing TTS: {tts_config.tts_model}")
-            self.tts_engine = TTSFactory.get_tts_engine(
-                tts_config.tts_model,
-                **getattr(tts_config, tts_config.tts_model.lower()).model_dump(),
+            self.tts_engine = self._use_engine(
+                "tts",
+                key,
+                lambda: TTSFactory.get_tts_engine(tts_config.tts_model, **tts_settings),
             )
-            # saving config should be done after successful initialization
-            self.character_config.tts_config = tts_config
         else:
             logger.info("TTS already initialized with the same config.")
 
@@ -371,25 +487,29 @@ class ServiceContext:
         if vad_config.vad_model is None:
             logger.info("VAD is disabled.")
             self.vad_engine = None
+            self._vad_key = None
             return
-            
-        if not self.vad_engine or (self.character_config.vad_config != vad_config):
+
+        vad_settings = getattr(vad_config, vad_config.vad_model.lower()).model_dump()
+        key = engine_registry.key("vad", vad_config.vad_model, vad_settings)
+        if not self.vad_engine or self._vad_key != key:
             logger.info(f"Initializing VAD: {vad_config.vad_model}")
-            self.vad_engine = VADFactory.get_vad_engine(
-                vad_config.vad_model,
-                **getattr(vad_config, vad_config.vad_model.lower()).model_dump(),
-            )
-            # saving config should be done after successful initialization
-            self.character_config.vad_config = vad_config
+            # Not taken from the engine registry: the detection state and the
+            # Silero model's recurrent state belong to one audio stream
+            self.vad_engine = VADFactory.get_vad_engine(vad_config.vad_model, **vad_settings)
+            self._vad_key = key
         else:
             logger.info("VAD already initialized with the same config.")
 
-    async def init_agent(self, agent_config: AgentConfig, persona_prompt: str) -> None:
+    async def init_agent(
+        self, agent_config: AgentConfig, persona_prompt: str, force: bool = False
+    ) -> None:
         """Initialize or update the LLM engine based on agent configuration."""
         logger.info(f"Initializing Agent: {agent_config.conversation_agent_choice}")
 
         if (
-            self.agent_engine is not None
+            not force
+            and self.agent_engine is not None
             and agent_config == self.character_config.agent_config
             and persona_prompt == self.character_config.persona_prompt
         ):
@@ -419,8 +539,6 @@ class ServiceContext:
             logger.debug(f"Agent choice: {agent_config.conversation_agent_choice}")
             logger.debug(f"System prompt: {system_prompt}")
 
-            # Save the current configuration
-            self.character_config.agent_config = agent_config
             self.system_prompt = system_prompt
 
         except Exception as e:
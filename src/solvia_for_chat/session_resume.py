@@ -0,0 +1,223 @@
+"""
+Resumable websocket sessions.
+
+Every connection gets a ``ResumableChannel`` that all of its senders use (the
+conversation task, the TTS payload queue, the MCP client, group broadcasts)
+and a resume token sent to the client as ``{"type": "resume-token"}``. When
+the websocket drops, the session is parked instead of torn down: the
+``ServiceContext``, conversation task and TTS queue keep running and whatever
+they send is buffered by the channel. If the client reconnects to
+``/client-ws?resume_token=<token>`` within ``grace_period`` seconds, the new
+websocket is attached to the parked channel, the buffered payloads are
+delivered in order and the session continues under its old client_uid.
+Otherwise the session is torn down as before.
+
+Configured by ``system_config.session_resume``; ``grace_period: 0`` disables
+parking.
+"""
+
+import asyncio
+import json
+import secrets
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from fastapi import WebSocket
+from loguru import logger
+
+
+class ResumableChannel:
+    """Sends to the client's current websocket, buffering while it is detached"""
+
+    def __init__(self, websocket: WebSocket, max_buffered: int = 200) -> None:
+        # The websocket currently owning the session, even while sends are buffered
+        self.websocket = websocket
+        self._detached = False
+        self._buffer: Deque[str] = deque()
+        self.max_buffered = max_buffered
+        self._lock = asyncio.Lock()
+        self.dropped = 0
+
+    @property
+    def attached(self) -> bool:
+        return not self._detached
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    async def send_text(self, text: str) -> None:
+        async with self._lock:
+            if not self._detached:
+                try:
+                    await self.websocket.send_text(text)
+                    return
+                except Exception as e:
+                    logger.info(f"Websocket send failed, buffering until resume: {e}")
+                    self._detached = True
+            self._buffer.append(text)
+            if len(self._buffer) > self.max_buffered:
+                self._buffer.popleft()
+                self.dropped += 1
+
+    async def send_json(self, data: Any) -> None:
+        await self.send_text(json.dumps(data))
+
+    def detach(self) -> None:
+        self._detached = True
+
+    def replace(self, websocket: WebSocket) -> WebSocket:
+        """Hand the session to a new websocket, buffering until it is attached"""
+        old, self.websocket = self.websocket, websocket
+        self._detached = True
+        return old
+
+    async def attach(self, websocket: WebSocket) -> int:
+        """
+        Deliver the buffered messages to ``websocket`` and send through it from now on.
+
+        Returns:
+            int: Number of buffered messages delivered
+        """
+        async with self._lock:
+            delivered = 0
+            while self._buffer:
+                # Only dropped from the buffer once sent, so a failed resume loses nothing
+                await websocket.send_text(self._buffer[0])
+                self._buffer.popleft()
+                delivered += 1
+            self.websocket = websocket
+            self._detached = False
+        return delivered
+
+
+@dataclass
+class ParkedSession:
+    """A disconnected session waiting for its client to resume it"""
+
+    client_uid: str
+    channel: ResumableChannel
+    parked_at: float
+    on_expire: Callable[[], Awaitable[None]]
+    expiry: Optional[asyncio.TimerHandle] = None
+
+
+class SessionResumer:
+    """Resume tokens and parked sessions"""
+
+    def __init__(self) -> None:
+        self.grace_period = 30.0
+        self.max_buffered = 200
+        self._tokens: Dict[str, str] = {}  # token -> client_uid
+        self._client_tokens: Dict[str, str] = {}  # client_uid -> token
+        self._parked: Dict[str, ParkedSession] = {}
+        self._expiring: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {
+            "parked": 0,
+            "resumed": 0,
+            "taken_over": 0,
+            "expired": 0,
+            "rejected": 0,
+            "replayed_messages": 0,
+        }
+
+    def configure(
+        self,
+        grace_period: Optional[float] = None,
+        max_buffered_messages: Optional[int] = None,
+    ) -> None:
+        if grace_period is not None:
+            self.grace_period = max(0.0, grace_period)
+        if max_buffered_messages is not None:
+            self.max_buffered = max(0, max_buffered_messages)
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_period > 0
+
+    def issue_token(self, client_uid: str) -> str:
+        """A new resume token for the client, replacing its previous one"""
+        self.revoke(client_uid)
+        token = secrets.token_urlsafe(24)
+        self._tokens[token] = client_uid
+        self._client_tokens[client_uid] = token
+        return token
+
+    def revoke(self, client_uid: str) -> None:
+        token = self._client_tokens.pop(client_uid, None)
+        if token:
+            self._tokens.pop(token, None)
+
+    def park(
+        self,
+        client_uid: str,
+        channel: ResumableChannel,
+        on_expire: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Keep a session for ``grace_period`` seconds, then call ``on_expire``"""
+        channel.detach()
+        parked = ParkedSession(client_uid, channel, time.monotonic(), on_expire)
+        parked.expiry = asyncio.get_running_loop().call_later(
+            self.grace_period, self._expire, client_uid
+        )
+        self._parked[client_uid] = parked
+        self.stats["parked"] += 1
+        logger.info(
+            f"Session {client_uid} parked for {self.grace_period:.0f}s awaiting resume"
+        )
+
+    def client_for(self, token: str) -> Optional[str]:
+        """The client uid of a valid token"""
+        client_uid = self._tokens.get(token)
+        if client_uid is None:
+            self.stats["rejected"] += 1
+        return client_uid
+
+    def resume(self, client_uid: str) -> Optional[ParkedSession]:
+        """Take a session out of the parked ones, None if it is not parked"""
+        parked = self._parked.pop(client_uid, None)
+        if parked is not None:
+            parked.expiry.cancel()
+        return parked
+
+    def note_resumed(self, replayed: int, taken_over: bool = False) -> None:
+        self.stats["resumed"] += 1
+        self.stats["replayed_messages"] += replayed
+        if taken_over:
+            self.stats["taken_over"] += 1
+
+    async def close(self) -> None:
+        """Expire every parked session now"""
+        for client_uid, parked in list(self._parked.items()):
+            parked.expiry.cancel()
+            self._expire(client_uid)
+        if self._expiring:
+            await asyncio.gather(*self._expiring.values(), return_exceptions=True)
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "grace_period": self.grace_period,
+            "sessions": {
+                client_uid: {
+                    "parked_for_s": round(now - parked.parked_at, 1),
+                    "buffered_messages": parked.channel.buffered,
+                    "dropped_messages": parked.channel.dropped,
+                }
+                for client_uid, parked in self._parked.items()
+            },
+        }
+
+    def _expire(self, client_uid: str) -> None:
+        parked = self._parked.pop(client_uid, None)
+        if parked is None:
+            return
+        self.revoke(client_uid)
+        self.stats["expired"] += 1
+        logger.info(f"Session {client_uid} was not resumed in time, tearing it down")
+        task = asyncio.create_task(parked.on_expire())
+        self._expiring[client_uid] = task
+        task.add_done_callback(lambda _: self._expiring.pop(client_uid, None))
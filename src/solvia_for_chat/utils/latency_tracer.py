@@ -0,0 +1,351 @@
+"""
+Per-turn latency tracing for the conversation pipeline.
+
+Each conversation turn gets a ``TurnTrace`` that records spans for the stages
+of the pipeline (ASR decode, wake-word check, LLM streaming, TTS synthesis,
+payload building, WebSocket sends and the frontend playback wait). The active
+trace is carried in a ``ContextVar`` so that tasks spawned during the turn
+(e.g. TTS tasks) record into the same trace without threading it through every
+function signature.
+
+Finished traces can be exported in the Chrome trace event format (open them in
+``chrome://tracing`` or Perfetto) and are aggregated into percentiles by the
+module-level ``trace_aggregator``.
+"""
+
+import time
+import uuid
+from collections import deque
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclass
+class TraceSpan:
+    """A timed section of a turn"""
+
+    name: str
+    start: float  # time.perf_counter() seconds
+    end: Optional[float] = None
+    track: str = "turn"
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end is None:
+            return 0.0
+        return (self.end - self.start) * 1000
+
+
+@dataclass
+class TraceMark:
+    """An instant event inside a turn"""
+
+    name: str
+    at: float  # time.perf_counter() seconds
+    track: str = "turn"
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class TurnTrace:
+    """Collects spans and marks for a single conversation turn"""
+
+    def __init__(self, client_uid: str, kind: str = "single") -> None:
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.client_uid = client_uid
+        self.kind = kind
+        self.wall_start = time.time()
+        self._t0 = time.perf_counter()
+        self._t_end: Optional[float] = None
+        self.spans: List[TraceSpan] = []
+        self.marks: List[TraceMark] = []
+        self._context_token = None
+
+    def begin(self, name: str, track: str = "turn", **args: Any) -> TraceSpan:
+        span = TraceSpan(name=name, start=time.perf_counter(), track=track, args=args)
+        self.spans.append(span)
+        return span
+
+    def end(self, span: TraceSpan, **args: Any) -> None:
+        span.end = time.perf_counter()
+        span.args.update(args)
+
+    @contextmanager
+    def span(self, name: str, track: str = "turn", **args: Any) -> Iterator[TraceSpan]:
+        """Context manager recording the enclosed block as a span"""
+        span = self.begin(name, track, **args)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def mark(self, name: str, track: str = "turn", **args: Any) -> None:
+        self.marks.append(
+            TraceMark(name=name, at=time.perf_counter(), track=track, args=args)
+        )
+
+    def first_mark(self, name: str) -> Optional[TraceMark]:
+        return next((m for m in self.marks if m.name == name), None)
+
+    def has_mark(self, name: str) -> bool:
+        return self.first_mark(name) is not None
+
+    def finish(self) -> None:
+        now = time.perf_counter()
+        self._t_end = now
+        # Close spans left open by cancellation so durations stay meaningful
+        for span in self.spans:
+            if span.end is None:
+                span.end = now
+                span.args.setdefault("aborted", True)
+
+    @property
+    def total_ms(self) -> float:
+        end = self._t_end if self._t_end is not None else time.perf_counter()
+        return (end - self._t0) * 1000
+
+    def summary(self) -> Dict[str, List[float]]:
+        """
+        Reduce the trace into metric samples.
+
+        Returns:
+            Dict[str, List[float]]: Metric name -> samples (ms unless the
+            metric name says otherwise). Stages that run once per sentence
+            (TTS synthesis, payload build, send) contribute one sample each.
+        """
+        samples: Dict[str, List[float]] = {"turn_total_ms": [self.total_ms]}
+        for span in self.spans:
+            samples.setdefault(f"{span.name}_ms", []).append(span.duration_ms)
+            if span.name == "llm":
+                for key in ("ttft_ms", "tokens_per_sec"):
+                    if key in span.args:
+                        samples.setdefault(f"llm_{key}", []).append(span.args[key])
+
+        for name in ("first_sentence", "first_audio_sent"):
+            mark = self.first_mark(name)
+            if mark:
+                samples[f"{name}_ms"] = [(mark.at - self._t0) * 1000]
+        return samples
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Export the trace in the Chrome trace event format"""
+        tids: Dict[str, int] = {}
+
+        def tid_for(track: str) -> int:
+            if track not in tids:
+                tids[track] = len(tids) + 1
+            return tids[track]
+
+        def ts(t: float) -> float:
+            return round((t - self._t0) * 1_000_000, 1)
+
+        events: List[Dict[str, Any]] = []
+        for span in self.spans:
+            end = span.end if span.end is not None else time.perf_counter()
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": self.kind,
+                    "ph": "X",
+                    "ts": ts(span.start),
+                    "dur": round((end - span.start) * 1_000_000, 1),
+                    "pid": 1,
+                    "tid": tid_for(span.track),
+                    "args": span.args,
+                }
+            )
+        for mark in self.marks:
+            events.append(
+                {
+                    "name": mark.name,
+                    "cat": self.kind,
+                    "ph": "i",
+                    "s": "t",
+                    "ts": ts(mark.at),
+                    "pid": 1,
+                    "tid": tid_for(mark.track),
+                    "args": mark.args,
+                }
+            )
+        for track, tid in tids.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"name": track},
+                }
+            )
+
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "turn_id": self.turn_id,
+                "client_uid": self.client_uid,
+                "kind": self.kind,
+                "wall_start": self.wall_start,
+            },
+        }
+
+
+class TraceAggregator:
+    """Keeps recent traces and rolling metric samples for percentile reports"""
+
+    def __init__(self, max_traces: int = 50, max_samples: int = 1000) -> None:
+        self._traces: Deque[TurnTrace] = deque(maxlen=max_traces)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._max_samples = max_samples
+
+    def record(self, trace: TurnTrace) -> None:
+        self._traces.append(trace)
+        for metric, values in trace.summary().items():
+            bucket = self._samples.setdefault(metric, deque(maxlen=self._max_samples))
+            bucket.extend(values)
+
+    def get_trace(self, turn_id: str) -> Optional[TurnTrace]:
+        return next((t for t in self._traces if t.turn_id == turn_id), None)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "turn_id": t.turn_id,
+                "client_uid": t.client_uid,
+                "kind": t.kind,
+                "wall_start": t.wall_start,
+                "total_ms": round(t.total_ms, 1),
+            }
+            for t in reversed(self._traces)
+        ]
+
+    def percentiles(
+        self, quantiles: Tuple[int, ...] = (50, 90, 99)
+    ) -> Dict[str, Dict[str, float]]:
+        """Nearest-rank percentiles for every metric seen so far"""
+        report: Dict[str, Dict[str, float]] = {}
+        for metric, values in self._samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            stats = {"count": len(ordered)}
+            for q in quantiles:
+                rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+                stats[f"p{q}"] = round(ordered[rank], 2)
+            report[metric] = stats
+        return report
+
+    def reset(self) -> None:
+        self._traces.clear()
+        self._samples.clear()
+
+
+_current_trace: ContextVar[Optional[TurnTrace]] = ContextVar(
+    "current_turn_trace", default=None
+)
+
+trace_aggregator = TraceAggregator()
+
+
+def current_trace() -> Optional[TurnTrace]:
+    """Return the trace of the turn running in the current context, if any"""
+    return _current_trace.get()
+
+
+def start_turn_trace(client_uid: str, kind: str = "single") -> TurnTrace:
+    """
+    Open a trace for a conversation turn and make it current for the calling
+    context (and any task created from it). Pair with ``finish_turn_trace``.
+    """
+    trace = TurnTrace(client_uid=client_uid, kind=kind)
+    trace._context_token = _current_trace.set(trace)
+    return trace
+
+
+def finish_turn_trace(trace: TurnTrace, record: bool = True) -> None:
+    """Finish a trace and, unless ``record`` is False, hand it to ``trace_aggregator``"""
+    token = getattr(trace, "_context_token", None)
+    if token is not None:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # Finished from a different context than it was started in; that
+            # context may be running another turn, only clear our own trace
+            if _current_trace.get() is trace:
+                _current_trace.set(None)
+        trace._context_token = None
+    trace.finish()
+    if not record:
+        return
+    trace_aggregator.record(trace)
+    summary = {k: round(v[0], 1) for k, v in trace.summary().items() if len(v) == 1}
+    logger.info(f"⏱️ Turn {trace.turn_id} latency: {summary}")
+
+
+@contextmanager
+def turn_trace(client_uid: str, kind: str = "single") -> Iterator[TurnTrace]:
+    """Context-manager form of ``start_turn_trace``/``finish_turn_trace``"""
+    trace = start_turn_trace(client_uid, kind)
+    try:
+        yield trace
+    finally:
+        finish_turn_trace(trace)
+
+
+@contextmanager
+def trace_span(name: str, track: str = "turn", **args: Any) -> Iterator[Optional[TraceSpan]]:
+    """Record a span on the current trace; a no-op outside of a traced turn"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, track, **args) as span:
+        yield span
+
+
+def trace_mark(name: str, track: str = "turn", once: bool = False, **args: Any) -> None:
+    """Record an instant event on the current trace, if any"""
+    trace = _current_trace.get()
+    if trace is None or (once and trace.has_mark(name)):
+        return
+    trace.mark(name, track, **args)
+
+
+async def traced_llm_stream(
+    stream: AsyncIterator[Any],
+) -> AsyncIterator[Any]:
+    """
+    Pass an LLM token stream through unchanged while recording an ``llm`` span
+    with time-to-first-token and tokens/sec (one streamed text chunk is
+    counted as one token).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        async with aclosing(stream):
+            async for item in stream:
+                yield item
+        return
+
+    span = trace.begin("llm", track="llm")
+    first_token_at: Optional[float] = None
+    tokens = 0
+    try:
+        async with aclosing(stream):
+            async for item in stream:
+                if isinstance(item, str) and item:
+                    tokens += 1
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        trace.mark("llm_first_token", track="llm")
+                yield item
+    finally:
+        trace.end(span, tokens=tokens)
+        if first_token_at is not None:
+            span.args["ttft_ms"] = round((first_token_at - span.start) * 1000, 2)
+            gen_time = span.end - first_token_at
+            if gen_time > 0 and tokens > 1:
+                span.args["tokens_per_sec"] = round((tokens - 1) / gen_time, 2)
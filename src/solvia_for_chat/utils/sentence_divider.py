@@ -1,11 +1,14 @@
 import re
-from typing import List, Tuple, AsyncIterator, Optional, Union, Dict, Any
-import pysbd
+from contextlib import aclosing
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Tuple, AsyncIterator, Optional, Union, Dict, Any
 from loguru import logger
-from langdetect import detect
 from enum import Enum
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    import pysbd
+
 # Constants for additional checks
 COMMAS = [
     ",",
@@ -73,19 +76,65 @@ SUPPORTED_LANGUAGES = {
 }
 
 
+_KANA_PATTERN = re.compile(r"[\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f]")
+_HAN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def detect_script_language(text: str) -> Optional[str]:
+    """
+    Cheap script-based detection for the languages this project mostly sees.
+    Kana means Japanese, Han without kana means Chinese and letters that are
+    all ASCII mean English. Returns None when the script is inconclusive.
+    """
+    if _KANA_PATTERN.search(text):
+        return "ja"
+    if _HAN_PATTERN.search(text):
+        return "zh"
+    has_letter = False
+    for ch in text:
+        if ch.isalpha():
+            if not ch.isascii():
+                return None
+            has_letter = True
+    return "en" if has_letter else None
+
+
 def detect_language(text: str) -> str:
     """
     Detect text language and check if it's supported by pysbd.
-    Returns None for unsupported languages.
+    Tries the script-based detector first and only falls back to langdetect
+    when the script is inconclusive. Returns None for unsupported languages.
     """
+    lang = detect_script_language(text)
+    if lang is not None:
+        return lang
     try:
-        detected = detect(text)
+        detected = _langdetect()(text)
         return detected if detected in SUPPORTED_LANGUAGES else None
     except Exception as e:
         logger.debug(f"Language detection failed, language not supported by pysdb: {e}")
         return None
 
 
+@lru_cache(maxsize=None)
+def _langdetect():
+    """langdetect's detect(), imported on first use to keep it out of server startup"""
+    from langdetect import DetectorFactory, detect
+
+    # langdetect is nondeterministic unless seeded
+    DetectorFactory.seed = 0
+    return detect
+
+
+@lru_cache(maxsize=None)
+def get_segmenter(lang: str) -> "pysbd.Segmenter":
+    """Return the shared pysbd segmenter for a language, building it on first use"""
+    import pysbd
+
+    return pysbd.Segmenter(language=lang, clean=False)
+
+
 def is_complete_sentence(text: str) -> bool:
     """
     Check if text ends with sentence-ending punctuation and not abbreviation.
@@ -189,23 +238,27 @@ def segment_text_by_regex(text: str) -> Tuple[List[str], str]:
 
     # Create pattern for matching sentences ending with any end punctuation
     escaped_punctuations = [re.escape(p) for p in END_PUNCTUATIONS]
-    pattern = r"(.*?(?:[" + "|".join(escaped_punctuations) + r"]))"
+    pattern = re.compile(r"(.*?(?:[" + "|".join(escaped_punctuations) + r"]))")
 
+    # Where to look for the next end punctuation; past abbreviations that
+    # do not end the sentence
+    search_from = 0
     while remaining_text:
-        match = re.search(pattern, remaining_text)
+        match = pattern.search(remaining_text, search_from)
         if not match:
             break
 
         end_pos = match.end(1)
         potential_sentence = remaining_text[:end_pos].strip()
 
-        # Skip if sentence ends with abbreviation
+        # An abbreviation does not end the sentence, it stays part of it
         if any(potential_sentence.endswith(abbrev) for abbrev in ABBREVIATIONS):
-            remaining_text = remaining_text[end_pos:].lstrip()
+            search_from = end_pos
             continue
 
         complete_sentences.append(potential_sentence)
         remaining_text = remaining_text[end_pos:].lstrip()
+        search_from = 0
 
     return complete_sentences, remaining_text
 
@@ -230,12 +283,23 @@ def segment_text_by_pysbd(text: str) -> Tuple[List[str], str]:
 
         if lang is not None:
             # Use pysbd for supported languages
-            segmenter = pysbd.Segmenter(language=lang, clean=False)
-            sentences = segmenter.segment(text)
+            sentences = get_segmenter(lang).segment(text)
 
             if not sentences:
                 return [], text
 
+            # pysbd may drop characters at the end (e.g. the "!!" of "Ok.!!");
+            # find where the last sentence starts and ends in the text, so
+            # whatever follows it is kept as remaining text
+            last_start = end = 0
+            for sent in sentences:
+                sent = sent.strip()
+                found = text.find(sent, end)
+                if found == -1:
+                    return segment_text_by_regex(text)
+                last_start, end = found, found + len(sent)
+            tail = text[end:].strip()
+
             # Process all but the last sentence
             complete_sentences = []
             for sent in sentences[:-1]:
@@ -247,9 +311,9 @@ def segment_text_by_pysbd(text: str) -> Tuple[List[str], str]:
             last_sent = sentences[-1].strip()
             if is_complete_sentence(last_sent):
                 complete_sentences.append(last_sent)
-                remaining = ""
+                remaining = tail
             else:
-                remaining = last_sent
+                remaining = text[last_start:].strip()
 
         else:
             # Use regex for unsupported languages
@@ -321,6 +385,36 @@ class SentenceDivider:
         # Replace active_tags dict with a stack to handle nesting
         self._tag_stack = []
 
+        # One scanner for every tag form: group 1 is "/" for closing tags,
+        # group 2 the closing tag name, group 3 the opening or self-closing
+        # tag name and group 4 "/" for self-closing tags.
+        names = "|".join(
+            re.escape(tag) for tag in sorted(self.valid_tags, key=len, reverse=True)
+        )
+        tags_alt = f"<(?:(/)({names})|({names})(/?))>"
+        self._tag_pattern = re.compile(tags_alt)
+        # Buffer position before which no tag can start
+        self._tag_scan_pos = 0
+
+        # Incremental scanning: only text appended since the last scan is
+        # checked for boundaries (tags, end punctuation, first-sentence
+        # commas). The lookback covers a boundary split across tokens.
+        self._lookback = max(len(f"<{tag}/>") for tag in self.valid_tags) - 1
+        end_class = "".join(re.escape(p) for p in END_PUNCTUATIONS if len(p) == 1)
+        comma_class = "".join(re.escape(c) for c in COMMAS)
+        self._boundary_pattern = re.compile(f"{tags_alt}|[{end_class}]")
+        self._first_boundary_pattern = re.compile(f"{tags_alt}|[{end_class}{comma_class}]")
+        self._end_pattern = re.compile(f"[{end_class}]")
+        self._scan_pos = 0
+        # End punctuation the segmenter did not split at yet (e.g. "Mr."). The
+        # segmenter decides on it by looking at the next word, so the buffer
+        # is segmented once more when that word starts.
+        self._unresolved_pos: Optional[int] = None
+        self._lookahead_done_pos: Optional[int] = None
+        # Buffer position before which the segmenter found no sentence end, so
+        # a long unfinished sentence is not segmented from its start again
+        self._segment_from = 0
+
     def _get_current_tags(self) -> List[TagInfo]:
         """
         Get all current active tags from outermost to innermost.
@@ -339,56 +433,55 @@ class SentenceDivider:
         """
         return self._tag_stack[-1] if self._tag_stack else None
 
-    def _extract_tag(self, text: str) -> Tuple[Optional[TagInfo], str]:
+    def _find_next_tag(self) -> Optional[re.Match]:
+        """
+        Find the first tag in the buffer. Text already known to be tag-free is
+        not searched again; the lookback catches a tag whose start arrived in
+        an earlier token.
+        """
+        start = max(0, self._tag_scan_pos - self._lookback)
+        match = self._tag_pattern.search(self._buffer, start)
+        self._tag_scan_pos = match.start() if match else len(self._buffer)
+        return match
+
+    def _set_buffer(self, remaining: str) -> None:
+        """
+        Replace the buffer with the unprocessed rest of it, keeping the tag
+        scan position. ``remaining`` is a (possibly stripped) slice of the
+        buffer, so shifting by the removed length never skips unscanned text.
+        """
+        removed = len(self._buffer) - len(remaining)
+        self._tag_scan_pos = max(0, self._tag_scan_pos - removed)
+        self._segment_from = 0
+        self._buffer = remaining
+
+    def _extract_tag(
+        self, text: str, match: Optional[re.Match] = None
+    ) -> Tuple[Optional[TagInfo], str]:
         """
         Extract the first tag from text if present.
         Handles nested tags by maintaining a tag stack.
 
         Args:
             text: Text to check for tags
+            match: Scanner match for the first tag in text, if already known
 
         Returns:
             Tuple of (TagInfo if tag found else None, remaining text)
         """
-        # Find the first occurrence of any tag
-        first_tag = None
-        first_pos = len(text)
-        tag_type = None
-        matched_tag = None
-
-        # Check for self-closing tags
-        for tag in self.valid_tags:
-            pattern = f"<{tag}/>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.SELF_CLOSING
-                matched_tag = tag
-
-        # Check for opening tags
-        for tag in self.valid_tags:
-            pattern = f"<{tag}>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.START
-                matched_tag = tag
-
-        # Check for closing tags
-        for tag in self.valid_tags:
-            pattern = f"</{tag}>"
-            match = re.search(pattern, text)
-            if match and match.start() < first_pos:
-                first_pos = match.start()
-                first_tag = match
-                tag_type = TagState.END
-                matched_tag = tag
-
-        if not first_tag:
+        if match is None:
+            match = self._tag_pattern.search(text)
+        if not match:
             return None, text
 
+        closing, closing_name, opening_name, self_closing = match.groups()
+        if closing:
+            matched_tag, tag_type = closing_name, TagState.END
+        elif self_closing:
+            matched_tag, tag_type = opening_name, TagState.SELF_CLOSING
+        else:
+            matched_tag, tag_type = opening_name, TagState.START
+
         # Handle the found tag
         if tag_type == TagState.START:
             # Push new tag onto stack
@@ -400,14 +493,90 @@ class SentenceDivider:
             else:
                 self._tag_stack.pop()
 
-        return (TagInfo(matched_tag, tag_type), text[first_tag.end() :].lstrip())
+        return (TagInfo(matched_tag, tag_type), text[match.end() :].lstrip())
 
-    async def _process_buffer(self) -> AsyncIterator[SentenceWithTags]:
+    def _has_new_boundary(self) -> bool:
+        """
+        Check whether the text appended since the last scan can produce a
+        sentence or tag, so unchanged buffers are not segmented again on every
+        token.
+        """
+        start = max(0, self._scan_pos - self._lookback)
+        self._scan_pos = len(self._buffer)
+        pattern = (
+            self._first_boundary_pattern
+            if self._is_first_sentence and self.faster_first_response
+            else self._boundary_pattern
+        )
+        if pattern.search(self._buffer, start):
+            return True
+        if self._unresolved_pos is not None and re.search(
+            r"\s\S", self._buffer[self._unresolved_pos :]
+        ):
+            self._lookahead_done_pos = self._unresolved_pos
+            self._unresolved_pos = None
+            return True
+        return False
+
+    def _update_scan_state(self, consumed: bool, scan_from: int) -> None:
+        """
+        Record how far the buffer has been scanned after processing it. Unless
+        the buffer was consumed, only the text from ``scan_from`` is searched
+        for new end punctuation.
+        """
+        self._scan_pos = len(self._buffer)
+        if consumed:
+            self._lookahead_done_pos = None
+            self._unresolved_pos = None
+            scan_from = 0
+        last_end = None
+        for last_end in self._end_pattern.finditer(self._buffer, scan_from):
+            pass
+        if last_end is not None:
+            self._unresolved_pos = (
+                last_end.end() if last_end.end() != self._lookahead_done_pos else None
+            )
+
+    def _segment_buffer(self) -> Tuple[List[str], str]:
+        """
+        Segment the buffer from ``_segment_from``, the head before it being
+        part of the first sentence. When no sentence ends, the window moves up
+        to the word before the last end punctuation, which the segmenter
+        still needs as context.
+        """
+        start = self._segment_from
+        sentences, remaining = self._segment_text(self._buffer[start:])
+        if sentences:
+            if start:
+                sentences[0] = (self._buffer[:start] + sentences[0]).strip()
+            return sentences, remaining
+
+        if self.segment_method == "regex":
+            # Cheap enough to run on the whole buffer
+            return sentences, remaining
+        last_end = None
+        for last_end in self._end_pattern.finditer(self._buffer, start):
+            pass
+        if last_end is not None:
+            words = list(_WORD_PATTERN.finditer(self._buffer, start, last_end.start()))
+            if len(words) >= 2:
+                self._segment_from = words[-2].start()
+        return sentences, remaining
+
+    async def _process_buffer(self, force: bool = False) -> AsyncIterator[SentenceWithTags]:
         """
         Process the current buffer, yielding complete sentences with tags.
         This is now an async generator.
         It consumes processed parts from self._buffer.
+
+        Args:
+            force: Process the whole buffer even if no new boundary arrived
         """
+        scan_from = max(0, self._scan_pos - self._lookback)
+        if not force and not self._has_new_boundary():
+            return
+
+        buffer_len_before = len(self._buffer)
         processed_something = True  # Flag to loop until no more processing can be done
         while processed_something:
             processed_something = False
@@ -417,26 +586,20 @@ class SentenceDivider:
                 break
 
             # Find the next tag position
-            next_tag_pos = len(self._buffer)
-            tag_pattern_found = None
-            for tag in self.valid_tags:
-                patterns = [f"<{tag}>", f"</{tag}>", f"<{tag}/>"]
-                for pattern in patterns:
-                    pos = self._buffer.find(pattern)
-                    if pos != -1 and pos < next_tag_pos:
-                        next_tag_pos = pos
-                        tag_pattern_found = pattern  # Store the found pattern
+            tag_match = self._find_next_tag()
+            next_tag_pos = tag_match.start() if tag_match else len(self._buffer)
+            tag_pattern_found = tag_match.group(0) if tag_match else None
 
             if next_tag_pos == 0:
                 # Tag is at the start of buffer
-                tag_info, remaining = self._extract_tag(self._buffer)
+                tag_info, remaining = self._extract_tag(self._buffer, tag_match)
                 if tag_info:
                     processed_text = self._buffer[
                         : len(self._buffer) - len(remaining)
                     ].strip()
                     # Yield the tag itself, represented as a SentenceWithTags
                     yield SentenceWithTags(text=processed_text, tags=[tag_info])
-                    self._buffer = remaining
+                    self._set_buffer(remaining)
                     processed_something = True
                     continue  # Restart processing loop for the remaining buffer
 
@@ -449,7 +612,11 @@ class SentenceDivider:
                 # Process complete sentences in text before tag
                 if contains_end_punctuation(text_before_tag):
                     sentences, remaining_before = self._segment_text(text_before_tag)
-                    for sentence in sentences:
+                    if not sentences:
+                        # Nothing split off (e.g. a lone abbreviation), the tag ends it
+                        remaining_before = text_before_tag
+                    # The text left before the tag is a sentence of its own
+                    for sentence in [*sentences, remaining_before]:
                         if sentence.strip():
                             yield SentenceWithTags(
                                 text=sentence.strip(),
@@ -457,7 +624,7 @@ class SentenceDivider:
                             )
                     # The part consumed includes sentences + what's left before the tag
                     processed_segment = text_before_tag
-                    self._buffer = self._buffer[len(processed_segment) :]
+                    self._set_buffer(self._buffer[len(processed_segment) :])
                     processed_something = True
                     continue  # Restart processing loop
 
@@ -468,19 +635,21 @@ class SentenceDivider:
                         text=text_before_tag.strip(),
                         tags=current_tags or [TagInfo("", TagState.NONE)],
                     )
-                    self._buffer = self._buffer[len(text_before_tag) :]
+                    self._set_buffer(self._buffer[len(text_before_tag) :])
                     processed_something = True
                     continue  # Restart processing loop
                 # --- If no tag found after text_before_tag, we wait for more input or end punctuation ---
 
                 # Process the tag itself if we haven't continued
-                tag_info, remaining_after_tag = self._extract_tag(self._buffer)
+                tag_info, remaining_after_tag = self._extract_tag(
+                    self._buffer, tag_match
+                )
                 if tag_info:
                     processed_tag_text = self._buffer[
                         : len(self._buffer) - len(remaining_after_tag)
                     ].strip()
                     yield SentenceWithTags(text=processed_tag_text, tags=[tag_info])
-                    self._buffer = remaining_after_tag
+                    self._set_buffer(remaining_after_tag)
                     processed_something = True
                     continue  # Restart processing loop
 
@@ -501,16 +670,16 @@ class SentenceDivider:
                             text=sentence.strip(),
                             tags=current_tags or [TagInfo("", TagState.NONE)],
                         )
-                        self._buffer = remaining
+                        self._set_buffer(remaining)
                         self._is_first_sentence = False
                         processed_something = True
                         continue  # Restart processing loop
 
                 # Process normal sentences based on end punctuation
-                if contains_end_punctuation(self._buffer):
-                    sentences, remaining = self._segment_text(self._buffer)
+                if contains_end_punctuation(self._buffer[self._segment_from :]):
+                    sentences, remaining = self._segment_buffer()
                     if sentences:  # Only process if segmentation yielded sentences
-                        self._buffer = remaining
+                        self._set_buffer(remaining)
                         self._is_first_sentence = False
                         processed_something = True
                         for sentence in sentences:
@@ -525,13 +694,17 @@ class SentenceDivider:
             if not processed_something:
                 break
 
+        self._update_scan_state(
+            consumed=len(self._buffer) < buffer_len_before, scan_from=scan_from
+        )
+
     async def _flush_buffer(self) -> AsyncIterator[SentenceWithTags]:
         """
         Process and yield all remaining content in the buffer at the end of the stream.
         """
         logger.debug(f"Flushing remaining buffer: '{self._buffer}'")
         # First, run _process_buffer to yield any standard sentences/tags
-        async for sentence in self._process_buffer():
+        async for sentence in self._process_buffer(force=True):
             yield sentence
 
         # After processing standard structures, if anything is left, yield it as a final fragment
@@ -562,28 +735,29 @@ class SentenceDivider:
         self._full_response = []
         self.reset()  # Ensure state is clean
 
-        async for item in segment_stream:
-            if isinstance(item, dict):
-                # Before yielding the dict, process and yield any complete sentences formed so far
-                async for sentence in self._process_buffer():
-                    self._full_response.append(
-                        sentence.text
-                    )  # Track for complete response
-                    yield sentence
-                # Now yield the dictionary
-                yield item
-            elif isinstance(item, str):
-                self._buffer += item
-                # Process the buffer incrementally as string chunks arrive
-                async for sentence in self._process_buffer():
-                    self._full_response.append(
-                        sentence.text
-                    )  # Track for complete response
-                    yield sentence
-            else:
-                logger.warning(
-                    f"SentenceDivider received unexpected type: {type(item)}"
-                )
+        async with aclosing(segment_stream):
+            async for item in segment_stream:
+                if isinstance(item, dict):
+                    # Before yielding the dict, process and yield any complete sentences formed so far
+                    async for sentence in self._process_buffer():
+                        self._full_response.append(
+                            sentence.text
+                        )  # Track for complete response
+                        yield sentence
+                    # Now yield the dictionary
+                    yield item
+                elif isinstance(item, str):
+                    self._buffer += item
+                    # Process the buffer incrementally as string chunks arrive
+                    async for sentence in self._process_buffer():
+                        self._full_response.append(
+                            sentence.text
+                        )  # Track for complete response
+                        yield sentence
+                else:
+                    logger.warning(
+                        f"SentenceDivider received unexpected type: {type(item)}"
+                    )
 
         # After the stream finishes, flush any remaining text in the buffer
         async for sentence in self._flush_buffer():
@@ -606,3 +780,8 @@ class SentenceDivider:
         self._is_first_sentence = True
         self._buffer = ""
         self._tag_stack = []
+        self._scan_pos = 0
+        self._tag_scan_pos = 0
+        self._unresolved_pos = None
+        self._lookahead_done_pos = None
+        self._segment_from = 0
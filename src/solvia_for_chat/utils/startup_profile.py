@@ -0,0 +1,154 @@
+"""
+Startup profiling and readiness for the server.
+
+The default ``ServiceContext`` loads Live2D, ASR, TTS, VAD and the MCP tools
+concurrently, then the agent. Each component records a span in the module-level
+``startup_profile``, and once startup finishes the spans are logged as a
+waterfall::
+
+    Startup waterfall (total 4.82s)
+      live2d   |#                             |   0.01s    0.04s
+      asr      |################              |   0.02s    2.61s
+      vad      |##########                    |   0.02s    1.70s
+      ...
+
+The HTTP server starts accepting connections right away; websocket sessions
+wait on ``startup_profile.wait_ready()`` until the default context is loaded.
+Heavy modules that are imported on first use (pysbd, langdetect, pydub) are
+imported in the background once the server is ready, so the first turn does
+not pay for them either.
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+# Imported on first use by the conversation pipeline, warmed up after startup
+DEFERRED_IMPORTS = ("pysbd", "langdetect", "pydub")
+
+
+@dataclass
+class StartupSpan:
+    name: str
+    start: float  # seconds since startup began
+    end: Optional[float] = None
+    thread: str = ""
+    error: Optional[str] = None
+
+
+class StartupProfile:
+    """Spans of the startup components and the readiness of the server"""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[StartupSpan] = []
+        self.ready_at: Optional[float] = None
+        self._ready = asyncio.Event()
+
+    def begin(self) -> None:
+        """Start timing from now"""
+        self._origin = time.perf_counter()
+        with self._lock:
+            self.spans = []
+        self.ready_at = None
+        self._ready.clear()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[StartupSpan]:
+        """Time a component; usable from threads"""
+        span = StartupSpan(name, self.elapsed(), thread=threading.current_thread().name)
+        with self._lock:
+            self.spans.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = self.elapsed()
+
+    def mark(self, name: str) -> None:
+        """Record an instant, e.g. the HTTP server starting"""
+        now = self.elapsed()
+        with self._lock:
+            self.spans.append(
+                StartupSpan(name, now, now, thread=threading.current_thread().name)
+            )
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self) -> None:
+        if self.ready_at is None:
+            self.ready_at = self.elapsed()
+        self._ready.set()
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+
+    def warm_deferred_imports(self, modules=DEFERRED_IMPORTS) -> None:
+        """Import modules deferred at startup in a background thread"""
+
+        def warm() -> None:
+            for module in modules:
+                try:
+                    with self.track(f"import {module}"):
+                        importlib.import_module(module)
+                except Exception as e:
+                    logger.debug(f"Deferred import of {module} failed: {e}")
+
+        threading.Thread(target=warm, name="deferred-imports", daemon=True).start()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "ready_s": round(self.ready_at, 3) if self.ready_at is not None else None,
+            "components": [
+                {
+                    "name": span.name,
+                    "start_s": round(span.start, 3),
+                    "duration_s": round(span.end - span.start, 3)
+                    if span.end is not None
+                    else None,
+                    "thread": span.thread,
+                    "error": span.error,
+                }
+                for span in spans
+            ],
+        }
+
+    def waterfall(self, width: int = 30) -> str:
+        """The spans as a text waterfall"""
+        with self._lock:
+            spans = [span for span in self.spans if span.end is not None]
+        if not spans:
+            return "Startup waterfall: no components recorded"
+        total = max(span.end for span in spans) or 1e-9
+        label_width = max(len(span.name) for span in spans)
+        lines = [f"Startup waterfall (total {total:.2f}s)"]
+        for span in sorted(spans, key=lambda s: s.start):
+            first = min(int(span.start / total * width), width - 1)
+            last = min(max(first + 1, int(round(span.end / total * width))), width)
+            bar = " " * first + "#" * (last - first) + " " * (width - last)
+            lines.append(
+                f"  {span.name:<{label_width}} |{bar}| {span.start:7.2f}s "
+                f"{span.end - span.start:7.2f}s" + (" FAILED" if span.error else "")
+            )
+        if self.ready_at is not None:
+            lines.append(f"  ready for sessions at {self.ready_at:.2f}s")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
@@ -1,11 +1,13 @@
 import base64
-from pydub import AudioSegment
-from pydub.utils import make_chunks
+from typing import TYPE_CHECKING
 from ..agent.output_types import Actions
 from ..agent.output_types import DisplayText
 
+if TYPE_CHECKING:
+    from pydub import AudioSegment
 
-def _get_volume_by_chunks(audio: AudioSegment, chunk_length_ms: int) -> list:
+
+def _get_volume_by_chunks(audio: "AudioSegment", chunk_length_ms: int) -> list:
     """
     Calculate the normalized volume (RMS) for each chunk of the audio.
 
@@ -16,6 +18,8 @@ def _get_volume_by_chunks(audio: AudioSegment, chunk_length_ms: int) -> list:
     Returns:
         list: Normalized volumes for each chunk.
     """
+    from pydub.utils import make_chunks
+
     chunks = make_chunks(audio, chunk_length_ms)
     volumes = [chunk.rms for chunk in chunks]
     max_volume = max(volumes)
@@ -59,6 +63,9 @@ def prepare_audio_payload(
             "forwarded": forwarded,
         }
 
+    # pydub is imported on first use to keep it out of server startup
+    from pydub import AudioSegment
+
     try:
         audio = AudioSegment.from_file(audio_path)
         audio_bytes = audio.export(format="wav").read()
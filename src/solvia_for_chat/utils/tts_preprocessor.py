@@ -1,7 +1,142 @@
 import re
 import unicodedata
+from functools import lru_cache
 from loguru import logger
 
+# Same pattern filter_asterisks uses, applied at each "*" the scan reaches
+_ASTERISK_SPAN = re.compile(r"\*{1,}((?!\*).)*?\*{1,}")
+_WHITESPACE_RUN = re.compile(r"\s+")
+
+
+class _KeepCharTable(dict):
+    """
+    ``str.translate`` table for ``remove_special_characters``: maps a code
+    point to itself if it is a letter, number, punctuation or whitespace and
+    to None (delete) otherwise. Entries are computed on first sight and cached.
+    """
+
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        keep = unicodedata.category(char)[0] in "LNP" or char.isspace()
+        value = codepoint if keep else None
+        self[codepoint] = value
+        return value
+
+
+_KEEP_CHAR_TABLE = _KeepCharTable()
+
+
+class TTSTextFilter:
+    """
+    The filters of ``tts_filter`` fused into one pass, compiled once per set
+    of flags.
+
+    The scan jumps between the characters the enabled filters care about.
+    Asterisk spans are removed first, as ``filter_asterisks`` would on the
+    raw text. A character then counts towards the parentheses depth only
+    outside of brackets, and towards the angle-bracket depth only outside of
+    both, which is what running the nested filters one after the other does.
+    """
+
+    def __init__(
+        self,
+        remove_special_char: bool,
+        ignore_brackets: bool,
+        ignore_parentheses: bool,
+        ignore_asterisks: bool,
+        ignore_angle_brackets: bool,
+    ) -> None:
+        self.remove_special_char = remove_special_char
+        self.ignore_asterisks = ignore_asterisks
+        # Innermost-last: (left, right) for each enabled nesting filter
+        self._pairs = [
+            pair
+            for enabled, pair in (
+                (ignore_brackets, ("[", "]")),
+                (ignore_parentheses, ("(", ")")),
+                (ignore_angle_brackets, ("<", ">")),
+            )
+            if enabled
+        ]
+        specials = "".join(left + right for left, right in self._pairs)
+        if ignore_asterisks:
+            specials += "*"
+        self._structural = bool(specials)
+        self._special_pattern = (
+            re.compile("[" + re.escape(specials) + "]") if specials else None
+        )
+        # Character -> (layer index, +1 or -1)
+        self._brackets = {}
+        for layer, (left, right) in enumerate(self._pairs):
+            self._brackets[left] = (layer, 1)
+            self._brackets[right] = (layer, -1)
+
+    def _strip_structural(self, text: str) -> str:
+        pattern = self._special_pattern
+        brackets = self._brackets
+        depths = [0] * len(self._pairs)
+        hidden = 0  # Number of layers with a depth above zero
+        result = []
+        pos = 0
+        while True:
+            match = pattern.search(text, pos)
+            end = match.start() if match else len(text)
+            if end > pos and not hidden:
+                result.append(text[pos:end])
+            if not match:
+                break
+            char = text[end]
+            pos = end + 1
+
+            if char == "*":
+                span = _ASTERISK_SPAN.match(text, end)
+                if span:
+                    pos = span.end()
+                elif not hidden:
+                    # A lone "*" is ordinary text
+                    result.append(char)
+                continue
+
+            layer, step = brackets[char]
+            # Brackets of an inner layer are removed by an outer layer first
+            if any(depths[:layer]):
+                continue
+            if step > 0:
+                if not depths[layer]:
+                    hidden += 1
+                depths[layer] += 1
+            elif depths[layer]:
+                depths[layer] -= 1
+                if not depths[layer]:
+                    hidden -= 1
+
+        return _WHITESPACE_RUN.sub(" ", "".join(result)).strip()
+
+    def __call__(self, text: str) -> str:
+        if self._structural and text:
+            text = self._strip_structural(text)
+        if self.remove_special_char:
+            text = unicodedata.normalize("NFKC", text).translate(_KEEP_CHAR_TABLE)
+        return text
+
+
+@lru_cache(maxsize=None)
+def get_tts_text_filter(
+    remove_special_char: bool,
+    ignore_brackets: bool,
+    ignore_parentheses: bool,
+    ignore_asterisks: bool,
+    ignore_angle_brackets: bool,
+) -> TTSTextFilter:
+    """Return the shared compiled filter for a set of flags"""
+    return TTSTextFilter(
+        remove_special_char=remove_special_char,
+        ignore_brackets=ignore_brackets,
+        ignore_parentheses=ignore_parentheses,
+        ignore_asterisks=ignore_asterisks,
+        ignore_angle_brackets=ignore_angle_brackets,
+    )
+
 
 def tts_filter(
     text: str,
@@ -28,6 +163,41 @@ def tts_filter(
     Returns:
         str: The filtered text.
     """
+    text_filter = get_tts_text_filter(
+        remove_special_char,
+        ignore_brackets,
+        ignore_parentheses,
+        ignore_asterisks,
+        ignore_angle_brackets,
+    )
+    try:
+        text = text_filter(text)
+    except Exception as e:
+        logger.warning(f"Error in fused TTS filter: {e}")
+        logger.warning(f"Text: {text}")
+        logger.warning("Falling back to the filters one by one...")
+        text = _tts_filter_by_stage(
+            text,
+            remove_special_char,
+            ignore_brackets,
+            ignore_parentheses,
+            ignore_asterisks,
+            ignore_angle_brackets,
+        )
+
+    logger.debug(f"Filtered text: {text}")
+    return text
+
+
+def _tts_filter_by_stage(
+    text: str,
+    remove_special_char: bool,
+    ignore_brackets: bool,
+    ignore_parentheses: bool,
+    ignore_asterisks: bool,
+    ignore_angle_brackets: bool,
+) -> str:
+    """Apply the filters one after the other, skipping any that fails"""
     if ignore_asterisks:
         try:
             text = filter_asterisks(text)
@@ -65,7 +235,6 @@ def tts_filter(
             logger.warning(f"Text: {text}")
             logger.warning("Skipping...")
 
-    logger.debug(f"Filtered text: {text}")
     return text
 
 
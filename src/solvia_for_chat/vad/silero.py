@@ -74,6 +74,10 @@ class VADEngine(VADInterface):
 
         del audio_np
 
+    def pending_speech(self) -> bytes:
+        """Speech buffered so far for the current utterance (int16 PCM bytes)"""
+        return self.state.pending_speech()
+
 
 # Define state enumeration
 class State(Enum):
@@ -117,6 +121,9 @@ class StateMachine:
         self.dbs.clear()
         self.bytes.clear()
 
+    def pending_speech(self) -> bytes:
+        return b"".join(self.pre_buffer) + bytes(self.bytes)
+
     def get_smoothed_values(self, prob, db):
         self.prob_window.append(prob)
         self.db_window.append(db)
@@ -159,6 +166,9 @@ class StateMachine:
                 if self.miss_count >= self.required_misses:
                     self.state = State.INACTIVE
                     self.miss_count = 0
+                    # End-of-speech hangover starts; the utterance may still resume
+                    if len(self.probs) > 30:
+                        yield [], [], b"<|HANGOVER|>"
 
         elif self.state == State.INACTIVE:
             self.update(chunk_bytes, smoothed_prob, smoothed_db)
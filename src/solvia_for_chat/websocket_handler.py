@@ -8,6 +8,9 @@ import datetime
 from loguru import logger
 
 from .service_context import ServiceContext
+from .context_pool import ServiceContextPool
+from .session_resume import ResumableChannel, SessionResumer
+from .utils.startup_profile import startup_profile
 from .chat_group import (
     ChatGroupManager,
     handle_group_operation,
@@ -18,10 +21,16 @@ from .message_handler import message_handler
 from .utils.stream_audio import prepare_audio_payload
 from .chat_history_manager import (
     create_new_history,
-    get_history,
+    get_history_page,
     delete_history,
     get_history_list,
+    search_history,
+    history_writer,
+    configure_chat_history,
 )
+from .config_manager import Config, validate_config
+from .config_reload import CONTEXT_SUBSYSTEMS, ConfigDiff, inherit_changes
+from .engine_registry import engine_registry
 from .config_manager.utils import scan_config_alts_directory, scan_bg_directory
 from .conversations.conversation_handler import (
     handle_conversation_trigger,
@@ -29,6 +38,7 @@ from .conversations.conversation_handler import (
     handle_individual_interrupt,
 )
 from .conversations.wake_word_manager import wake_word_manager
+from .conversations.speculation import speculation_manager
 
 
 # 消息类型枚举
@@ -39,6 +49,8 @@ class MessageType(Enum):
     HISTORY = [
         "fetch-history-list",
         "fetch-and-set-history",
+        "fetch-history-page",
+        "search-history",
         "create-new-history",
         "delete-history",
     ]
@@ -57,6 +69,9 @@ class WSMessage(TypedDict, total=False):
     audio: Optional[List[float]]
     images: Optional[List[str]]
     history_uid: Optional[str]
+    before: Optional[int]
+    limit: Optional[int]
+    query: Optional[str]
     file: Optional[str]
     display_text: Optional[dict]
 
@@ -66,12 +81,19 @@ class WebSocketHandler:
 
     def __init__(self, default_context_cache: ServiceContext):
         """Initialize the WebSocket handler with default context"""
-        self.client_connections: Dict[str, WebSocket] = {}
+        self.client_connections: Dict[str, ResumableChannel] = {}
         self.client_contexts: Dict[str, ServiceContext] = {}
         self.chat_group_manager = ChatGroupManager()
         self.current_conversation_tasks: Dict[str, Optional[asyncio.Task]] = {}
         self.default_context_cache = default_context_cache
         self.received_data_buffers: Dict[str, np.ndarray] = {}
+        # Pre-initialized session contexts, started with the server
+        self.context_pool = ServiceContextPool(default_context_cache)
+        # Sessions parked after a disconnect, waiting for their client to resume them
+        self.session_resumer = SessionResumer()
+        self._pool_start: Optional[asyncio.Task] = None
+        # Config reloads waiting for a session's conversation to finish
+        self._pending_reloads: Dict[str, asyncio.Task] = {}
 
         # Message handlers mapping
         self._message_handlers = self._init_message_handlers()
@@ -84,6 +106,8 @@ class WebSocketHandler:
             "request-group-info": self._handle_group_info,
             "fetch-history-list": self._handle_history_list_request,
             "fetch-and-set-history": self._handle_fetch_history,
+            "fetch-history-page": self._handle_fetch_history_page,
+            "search-history": self._handle_search_history,
             "create-new-history": self._handle_create_history,
             "delete-history": self._handle_delete_history,
             "interrupt-signal": self._handle_interrupt,
@@ -102,9 +126,137 @@ class WebSocketHandler:
             "adaptive-vad-control": self._handle_adaptive_vad_control,
         }
 
+    async def start(self) -> None:
+        """Start the context pool and read the session resume settings"""
+        config = getattr(self.default_context_cache.system_config, "session_resume", None)
+        if config is not None:
+            self.session_resumer.configure(
+                grace_period=config.grace_period,
+                max_buffered_messages=config.max_buffered_messages,
+            )
+        # The pool clones the default context, which may still be loading
+        self._pool_start = asyncio.create_task(self._start_context_pool())
+
+    async def _start_context_pool(self) -> None:
+        await startup_profile.wait_ready()
+        await self.context_pool.start()
+
+    async def apply_config_reload(
+        self, old_config: Config, new_config: Config, diff: ConfigDiff
+    ) -> Dict[str, int]:
+        """
+        Apply a reloaded conf.yaml to the server, the default context and
+        every session, reinitializing only the subsystems in ``diff``.
+        """
+        system_config = new_config.system_config
+        if "chat_history" in diff.subsystems:
+            await asyncio.to_thread(configure_chat_history, system_config.chat_history)
+        if "engine_registry" in diff.subsystems:
+            engine_registry.configure(idle_timeout=system_config.engine_registry.idle_timeout)
+        if "session_resume" in diff.subsystems:
+            self.session_resumer.configure(
+                grace_period=system_config.session_resume.grace_period,
+                max_buffered_messages=system_config.session_resume.max_buffered_messages,
+            )
+
+        # Snapshot before the default context is touched
+        old_data, new_data = old_config.model_dump(), new_config.model_dump()
+        await self.default_context_cache.apply_config(
+            new_config, diff.subsystems & CONTEXT_SUBSYSTEMS
+        )
+        # New sessions clone the updated default context
+        if "context_pool" in diff.subsystems:
+            await self.context_pool.start()
+        await self.context_pool.invalidate()
+
+        updated = deferred = 0
+        for client_uid, context in list(self.client_contexts.items()):
+            task = self.current_conversation_tasks.get(client_uid)
+            previous = self._pending_reloads.get(client_uid)
+            if (task and not task.done()) or previous:
+                # Never in the middle of a conversation; reloads are applied in order
+                self._pending_reloads[client_uid] = asyncio.create_task(
+                    self._reload_session_when_idle(
+                        client_uid, context, old_data, new_data, diff.paths, previous
+                    )
+                )
+                deferred += 1
+            elif await self._reload_session(client_uid, context, old_data, new_data, diff.paths):
+                updated += 1
+        return {"sessions_updated": updated, "sessions_deferred": deferred}
+
+    async def _reload_session_when_idle(
+        self,
+        client_uid: str,
+        context: ServiceContext,
+        old_data: dict,
+        new_data: dict,
+        paths: List[str],
+        previous: Optional[asyncio.Task],
+    ) -> None:
+        try:
+            if previous:
+                await asyncio.gather(previous, return_exceptions=True)
+            while True:
+                task = self.current_conversation_tasks.get(client_uid)
+                if not task or task.done():
+                    break
+                await asyncio.wait([task])
+            if self.client_contexts.get(client_uid) is context:
+                await self._reload_session(client_uid, context, old_data, new_data, paths)
+        finally:
+            if self._pending_reloads.get(client_uid) is asyncio.current_task():
+                self._pending_reloads.pop(client_uid, None)
+
+    async def _reload_session(
+        self,
+        client_uid: str,
+        context: ServiceContext,
+        old_data: dict,
+        new_data: dict,
+        paths: List[str],
+    ) -> bool:
+        """Apply the reloaded values a session still inherits from conf.yaml"""
+        session_data = context.config.model_dump()
+        applied = inherit_changes(session_data, old_data, new_data, paths)
+        if not applied:
+            return False
+        try:
+            session_diff = ConfigDiff.of_paths(applied)
+            await context.apply_config(
+                validate_config(session_data),
+                session_diff.subsystems & CONTEXT_SUBSYSTEMS,
+            )
+            if session_diff.subsystems & {"live2d", "character"} and context.send_text:
+                await context.send_text(
+                    json.dumps(
+                        {
+                            "type": "set-model-and-conf",
+                            "model_info": context.live2d_model.model_info,
+                            "conf_name": context.character_config.conf_name,
+                            "conf_uid": context.character_config.conf_uid,
+                            "client_uid": client_uid,
+                        }
+                    )
+                )
+            logger.info(f"Applied reloaded config to session {client_uid}: {applied}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to apply reloaded config to session {client_uid}: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Tear down parked sessions and close the context pool"""
+        for task in self._pending_reloads.values():
+            task.cancel()
+        if self._pool_start and not self._pool_start.done():
+            self._pool_start.cancel()
+        await self.session_resumer.close()
+        await self.context_pool.close()
+
     async def handle_new_connection(
         self, websocket: WebSocket, client_uid: str
-    ) -> None:
+    ) -> str:
         """
         Handle new WebSocket connection setup
 
@@ -112,21 +264,35 @@ class WebSocketHandler:
             websocket: The WebSocket connection
             client_uid: Unique identifier for the client
 
+        Returns:
+            str: The client uid of the session, the resumed one if the
+                connection carried a valid ``resume_token``
+
         Raises:
             Exception: If initialization fails
         """
+        resume_token = websocket.query_params.get("resume_token")
+        if resume_token:
+            resumed_uid = await self._resume_session(websocket, resume_token)
+            if resumed_uid:
+                return resumed_uid
+            logger.info("Unknown or expired resume token, starting a new session")
+
         try:
-            session_service_context = await self._init_service_context(websocket.send_text, client_uid)
+            channel = ResumableChannel(websocket, self.session_resumer.max_buffered)
+            session_service_context = await self._init_service_context(channel.send_text, client_uid)
 
             await self._store_client_data(
-                websocket, client_uid, session_service_context
+                channel, client_uid, session_service_context
             )
 
             await self._send_initial_messages(
-                websocket, client_uid, session_service_context
+                channel, client_uid, session_service_context
             )
+            await self._send_resume_token(channel, client_uid)
 
             logger.info(f"Connection established for client {client_uid}")
+            return client_uid
 
         except Exception as e:
             logger.error(
@@ -135,9 +301,68 @@ class WebSocketHandler:
             await self._cleanup_failed_connection(client_uid)
             raise
 
+    async def _resume_session(self, websocket: WebSocket, resume_token: str) -> Optional[str]:
+        """Attach the websocket to a parked session and deliver what it missed"""
+        client_uid = self.session_resumer.client_for(resume_token)
+        if client_uid is None:
+            return None
+
+        parked = self.session_resumer.resume(client_uid)
+        if parked is not None:
+            channel = parked.channel
+            channel.replace(websocket)
+            taken_over = False
+        else:
+            # The old websocket has not noticed the network drop yet; take the session over
+            channel = self.client_connections.get(client_uid)
+            if channel is None:
+                return None
+            stale = channel.replace(websocket)
+            taken_over = True
+            try:
+                await stale.close()
+            except Exception:
+                pass
+        self.client_connections[client_uid] = channel
+        self.chat_group_manager.client_group_map.setdefault(client_uid, "")
+
+        try:
+            await self._send_initial_messages(
+                websocket, client_uid, self.client_contexts[client_uid]
+            )
+            # Messages sent while detached, e.g. the rest of an in-flight reply, in order
+            replayed = await channel.attach(websocket)
+            await self._send_resume_token(channel, client_uid)
+        except Exception:
+            # The new websocket failed as well; wait for another resume
+            channel.detach()
+            if not self._park_session(client_uid):
+                await self._teardown_client(client_uid)
+            raise
+
+        self.session_resumer.note_resumed(replayed, taken_over)
+        logger.info(
+            f"Session {client_uid} resumed, delivered {replayed} buffered message(s)"
+            + (f", {channel.dropped} dropped" if channel.dropped else "")
+        )
+        return client_uid
+
+    async def _send_resume_token(self, channel: ResumableChannel, client_uid: str) -> None:
+        if not self.session_resumer.enabled:
+            return
+        await channel.send_text(
+            json.dumps(
+                {
+                    "type": "resume-token",
+                    "token": self.session_resumer.issue_token(client_uid),
+                    "grace_period": self.session_resumer.grace_period,
+                }
+            )
+        )
+
     async def _store_client_data(
         self,
-        websocket: WebSocket,
+        websocket: ResumableChannel,
         client_uid: str,
         session_service_context: ServiceContext,
     ):
@@ -180,26 +405,7 @@ class WebSocketHandler:
 
     async def _init_service_context(self, send_text: Callable, client_uid: str) -> ServiceContext:
         """Initialize service context for a new session by cloning the default context"""
-        session_service_context = ServiceContext()
-        await session_service_context.load_cache(
-            config=self.default_context_cache.config.model_copy(deep=True),
-            system_config=self.default_context_cache.system_config.model_copy(
-                deep=True
-            ),
-            character_config=self.default_context_cache.character_config.model_copy(
-                deep=True
-            ),
-            live2d_model=self.default_context_cache.live2d_model,
-            asr_engine=self.default_context_cache.asr_engine,
-            tts_engine=self.default_context_cache.tts_engine,
-            vad_engine=self.default_context_cache.vad_engine,
-            agent_engine=self.default_context_cache.agent_engine,
-            mcp_server_registery=self.default_context_cache.mcp_server_registery,
-            tool_adapter=self.default_context_cache.tool_adapter,
-            send_text=send_text,
-            client_uid=client_uid,
-        )
-        return session_service_context
+        return await self.context_pool.acquire(send_text, client_uid)
 
     async def handle_websocket_communication(
         self, websocket: WebSocket, client_uid: str
@@ -211,12 +417,14 @@ class WebSocketHandler:
             websocket: The WebSocket connection
             client_uid: Unique identifier for the client
         """
+        # Handlers reply through the session's channel, so replies survive a reconnect
+        channel = self.client_connections.get(client_uid, websocket)
         try:
             while True:
                 try:
                     data = await websocket.receive_json()
                     message_handler.handle_message(client_uid, data)
-                    await self._route_message(websocket, client_uid, data)
+                    await self._route_message(channel, client_uid, data)
                 except WebSocketDisconnect:
                     raise
                 except json.JSONDecodeError:
@@ -224,7 +432,7 @@ class WebSocketHandler:
                     continue
                 except Exception as e:
                     logger.error(f"Error processing message: {e}")
-                    await websocket.send_text(
+                    await channel.send_text(
                         json.dumps({"type": "error", "message": str(e)})
                     )
                     continue
@@ -277,8 +485,40 @@ class WebSocketHandler:
             send_group_update=self.send_group_update,
         )
 
-    async def handle_disconnect(self, client_uid: str) -> None:
-        """Handle client disconnection"""
+    async def handle_disconnect(
+        self, client_uid: str, websocket: Optional[WebSocket] = None
+    ) -> None:
+        """Handle client disconnection, parking the session if it can be resumed"""
+        channel = self.client_connections.get(client_uid)
+        if websocket is not None and channel is not None and channel.websocket is not websocket:
+            # A resumed connection has taken the session over from this websocket
+            return
+        if self._park_session(client_uid):
+            # Persist what was said so far; the session itself lives on
+            await history_writer.aflush()
+            return
+        await self._teardown_client(client_uid)
+
+    def _park_session(self, client_uid: str) -> bool:
+        """Keep a disconnected session for its grace period"""
+        if not self.session_resumer.enabled or client_uid not in self.client_contexts:
+            return False
+        # Group conversations go on with the other members, so group members are not parked
+        if self.chat_group_manager.get_client_group(client_uid):
+            return False
+        channel = self.client_connections.pop(client_uid, None)
+        if channel is None:
+            return False
+        # Not invitable into a group while away
+        self.chat_group_manager.client_group_map.pop(client_uid, None)
+        self.session_resumer.park(
+            client_uid, channel, on_expire=lambda: self._teardown_client(client_uid)
+        )
+        return True
+
+    async def _teardown_client(self, client_uid: str) -> None:
+        """Release everything held by a client session"""
+        self.session_resumer.revoke(client_uid)
         group = self.chat_group_manager.get_client_group(client_uid)
         if group:
             await handle_group_interrupt(
@@ -299,7 +539,7 @@ class WebSocketHandler:
 
         # Clean up other client data
         self.client_connections.pop(client_uid, None)
-        self.client_contexts.pop(client_uid, None)
+        context = self.client_contexts.pop(client_uid, None)
         self.received_data_buffers.pop(client_uid, None)
         if client_uid in self.current_conversation_tasks:
             task = self.current_conversation_tasks[client_uid]
@@ -308,15 +548,19 @@ class WebSocketHandler:
             self.current_conversation_tasks.pop(client_uid, None)
 
         # Call context close to clean up resources (e.g., MCPClient)
-        context = self.client_contexts.get(client_uid)
         if context:
             await context.close()
 
+        # Persist the messages of the interrupted turn before reporting the disconnect
+        await history_writer.aflush()
+
         logger.info(f"Client {client_uid} disconnected")
         message_handler.cleanup_client(client_uid)
         
         # 清理唤醒词管理器中的客户端状态
         wake_word_manager.cleanup_client(client_uid)
+        await speculation_manager.discard(client_uid, reason="disconnect")
+        speculation_manager.cleanup_client(client_uid)
 
     async def broadcast_to_group(
         self, group_members: list[str], message: dict, exclude_uid: str = None
@@ -384,7 +628,9 @@ class WebSocketHandler:
     ) -> None:
         """Handle request for chat history list"""
         context = self.client_contexts[client_uid]
-        histories = get_history_list(context.character_config.conf_uid)
+        histories = await asyncio.to_thread(
+            get_history_list, context.character_config.conf_uid
+        )
         await websocket.send_text(
             json.dumps({"type": "history-list", "histories": histories})
         )
@@ -400,21 +646,74 @@ class WebSocketHandler:
         context = self.client_contexts[client_uid]
         # Update history_uid in service context
         context.history_uid = history_uid
-        context.agent_engine.set_memory_from_history(
+        # History reads flush the write queue and touch the disk, keep them off the loop
+        await asyncio.to_thread(
+            context.agent_engine.set_memory_from_history,
             conf_uid=context.character_config.conf_uid,
             history_uid=history_uid,
         )
 
-        messages = [
-            msg
-            for msg in get_history(
-                context.character_config.conf_uid,
-                history_uid,
+        # Clients that send a limit get the newest page and fetch older ones
+        # with fetch-history-page; without it the whole history is sent
+        messages, next_cursor = await asyncio.to_thread(
+            get_history_page,
+            context.character_config.conf_uid,
+            history_uid,
+            limit=data.get("limit"),
+        )
+        await websocket.send_text(
+            json.dumps(
+                {
+                    "type": "history-data",
+                    "messages": [msg for msg in messages if msg["role"] != "system"],
+                    "next_cursor": next_cursor,
+                }
+            )
+        )
+
+    async def _handle_fetch_history_page(
+        self, websocket: WebSocket, client_uid: str, data: WSMessage
+    ) -> None:
+        """Handle fetching a page of older messages of a chat history"""
+        history_uid = data.get("history_uid")
+        if not history_uid:
+            return
+
+        context = self.client_contexts[client_uid]
+        messages, next_cursor = await asyncio.to_thread(
+            get_history_page,
+            context.character_config.conf_uid,
+            history_uid,
+            before=data.get("before"),
+            limit=data.get("limit") or 50,
+        )
+        await websocket.send_text(
+            json.dumps(
+                {
+                    "type": "history-page",
+                    "history_uid": history_uid,
+                    "messages": [msg for msg in messages if msg["role"] != "system"],
+                    "next_cursor": next_cursor,
+                }
             )
-            if msg["role"] != "system"
-        ]
+        )
+
+    async def _handle_search_history(
+        self, websocket: WebSocket, client_uid: str, data: WSMessage
+    ) -> None:
+        """Handle full-text search over the chat histories of the character"""
+        query = data.get("query") or ""
+        context = self.client_contexts[client_uid]
+        results = await asyncio.to_thread(
+            search_history,
+            context.character_config.conf_uid,
+            query,
+            limit=data.get("limit") or 20,
+        )
         await websocket.send_text(
-            json.dumps({"type": "history-data", "messages": messages})
+            json.dumps(
+                {"type": "history-search-results", "query": query, "results": results}
+            )
         )
 
     async def _handle_create_history(
@@ -422,10 +721,13 @@ class WebSocketHandler:
     ) -> None:
         """Handle creation of new chat history"""
         context = self.client_contexts[client_uid]
-        history_uid = create_new_history(context.character_config.conf_uid)
+        history_uid = await asyncio.to_thread(
+            create_new_history, context.character_config.conf_uid
+        )
         if history_uid:
             context.history_uid = history_uid
-            context.agent_engine.set_memory_from_history(
+            await asyncio.to_thread(
+                context.agent_engine.set_memory_from_history,
                 conf_uid=context.character_config.conf_uid,
                 history_uid=history_uid,
             )
@@ -447,7 +749,8 @@ class WebSocketHandler:
             return
 
         context = self.client_contexts[client_uid]
-        success = delete_history(
+        success = await asyncio.to_thread(
+            delete_history,
             context.character_config.conf_uid,
             history_uid,
         )
@@ -488,6 +791,8 @@ class WebSocketHandler:
                     )
                 elif audio_bytes == b"<|RESUME|>":
                     pass
+                elif audio_bytes == b"<|HANGOVER|>":
+                    self._start_speculation(client_uid, context)
                 elif len(audio_bytes) > 1024:
                     # ⚠️ 这里可能是重复触发的源头!
                     # raw-audio-data 的VAD检测已经触发了 mic-audio-end
@@ -502,6 +807,18 @@ class WebSocketHandler:
                     #     json.dumps({"type": "control", "text": "mic-audio-end"})
                     # )
 
+    def _start_speculation(self, client_uid: str, context: ServiceContext) -> None:
+        """Start a speculative reply on the speech buffered so far (opt-in)"""
+        if not speculation_manager.is_enabled(context):
+            return
+        task = self.current_conversation_tasks.get(client_uid)
+        if task and not task.done():
+            return  # The AI is still talking; the user is interrupting, not taking a turn
+        audio_bytes = context.vad_engine.pending_speech()
+        # Same conversion as the final speech buffer below, so ASR sees the same input
+        partial_audio = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32)
+        speculation_manager.start(context, client_uid, partial_audio)
+
     async def _handle_conversation_trigger(
         self, websocket: WebSocket, client_uid: str, data: WSMessage
     ) -> None: